@@ -14,7 +14,7 @@ Long description of module's purpose
     # Check https://github.com/odoo/odoo/blob/15.0/odoo/addons/base/data/ir_module_category_data.xml
     # for the full list
     'category': 'Inventory',
-    'version': '0.1',
+    'version': '0.2',
     'license': 'LGPL-3',
     # any module necessary for this one to work correctly
     'depends': [
@@ -24,11 +24,13 @@ Long description of module's purpose
         'website',
         'stock',
         'uom',
+        'bus',
     ],
     "assets": {
         "web.assets_backend": [
             #"fulfillment/static/src/xml/stock_traceability_report_extend.xml",
             #"fulfillment/static/src/client_actions/stock_traceability_report_extend.js",
+            "fulfillment/static/src/js/picking_type_counters.js",
         ],
     },    
     # always loaded
@@ -39,6 +41,8 @@ Long description of module's purpose
         'views/product_category_views.xml',
         'wizard/stock_picking_line_import_excel.xml',
         'views/incoming_staging_views.xml',
+        'views/incoming_staging_queue_views.xml',
+        'data/ir_cron_data.xml',
         'views/portal_api_key_templates.xml',
         'views/portal_api_key_shortcut.xml',
         'views/res_users_apikeys_inherit.xml',
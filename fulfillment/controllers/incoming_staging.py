@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 # Controller for Incoming Staging API with CORS support
+from collections import deque
 from datetime import datetime
 import json
 import logging
@@ -13,7 +14,11 @@ _logger = logging.getLogger(__name__)
 # Development-friendly defaults. In production set a specific origin (not '*').
 _ALLOWED_CORS_ORIGIN = '*'
 _ALLOWED_CORS_METHODS = 'GET, POST, OPTIONS'
-_ALLOWED_CORS_HEADERS = 'Authorization, Content-Type, Accept'
+_ALLOWED_CORS_HEADERS = 'Authorization, Content-Type, Accept, Idempotency-Key'
+
+
+# Upper bound for /api/incoming_staging/batch so a single request cannot hold a worker for too long.
+_BATCH_MAX_ITEMS = 1000
 
 
 def _cors_headers():
@@ -24,131 +29,121 @@ def _cors_headers():
     }
 
 
+def _json_response(body, status, headers):
+    return Response(json.dumps(body), status=status, content_type='application/json;charset=utf-8', headers=headers)
+
+
+class _BatchParseError:
+    """Placeholder for an NDJSON line that could not be decoded (reported per item)."""
+
+    def __init__(self, details):
+        self.details = details
+
+
+def _parse_batch_body(raw):
+    """
+    Parse a batch body: a JSON array of orders, or NDJSON (one JSON object per line).
+    Returns a list of orders (undecodable NDJSON lines become _BatchParseError items),
+    or None when the body is neither.
+    """
+    raw = (raw or '').strip()
+    if raw.startswith('['):
+        try:
+            items = json.loads(raw)
+        except ValueError:
+            return None
+        return items if isinstance(items, list) else None
+    items = []
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(_BatchParseError(str(e)))
+    return items
+
+
+class _LotNumberPool:
+    """
+    Lot numbers reserved from the company lot sequence in blocks: take(n) hands out n numbers and
+    only goes to the database (one round trip) when the reserved block runs short.
+    """
+
+    def __init__(self, company, reserve=0):
+        self.company = company
+        self.numbers = deque(company._fulfillment_next_lot_numbers(reserve) if reserve > 0 else [])
+
+    def take(self, count):
+        missing = count - len(self.numbers)
+        if missing > 0:
+            self.numbers.extend(self.company._fulfillment_next_lot_numbers(missing))
+        if len(self.numbers) < count:
+            return []
+        return [self.numbers.popleft() for _i in range(count)]
+
+
 class IncomingStagingAPI(http.Controller):
     
     #<<LAGI#999
     def getnewlotno(self, company):
         """Generate a new lot/serial number using a configured sequence or fallback logic."""
-        seq = company.sudo().fulfillment_lot_sequence_id
-        if seq:
-            # Use the sequence; ensure uniqueness in case of manual edits.
-            name = seq.next_by_id()
-            return name
-        return False
+        names = company._fulfillment_next_lot_numbers(1)
+        return names[0] if names else False
     #>>
     
-    @http.route('/api/incoming_staging', type='http', auth='api_key', methods=['POST'], csrf=False)
-    def create_incoming_staging(self, **kw):
+    def _prepare_staging_vals(self, data, company, partner_id, transporter_cat, assign_lots=True):
         """
-        Create an incoming_staging record.
+        Validate one incoming order payload and build the incoming_staging create vals.
 
-        Expected JSON (application/json):
-        {
-          "resi_no": "TRX-001",
-          "type": "inbound" | "forder",
-          "datetime_string": "YYYY-MM-DDTHH:MM:SS",          
-          "products": [ ... ],
-          # The following fields are REQUIRED when type == "forder":
-          "principal_courier": "Courier Name",
-          "principal_customer_name": "Customer Name",
-          "principal_customer_address": "Customer Address"
-        }
+        Shared by the single, batch and async endpoints. Returns a tuple (vals, error) where
+        error is None on success, otherwise a (body, status) pair describing the failure.
+        With assign_lots=False no lot number is taken: the batch endpoint reserves them for
+        the valid orders only, in one block (see _assign_tracking_numbers).
         """
-        headers = _cors_headers()
-        try:
-            data = request.httprequest.get_json(force=True)
-        except Exception as e:
-            return Response(
-                json.dumps({'error': 'Invalid JSON body', 'details': str(e)}),
-                status=400, content_type='application/json;charset=utf-8', headers=headers
-            )
-
-        user = request.env.user
-        if not user.sudo().partner_id.parent_id:
-            return Response(
-                json.dumps({'error': 'Invalid API Key, it is not belong to any Principal.', 'details': str(e)}),
-                status=400, content_type='application/json;charset=utf-8', headers=headers
-            )
+        if not isinstance(data, dict):
+            return None, ({'error': 'Invalid order, expected a JSON object'}, 400)
 
         # Required top-level fields (type may be 'inbound' or 'forder')
         required = ['resi_no', 'type', 'datetime_string', 'products', 'target_market']
         for f in required:
             if f not in data:
-                return Response(
-                    json.dumps({'error': f'Missing field: {f}'}),
-                    status=400, content_type='application/json;charset=utf-8', headers=headers
-                )
+                return None, ({'error': f'Missing field: {f}'}, 400)
+
+        # Text fields must be strings (a number / object would fail later, outside item error handling)
+        for f in ('resi_no', 'datetime_string', 'target_market', 'principal_courier',
+                  'principal_customer_name', 'principal_customer_address', 'partner_type'):
+            if data.get(f) is not None and not isinstance(data[f], str):
+                return None, ({'error': f"Invalid '{f}' value, expected a string"}, 400)
+        if not isinstance(data['resi_no'], str) or not data['resi_no'].strip():
+            return None, ({'error': 'resi_no is required and cannot be empty'}, 400)
 
         # Validate type
         if data['type'] not in ('inbound', 'forder', 'return'):
-            return Response(
-                json.dumps({'error': "Invalid 'type' value. Expected 'inbound' or 'forder'."}),
-                status=400, content_type='application/json;charset=utf-8', headers=headers
-            )
+            return None, ({'error': "Invalid 'type' value. Expected 'inbound' or 'forder'."}, 400)
 
         # Validate datetime_string
         try:
             datetime.fromisoformat(data['datetime_string'])
         except Exception:
-            return Response(
-                json.dumps({'error': "Invalid 'datetime_string'. Expected ISO format like 2025-10-26T01:13:55"}),
-                status=400, content_type='application/json;charset=utf-8', headers=headers
-            )
+            return None, ({'error': "Invalid 'datetime_string'. Expected ISO format like 2025-10-26T01:13:55"}, 400)
 
         # If type == 'forder' then require principal_* fields and validate courier exists in Transporter category
         if data['type'] == 'forder':
             principal_fields = ['principal_courier', 'principal_customer_name', 'principal_customer_address']
-            try:
-                # Use sudo() to read company setting and partner/category safely regardless of caller permissions.
-                company = request.env.company.sudo()
-                transporter_cat = company.fulfillment_transporter_category_id
-            except AccessError as ae:
-                # If for some reason we cannot read company/category, return a helpful error.
-                _logger.exception("Access error when reading company transporter category: %s", ae)
-                return Response(
-                    json.dumps({
-                        'error': 'access_error_reading_transporter_category',
-                        'details': 'The API user does not have permission to read company transporter settings (res.company / res.partner.category).'
-                                   ' Ask your administrator to grant read access or ensure the endpoint runs with sudo.',
-                    }),
-                    status=403, content_type='application/json;charset=utf-8', headers=headers
-                )
-
             transporter_info = {
                 'id': transporter_cat.id if transporter_cat else None,
                 'name': transporter_cat.name if transporter_cat else None,
             }
-
-            # find a sample partner that belongs to the transporter category (no name filter)
-            sample_partner_info = []
-            if transporter_cat:
-                Partner = request.env['res.partner'].sudo()
-                sample_partner = Partner.search([('category_id', 'in', [transporter_cat.id])])
-                for _courier in sample_partner:
-                    # convert sample_partner into a JSON string for inclusion in API error responses
-                    sample_obj = {
-                        # 'id': sample_partner.id,
-                        'name': _courier.name,
-                        # 'email': sample_partner.email or None,
-                        # 'phone': sample_partner.phone or None,
-                    }
-                    sample_partner_info.append(sample_obj)
-            if sample_partner_info:
-                sample_partner_info = json.dumps(sample_partner_info, ensure_ascii=False)
-            else:
-                sample_partner_info = ''
-
             for pf in principal_fields:
                 v = data.get(pf)
                 if not v or (isinstance(v, str) and not v.strip()):
                     # include transporter info to help callers configure system correctly
-                    return Response(
-                        json.dumps({
-                            'error': f"Missing or empty field required for 'forder': {pf}",
-                            'transporter_category': transporter_info,
-                        }),
-                        status=400, content_type='application/json;charset=utf-8', headers=headers
-                    )
+                    return None, ({
+                        'error': f"Missing or empty field required for 'forder': {pf}",
+                        'transporter_category': transporter_info,
+                    }, 400)
 
                 # additional validation for principal_courier: ensure a partner exists that belongs to the
                 # configured Transporter category and whose name matches (ilike) the provided courier string.
@@ -156,92 +151,61 @@ class IncomingStagingAPI(http.Controller):
                     courier_name = (v or '').strip()
                     if not transporter_cat:
                         # transporter category not configured -> instruct caller
-                        return Response(
-                            json.dumps({
-                                'error': "Transporter category is not configured in company settings.",
-                                'expected_setting': 'company.fulfillment_transporter_category_id',
-                                'provided_principal_courier': courier_name,
-                            }),
-                            status=400, content_type='application/json;charset=utf-8', headers=headers
-                        )
-                    # search partner (sudo to avoid ACL issues), match by transporter category and name ilike courier_name
-                    Partner = request.env['res.partner'].sudo()
-                    partner = Partner.search([('category_id', 'in', [transporter_cat.id]), ('name', 'ilike', courier_name)], limit=1)
+                        return None, ({
+                            'error': "Transporter category is not configured in company settings.",
+                            'expected_setting': 'company.fulfillment_transporter_category_id',
+                            'provided_principal_courier': courier_name,
+                        }, 400)
+                    # resolve through the cached courier index (sudo to avoid ACL issues)
+                    partner = request.env['res.partner'].sudo()._resolve_courier(courier_name, request.env.company)
                     if not partner:
                         # No matching transporter partner found — return error with transporter category info
-                        return Response(
-                            json.dumps({
-                                'error': "Transporter partner not found for provided principal_courier.",
-                                'provided_principal_courier': courier_name,
-                                'available_transporter': sample_partner_info,
-                                'hint': "Ensure a partner exists with a name matching the courier and is assigned the configured Transporter category."
-                            }),
-                            status=400, content_type='application/json;charset=utf-8', headers=headers
-                        )
-
-        partner = False
-        partner_id = user.sudo().partner_id.parent_id.id
-        partner_model = request.env['res.partner'].sudo()        
-        partner = partner_model.search([('id', '=', partner_id )], limit=1)    
-
-        company = user.sudo().partner_id.company_id or request.env.company
-
-        # Check user is member of partner
-        user = request.env.user
-        if not user.partner_id or not user.partner_id.parent_id or user.partner_id.parent_id.id != partner_id:
-            return Response(json.dumps({'error': f'user {user.name} is not contact member of company {partner.name}'}),
-                            status=400, content_type='application/json;charset=utf-8', headers=headers)
+                        return None, ({
+                            'error': "Transporter partner not found for provided principal_courier.",
+                            'provided_principal_courier': courier_name,
+                            'available_transporter': self._available_transporter_info(),
+                            'hint': "Ensure a partner exists with a name matching the courier and is assigned the configured Transporter category."
+                        }, 400)
 
         # Validate products array and build lines
         products = data.get('products') or []
         if not isinstance(products, list) or len(products) == 0:
-            return Response(json.dumps({'error': 'products must be a non-empty array'}),
-                            status=400, content_type='application/json;charset=utf-8', headers=headers)
+            return None, ({'error': 'products must be a non-empty array'}, 400)
 
         product_lines = []
         for idx, p in enumerate(products, start=1):
+            if not isinstance(p, dict):
+                return None, ({'error': f'product at index {idx} must be a JSON object'}, 400)
+            for f in ('product_no', 'product_nanme', 'product_uom'):
+                if p.get(f) is not None and not isinstance(p[f], str):
+                    return None, ({'error': f'product at index {idx} has invalid {f}, expected a string'}, 400)
             # product_qty
+            raw_qty = p.get('product_qty')
+            if isinstance(raw_qty, bool) or not isinstance(raw_qty, (int, float, str, type(None))):
+                return None, ({'error': f'product at index {idx} has invalid product_qty'}, 400)
             try:
-                qty = float(p.get('product_qty') or 0)
-            except Exception:
-                return Response(json.dumps({'error': f'product at index {idx} has invalid product_qty'}),
-                                status=400, content_type='application/json;charset=utf-8', headers=headers)
+                qty = float(raw_qty or 0)
+            except ValueError:
+                return None, ({'error': f'product at index {idx} has invalid product_qty'}, 400)
+            if qty != qty or qty in (float('inf'), float('-inf')):
+                return None, ({'error': f'product at index {idx} has invalid product_qty'}, 400)
 
             if qty < 0:
-                return Response(json.dumps({'error': f'product at index {idx} has negative product_qty'}),
-                                status=400, content_type='application/json;charset=utf-8', headers=headers)
-            #<<LAGI#999
-            if data['type'] in ('inbound','return'):
-                # note: we use auto lot from sequence.
-                trackno = self.getnewlotno(company)
-                if not trackno:
-                    return Response(json.dumps({'error': 'Setting sequence untuk lot no. belum di konfigurasi di company.'}),
-                                status=400, content_type='application/json;charset=utf-8', headers=headers)
-                product_lines.append({
-                    'product_no': p.get('product_no') or '',
-                    'product_nanme': p.get('product_nanme') or '',
-                    'product_qty': qty,
-                    'product_uom': p.get('product_uom') or '',
-                    'tracking_type': 'lot',
-                    'tracking_no': trackno,
-                })
-            else:
-                product_lines.append({
-                    'product_no': p.get('product_no') or '',
-                    'product_nanme': p.get('product_nanme') or '',
-                    'product_qty': qty,
-                    'product_uom': p.get('product_uom') or '',
-                })
-            #>>
+                return None, ({'error': f'product at index {idx} has negative product_qty'}, 400)
+            product_lines.append({
+                'product_no': p.get('product_no') or '',
+                'product_nanme': p.get('product_nanme') or '',
+                'product_qty': qty,
+                'product_uom': p.get('product_uom') or '',
+            })
 
         # Build vals for create; include principal_* only when present (and they are required for 'forder' by earlier check)
         target_market = (data['target_market'] or '').lower().strip()
         if not target_market:
-            return Response(json.dumps({'error': f'target_market is required and cannot be empty'}),
-                                status=400, content_type='application/json;charset=utf-8', headers=headers)
+            return None, ({'error': 'target_market is required and cannot be empty'}, 400)
         if not target_market in ['b2b','b2c']:
-            return Response(json.dumps({'error': f'target_market must be either "B2B" or "B2C"'}),
-                                status=400, content_type='application/json;charset=utf-8', headers=headers)
+            return None, ({'error': 'target_market must be either "B2B" or "B2C"'}, 400)
+
         vals = {
             'transaction_no': data['resi_no'],
             'type': data['type'],
@@ -259,62 +223,118 @@ class IncomingStagingAPI(http.Controller):
             vals['principal_customer_address'] = (data.get('principal_customer_address') or '').strip()
             vals['partner_type'] = (data.get('partner_type') or '').strip()
 
+        #<<LAGI#999
+        # note: we use auto lot from sequence, one block for all lines of the order
+        # (taken only once the order is valid so no number is burnt on rejected payloads).
+        if assign_lots and not self._assign_tracking_numbers(vals, _LotNumberPool(company)):
+            return None, self._lot_sequence_error()
+        #>>
+        return vals, None
+
+    def _lot_sequence_error(self):
+        return {'error': 'Setting sequence untuk lot no. belum di konfigurasi di company.'}, 400
+
+    def _assign_tracking_numbers(self, vals, lot_pool):
+        """Give every line of an inbound/return order a lot number from `lot_pool`.
+        Returns False when the company has no lot sequence configured."""
+        if vals['type'] not in ('inbound', 'return'):
+            return True
+        lines = [command[2] for command in vals['products']]
+        tracknos = lot_pool.take(len(lines))
+        if not tracknos:
+            return False
+        for line, trackno in zip(lines, tracknos):
+            line['tracking_type'] = 'lot'
+            line['tracking_no'] = trackno
+        return True
+
+    def _available_transporter_info(self):
+        """JSON list of transporter partner names, only built for error responses."""
+        names = request.env['res.partner'].sudo()._get_transporter_names(request.env.company)
+        return json.dumps([{'name': name} for name in names], ensure_ascii=False) if names else ''
+
+    def _auth_principal(self):
+        """
+        Resolve the principal partner of the API user.
+        Returns (partner_id, company, error) where error is a (body, status) pair or None.
+        """
+        user = request.env.user
+        if not user.sudo().partner_id.parent_id:
+            return False, False, ({'error': 'Invalid API Key, it is not belong to any Principal.'}, 400)
+
+        partner_id = user.sudo().partner_id.parent_id.id
+        partner = request.env['res.partner'].sudo().browse(partner_id)
+        company = user.sudo().partner_id.company_id or request.env.company
+
+        # Check user is member of partner
+        if not user.partner_id or not user.partner_id.parent_id or user.partner_id.parent_id.id != partner_id:
+            return False, False, ({'error': f'user {user.name} is not contact member of company {partner.name}'}, 400)
+        return partner_id, company, None
+
+    def _transporter_category(self):
+        # Use sudo() to read company setting and partner/category safely regardless of caller permissions.
+        return request.env.company.sudo().fulfillment_transporter_category_id
+
+    @http.route('/api/incoming_staging', type='http', auth='api_key', methods=['POST'], csrf=False)
+    def create_incoming_staging(self, **kw):
+        """
+        Create an incoming_staging record.
+
+        Expected JSON (application/json):
+        {
+          "resi_no": "TRX-001",
+          "type": "inbound" | "forder",
+          "datetime_string": "YYYY-MM-DDTHH:MM:SS",          
+          "products": [ ... ],
+          # The following fields are REQUIRED when type == "forder":
+          "principal_courier": "Courier Name",
+          "principal_customer_name": "Customer Name",
+          "principal_customer_address": "Customer Address"
+        }
+        """
+        headers = _cors_headers()
+        try:
+            data = request.httprequest.get_json(force=True)
+        except Exception as e:
+            return _json_response({'error': 'Invalid JSON body', 'details': str(e)}, 400, headers)
+
+        partner_id, company, error = self._auth_principal()
+        if error:
+            return _json_response(error[0], error[1], headers)
+
+        return self._idempotent_response(data, partner_id, headers,
+                                         lambda: self._create_one(data, company, partner_id), 'sync')
+
+    def _create_one(self, data, company, partner_id):
+        """Validate and create one staging record. Returns the response as a (body, status) pair."""
+        try:
+            transporter_cat = self._transporter_category()
+        except AccessError as ae:
+            # If for some reason we cannot read company/category, return a helpful error.
+            _logger.exception("Access error when reading company transporter category: %s", ae)
+            return {
+                'error': 'access_error_reading_transporter_category',
+                'details': 'The API user does not have permission to read company transporter settings (res.company / res.partner.category).'
+                           ' Ask your administrator to grant read access or ensure the endpoint runs with sudo.',
+            }, 403
+
+        vals, error = self._prepare_staging_vals(data, company, partner_id, transporter_cat)
+        if error:
+            return error
+
         staging_model = request.env['incoming_staging'].sudo()  #with_user(request.env.user.id)
         try:
             with request.env.cr.savepoint():
                 record = staging_model.create(vals)
             res = {'id': record.id, 'transaction_no': record.transaction_no, 'message': 'created'}
 
-            # determine company's configured priority label (fallback to 'Instan' if not set)
-            rec = record.sudo()
-            company = rec.partner_id.company_id or request.env.company
-            try:
-                blocks_auto = bool(getattr(company, 'fulfillment_do_not_create_pick', False))
-            except Exception:
-                blocks_auto = False
-
-            if not blocks_auto:
-                # Please add code here (GitHUb_Copilot_Request#001)
-                # if type = 'forder' and courier priority = instan (based on setting) then execute incoming_staging.action_create_transfer()
-                
-                # principal_courier_id is computed/stored on incoming_staging -> res.partner
-                courier_partner = rec.principal_courier_id
-                if courier_partner:                    
-                    priority_label = (company.fulfillment_courier_label_priority or 'Instan').strip().lower()
-
-                    # partner label (may be stored on partner or computed)
-                    partner_label = (courier_partner.courier_scoring_label or '').strip().lower()
-
-                    if partner_label and partner_label == priority_label:
-                        _logger.info(
-                            "Auto-creating transfer for incoming_staging %s because courier priority is '%s'",
-                            rec.id, partner_label
-                        )
-                        try:
-                            # action_create_transfer can return a list of results; run as sudo to avoid ACL issues
-                            results = rec.sudo().action_create_transfer()
-                            # include summary in API response for client visibility
-                            res['auto_transfer'] = {
-                                'status': 'ok',
-                                'results': results,
-                            }
-                        except Exception as e:
-                            _logger.exception("Auto create transfer failed for incoming_staging %s: %s", rec.id, e)
-                            res['auto_transfer'] = {
-                                'status': 'error',
-                                'error': str(e),
-                            }
-                else:
-                    # Optional: include a hint if no principal_courier_id resolved
-                    if data['type'] == 'forder':
-                        res.setdefault('auto_transfer', {'status': 'skipped', 'reason': 'no_principal_courier_id'})
-                    else:
-                        res.setdefault('auto_transfer', {'status': 'skipped', 'reason': 'auto_transfer disabled for inbound'})
+            auto_transfer = record._run_auto_transfer().get(record.id)
+            if auto_transfer:
+                res['auto_transfer'] = auto_transfer
 
-            return Response(json.dumps(res), status=201, content_type='application/json;charset=utf-8', headers=headers)
+            return res, 201
         except ValidationError as vex:
-            return Response(json.dumps({'error': 'validation_error', 'details': str(vex)}),
-                            status=400, content_type='application/json;charset=utf-8', headers=headers)
+            return {'error': 'validation_error', 'details': str(vex)}, 400
         except Exception as exc:
             # still good to try rollback for unexpected errors
             try:
@@ -322,11 +342,225 @@ class IncomingStagingAPI(http.Controller):
             except Exception:
                 _logger.exception("rollback failed")
             _logger.exception("unexpected error")
-            return Response(json.dumps({'error': 'server_error', 'details': str(exc)}),
-                            status=500, content_type='application/json;charset=utf-8', headers=headers)
+            return {'error': 'server_error', 'details': str(exc)}, 500
+
+    def _idempotent_response(self, data, partner_id, headers, handler, scope):
+        """
+        Serve `handler` with Idempotency-Key semantics.
+
+        The key is the Idempotency-Key header, or the resi_no when the header is absent,
+        scoped to the endpoint (`scope`: 'sync', 'async', 'batch').
+        A stored (non-expired) successful response for the same key and payload is replayed
+        as-is without touching staging, QR or transfer code. Reusing an explicit
+        Idempotency-Key with a different payload is rejected with 422.
+        """
+        Idempotency = request.env['incoming_staging_idempotency'].sudo()
+        header_key = (request.httprequest.headers.get('Idempotency-Key') or '').strip()
+        key = Idempotency._make_key(header_key, data, scope)
+        request_hash = Idempotency._hash_payload(data)
+
+        stored = Idempotency._lookup(partner_id, key) if key else None
+        if stored:
+            if stored.request_hash == request_hash:
+                return _json_response(json.loads(stored.response_body), stored.status_code,
+                                      dict(headers, **{'Idempotent-Replayed': 'true'}))
+            if header_key:
+                return _json_response({'error': 'idempotency_key_reused',
+                                       'details': 'Idempotency-Key was already used with a different payload.'},
+                                      422, headers)
+
+        body, status = handler()
+        if key and 200 <= status < 300:
+            try:
+                Idempotency._store(partner_id, key, request_hash, body, status)
+            except Exception:
+                # A concurrent request with the same key won the race: drop our work
+                # so the retry replays the winner's response.
+                _logger.info("Idempotency-Key %s stored concurrently for partner %s, rolling back", key, partner_id)
+                request.env.cr.rollback()
+                return _json_response({'error': 'idempotency_conflict',
+                                       'details': 'A request with the same Idempotency-Key is being processed, retry later.'},
+                                      409, headers)
+        return _json_response(body, status, headers)
+
+    @http.route('/api/incoming_staging/batch', type='http', auth='api_key', methods=['POST'], csrf=False)
+    def create_incoming_staging_batch(self, **kw):
+        """
+        Create many incoming_staging records in one call.
+
+        Body is either a JSON array of orders (same shape as /api/incoming_staging) or an
+        NDJSON stream (one order object per line). All orders are validated first, then
+        created with a single create() over the valid ones. Each order gets its own result:
+          {"index": 0, "resi_no": "...", "status": "created" | "duplicate" | "error", ...}
+        A bad order never fails the rest of the batch.
+        """
+        headers = _cors_headers()
+        raw = request.httprequest.get_data(as_text=True)
+        items = _parse_batch_body(raw)
+        if items is None:
+            return _json_response({'error': 'Invalid JSON body', 'details': 'Expected a JSON array or NDJSON lines'}, 400, headers)
+        if not items:
+            return _json_response({'error': 'batch must contain at least one order'}, 400, headers)
+        if len(items) > _BATCH_MAX_ITEMS:
+            return _json_response({'error': f'batch too large: {len(items)} orders (max {_BATCH_MAX_ITEMS})'}, 413, headers)
+
+        partner_id, company, error = self._auth_principal()
+        if error:
+            return _json_response(error[0], error[1], headers)
+
+        # a batch has no single resi_no: only an explicit Idempotency-Key makes it replayable
+        return self._idempotent_response(raw, partner_id, headers,
+                                         lambda: self._create_batch(items, company, partner_id), 'batch')
+
+    def _create_batch(self, items, company, partner_id):
+        """Validate and create the orders of a batch. Returns the response as a (body, status) pair."""
+        try:
+            transporter_cat = self._transporter_category()
+        except AccessError as ae:
+            _logger.exception("Access error when reading company transporter category: %s", ae)
+            return {'error': 'access_error_reading_transporter_category'}, 403
+
+        results = [None] * len(items)
+        staging_model = request.env['incoming_staging'].sudo()
+
+        # Duplicate detection: one query for resi numbers already in the database,
+        # plus repeated resi numbers inside this batch.
+        resi_nos = {d['resi_no'] for d in items if isinstance(d, dict) and isinstance(d.get('resi_no'), str) and d['resi_no']}
+        seen = set(staging_model.search([('transaction_no', 'in', list(resi_nos))]).mapped('transaction_no')) if resi_nos else set()
+
+        pending = []  # (index, vals)
+        for idx, data in enumerate(items):
+            if isinstance(data, _BatchParseError):
+                results[idx] = {'index': idx, 'status': 'error', 'error': 'Invalid JSON body', 'details': data.details}
+                continue
+            resi_no = data.get('resi_no') if isinstance(data, dict) else None
+            if isinstance(resi_no, str) and resi_no in seen:
+                results[idx] = {'index': idx, 'resi_no': resi_no, 'status': 'duplicate'}
+                continue
+            vals, error = self._prepare_staging_vals(data, company, partner_id, transporter_cat, assign_lots=False)
+            if error:
+                results[idx] = dict(error[0], index=idx, resi_no=resi_no, status='error')
+                continue
+            if isinstance(resi_no, str):
+                seen.add(resi_no)
+            pending.append((idx, vals))
+
+        # Reserve the lot numbers of the valid inbound/return orders in one sequence round trip
+        lot_lines = sum(len(vals['products']) for _idx, vals in pending if vals['type'] in ('inbound', 'return'))
+        if lot_lines:
+            lot_pool = _LotNumberPool(company, reserve=lot_lines)
+            valid = []
+            for idx, vals in pending:
+                if self._assign_tracking_numbers(vals, lot_pool):
+                    valid.append((idx, vals))
+                else:
+                    results[idx] = dict(self._lot_sequence_error()[0], index=idx,
+                                        resi_no=vals['transaction_no'], status='error')
+            pending = valid
 
-    # OPTIONS preflight for the API endpoint
-    @http.route('/api/incoming_staging', type='http', auth='none', methods=['OPTIONS'], csrf=False)
+        records = staging_model.browse()
+        if pending:
+            try:
+                with request.env.cr.savepoint():
+                    records = staging_model.create([vals for _idx, vals in pending])
+                for (idx, vals), record in zip(pending, records):
+                    results[idx] = {'index': idx, 'resi_no': vals['transaction_no'], 'status': 'created', 'id': record.id}
+            except Exception as exc:
+                # Some order failed at create time (constraint / QR generation): isolate it by
+                # falling back to one savepoint per order so the good ones still go through.
+                _logger.info("Batch create failed (%s), retrying %d orders one by one", exc, len(pending))
+                for idx, vals in pending:
+                    try:
+                        with request.env.cr.savepoint():
+                            record = staging_model.create(vals)
+                        records |= record
+                        results[idx] = {'index': idx, 'resi_no': vals['transaction_no'], 'status': 'created', 'id': record.id}
+                    except ValidationError as vex:
+                        results[idx] = {'index': idx, 'resi_no': vals['transaction_no'], 'status': 'error',
+                                        'error': 'validation_error', 'details': str(vex)}
+                    except Exception as e:
+                        _logger.exception("unexpected error creating staging %s in batch", vals['transaction_no'])
+                        results[idx] = {'index': idx, 'resi_no': vals['transaction_no'], 'status': 'error',
+                                        'error': 'server_error', 'details': str(e)}
+
+        if records:
+            auto = records._run_auto_transfer()
+            for res in results:
+                if res.get('status') == 'created' and res['id'] in auto:
+                    res['auto_transfer'] = auto[res['id']]
+
+        summary = {'total': len(results)}
+        for status in ('created', 'duplicate', 'error'):
+            summary[status] = sum(1 for r in results if r['status'] == status)
+        return {'summary': summary, 'results': results}, 200
+
+    @http.route('/api/incoming_staging/async', type='http', auth='api_key', methods=['POST'], csrf=False)
+    def create_incoming_staging_async(self, **kw):
+        """
+        Accept-and-queue variant of /api/incoming_staging (same JSON body).
+
+        The payload is validated and queued; staging creation, QR generation and the
+        auto-transfer run in the background queue worker. Responds 202 with a ticket:
+          {"ticket": 42, "resi_no": "...", "state": "queued", "status_url": "/api/incoming_staging/ticket/42"}
+        """
+        headers = _cors_headers()
+        try:
+            data = request.httprequest.get_json(force=True)
+        except Exception as e:
+            return _json_response({'error': 'Invalid JSON body', 'details': str(e)}, 400, headers)
+
+        partner_id, company, error = self._auth_principal()
+        if error:
+            return _json_response(error[0], error[1], headers)
+
+        return self._idempotent_response(data, partner_id, headers,
+                                         lambda: self._enqueue_one(data, company, partner_id), 'async')
+
+    def _enqueue_one(self, data, company, partner_id):
+        """Validate one order and queue it. Returns the response as a (body, status) pair."""
+        try:
+            transporter_cat = self._transporter_category()
+        except AccessError as ae:
+            _logger.exception("Access error when reading company transporter category: %s", ae)
+            return {'error': 'access_error_reading_transporter_category'}, 403
+
+        vals, error = self._prepare_staging_vals(data, company, partner_id, transporter_cat, assign_lots=False)
+        if error:
+            return error
+
+        # Reject early what the worker would reject anyway (resi_no already staged or queued)
+        resi_no = vals['transaction_no']
+        if request.env['incoming_staging'].sudo().search_count([('transaction_no', '=', resi_no)], limit=1) or \
+                request.env['incoming_staging_queue'].sudo().search_count(
+                    [('transaction_no', '=', resi_no), ('state', '=', 'queued')], limit=1):
+            return {'error': 'validation_error', 'details': 'resi_no must be unique!'}, 400
+
+        # lot numbers are only taken for orders that are actually queued
+        if not self._assign_tracking_numbers(vals, _LotNumberPool(company)):
+            return self._lot_sequence_error()
+
+        ticket = request.env['incoming_staging_queue']._enqueue(vals)
+        res = ticket._get_status()
+        res['status_url'] = f'/api/incoming_staging/ticket/{ticket.id}'
+        return res, 202
+
+    @http.route('/api/incoming_staging/ticket/<int:ticket_id>', type='http', auth='api_key', methods=['GET'], csrf=False)
+    def incoming_staging_ticket_status(self, ticket_id, **kw):
+        """Poll the state of an async ticket: queued, done (with the creation result) or error."""
+        headers = _cors_headers()
+        partner_id, company, error = self._auth_principal()
+        if error:
+            return _json_response(error[0], error[1], headers)
+
+        ticket = request.env['incoming_staging_queue'].sudo().search(
+            [('id', '=', ticket_id), ('partner_id', '=', partner_id)], limit=1)
+        if not ticket:
+            return _json_response({'error': 'ticket_not_found', 'ticket': ticket_id}, 404, headers)
+        return _json_response(ticket._get_status(), 200, headers)
+
+    # OPTIONS preflight for the API endpoints
+    @http.route(['/api/incoming_staging', '/api/incoming_staging/batch', '/api/incoming_staging/async',
+                 '/api/incoming_staging/ticket/<int:ticket_id>'], type='http', auth='none', methods=['OPTIONS'], csrf=False)
     def create_incoming_staging_options(self, **kw):
         headers = _cors_headers()
         return Response('', status=204, headers=headers)
@@ -395,6 +629,46 @@ class IncomingStagingAPI(http.Controller):
                             "500": {"description": "Server Error"}
                         }
                     }
+                },
+                "/api/incoming_staging/async": {
+                    "post": {
+                        "summary": "Queue an incoming staging (same body as /api/incoming_staging); processed in background",
+                        "security": [{"bearerAuth": []}],
+                        "responses": {
+                            "202": {"description": "Accepted: {ticket, resi_no, state, status_url}"},
+                            "400": {"description": "Bad Request"},
+                            "401": {"description": "Unauthorized"}
+                        }
+                    }
+                },
+                "/api/incoming_staging/ticket/{ticket_id}": {
+                    "get": {
+                        "summary": "Status of an async ticket (queued / done / error)",
+                        "security": [{"bearerAuth": []}],
+                        "responses": {
+                            "200": {"description": "Ticket status, with the creation result once processed"},
+                            "404": {"description": "Unknown ticket"}
+                        }
+                    }
+                },
+                "/api/incoming_staging/batch": {
+                    "post": {
+                        "summary": "Create many incoming staging records (JSON array or NDJSON, max %d orders)" % _BATCH_MAX_ITEMS,
+                        "security": [{"bearerAuth": []}],
+                        "requestBody": {
+                            "required": True,
+                            "content": {
+                                "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+                                "application/x-ndjson": {"schema": {"type": "string"}}
+                            }
+                        },
+                        "responses": {
+                            "200": {"description": "Per-order results: created / duplicate / error"},
+                            "400": {"description": "Bad Request"},
+                            "401": {"description": "Unauthorized"},
+                            "413": {"description": "Too many orders in one batch"}
+                        }
+                    }
                 }
             },
             "components": {
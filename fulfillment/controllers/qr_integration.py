@@ -1,16 +1,64 @@
 # -*- coding: utf-8 -*-
 from odoo import http
-from odoo.http import request
+from odoo.http import request, Response
+from odoo.addons.fulfillment.models.incoming_staging import _qr_hash, _render_qr_png, _render_qr_svg
+from functools import lru_cache
 import json
 import logging
 
 _logger = logging.getLogger(__name__)
 
+_QR_MIMETYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+@lru_cache(maxsize=512)
+def _cached_qr_image(payload_text, kind):
+    """Bounded LRU of rendered QR images, keyed by payload (so by payload hash) and format."""
+    if kind == 'svg':
+        return _render_qr_svg(payload_text)
+    return _render_qr_png(payload_text)
+
+
 class IncomingStagingQRIntegration(http.Controller):
+    @http.route('/incoming_staging/<int:staging_id>/qr.png', type='http', auth='user', methods=['GET'])
+    def incoming_staging_qr_png(self, staging_id, **kw):
+        return self._qr_image_response(staging_id, 'png')
+
+    @http.route('/incoming_staging/<int:staging_id>/qr.svg', type='http', auth='user', methods=['GET'])
+    def incoming_staging_qr_svg(self, staging_id, **kw):
+        return self._qr_image_response(staging_id, 'svg')
+
+    def _qr_image_response(self, staging_id, kind):
+        """
+        Render the QR of an incoming_staging record on demand from qr_payload.
+        The strong ETag is the payload hash, so clients revalidate with If-None-Match and get a
+        304 until the payload changes; rendered images are kept in a bounded in-process LRU.
+        """
+        # read with the user's access rights
+        record = request.env['incoming_staging'].search([('id', '=', staging_id)], limit=1)
+        if not record:
+            return request.not_found()
+        payload_text = record.qr_payload or record._build_qr_payload()
+        etag = f'{_qr_hash(payload_text)}-{kind}'
+        headers = [
+            ('ETag', f'"{etag}"'),
+            ('Cache-Control', 'private, max-age=3600'),
+        ]
+        if request.httprequest.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+        try:
+            content = _cached_qr_image(payload_text, kind)
+        except ImportError as ie:
+            _logger.error("QR generation unavailable for incoming_staging %s: %s", staging_id, ie)
+            return Response(str(ie), status=503, content_type='text/plain')
+        headers.append(('Content-Type', _QR_MIMETYPES[kind]))
+        return Response(content, status=200, headers=headers)
+
     @http.route('/mobile_warehouse/api/process_incoming_qr', type='jsonrpc', auth='user', methods=['POST'], csrf=False)
     def process_incoming_qr(self, payload=None, **kw):
         """
-        Accept a JSON payload (sent by stockmobilescanner frontend) that was decoded from a QR.
+        Accept a JSON payload (sent by stockmobilescanner frontend) that was decoded from a QR,
+        or the raw QR text for the compact ('IS1C:...') and reference-only ('IS1R:...') modes.
         Expected payload shape (example):
           {
             "qr_type": "incomingstaging",
@@ -24,8 +72,12 @@ class IncomingStagingQRIntegration(http.Controller):
         Returns a JSON structure with the results list returned by action_create_transfer or an error.
         """
         try:
-            # payload may be a dict (route type='jsonrpc') or a JSON string - normalize
-            data = payload if isinstance(payload, dict) else (json.loads(payload) if isinstance(payload, str) else None)
+            # payload may be a dict (route type='jsonrpc') or the raw QR text (JSON, compact or
+            # reference-only mode, see incoming_staging._build_qr_payload) - normalize
+            if isinstance(payload, str):
+                data = request.env['incoming_staging']._decode_qr_payload(payload)
+            else:
+                data = payload if isinstance(payload, dict) else None
         except Exception as e:
             _logger.exception("Failed to parse payload for process_incoming_qr: %s", e)
             return {'success': False, 'error': 'invalid_payload', 'details': str(e)}
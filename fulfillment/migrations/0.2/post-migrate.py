@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+stock.picking.transporter_partner_ids is no longer stored (it is computed from the cached
+per-company transporter set), drop the relation table that held one row per picking and
+transporter partner.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+_RELATION = 'res_partner_stock_picking_rel'
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # keep the table if another stored field still uses it
+    cr.execute("""
+        SELECT 1 FROM ir_model_fields
+         WHERE relation_table = %s
+           AND store
+           AND NOT (model = 'stock.picking' AND name = 'transporter_partner_ids')
+         LIMIT 1
+    """, (_RELATION,))
+    if cr.fetchone():
+        _logger.info("%s is still used by another field, not dropped", _RELATION)
+        return
+    cr.execute(f"DROP TABLE IF EXISTS {_RELATION}")
+    _logger.info("Dropped %s (transporter_partner_ids is no longer stored)", _RELATION)
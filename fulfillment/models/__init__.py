@@ -3,6 +3,8 @@ from . import res_company
 from . import res_config_settings
 from . import stock_quant
 from . import incoming_staging
+from . import incoming_staging_queue
+from . import incoming_staging_idempotency
 from . import product_category
 from . import res_users_apikeys
 from . import incoming_to_stock_picking
@@ -10,6 +12,7 @@ from . import res_partner_category
 from . import res_partner
 from . import stock_picking
 from . import stock_picking_type
+from . import stock_picking_type_counter
 from . import stock_backorder_confirmation
 from . import stock_picking_backorder
 from . import stock_move_route_split
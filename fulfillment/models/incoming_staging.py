@@ -4,10 +4,16 @@ from odoo.exceptions import UserError, ValidationError
 import logging
 import json
 import base64
+import hashlib
 import io
+import zlib
 
 _logger = logging.getLogger(__name__)
 
+# Prefixes of the compact / reference-only QR payload modes (see _build_qr_payload)
+_QR_COMPACT_PREFIX = 'IS1C:'
+_QR_REF_PREFIX = 'IS1R:'
+
 # Try to use segno (pure-python QR generator) first, fall
 try:
     import segno  # pip install segno
@@ -26,6 +32,98 @@ else:
     _HAS_QRCODE = False
 
 
+def _render_qr_png(text, scale=4):
+    """Render `text` as a QR PNG. Module level so the QR controller can render without a record."""
+    if _HAS_SEGNO:
+        try:
+            qr = segno.make(text)
+            buf = io.BytesIO()
+            qr.save(buf, kind='png', scale=scale)
+            return buf.getvalue()
+        except Exception:
+            _logger.exception("segno failed to generate QR")
+            raise
+    elif _HAS_QRCODE:
+        try:
+            img = qrcode.make(text)
+            buf = io.BytesIO()
+            img.save(buf, format='PNG')
+            return buf.getvalue()
+        except Exception:
+            _logger.exception("qrcode failed to generate QR")
+            raise
+    else:
+        # No generator available - raise so callers can detect & respond
+        raise ImportError(
+            "No QR generator available. Install 'segno' (recommended) or 'qrcode[pil]' + 'pillow'."
+        )
+
+
+def _render_qr_svg(text, scale=4):
+    """Render `text` as a QR SVG document (bytes)."""
+    if _HAS_SEGNO:
+        buf = io.BytesIO()
+        segno.make(text).save(buf, kind='svg', scale=scale, xmldecl=False)
+        return buf.getvalue()
+    elif _HAS_QRCODE:
+        import qrcode.image.svg
+        buf = io.BytesIO()
+        qrcode.make(text, image_factory=qrcode.image.svg.SvgPathImage).save(buf)
+        return buf.getvalue()
+    raise ImportError(
+        "No QR generator available. Install 'segno' (recommended) or 'qrcode[pil]' + 'pillow'."
+    )
+
+
+# RFC 9285 base45: only QR alphanumeric-mode characters, so compact payloads encode densely
+_B45_CHARSET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_B45_INDEX = {c: i for i, c in enumerate(_B45_CHARSET)}
+
+
+def _b45encode(data):
+    out = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        out += [_B45_CHARSET[c], _B45_CHARSET[d], _B45_CHARSET[e]]
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        out += [_B45_CHARSET[c], _B45_CHARSET[d]]
+    return ''.join(out)
+
+
+def _b45decode(text):
+    try:
+        values = [_B45_INDEX[c] for c in text]
+    except KeyError as e:
+        raise ValueError(f"invalid base45 character {e.args[0]!r}")
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        if len(chunk) == 3:
+            n = chunk[0] + chunk[1] * 45 + chunk[2] * 45 * 45
+            if n > 0xFFFF:
+                raise ValueError("invalid base45 triplet")
+            out += bytes(divmod(n, 256))
+        elif len(chunk) == 2:
+            n = chunk[0] + chunk[1] * 45
+            if n > 0xFF:
+                raise ValueError("invalid base45 pair")
+            out.append(n)
+        else:
+            raise ValueError("invalid base45 length")
+    return bytes(out)
+
+
+def _qr_checksum(resi_no):
+    return '%08X' % zlib.crc32((resi_no or '').encode('utf-8'))
+
+
+def _qr_hash(payload_text):
+    return hashlib.sha256((payload_text or '').encode('utf-8')).hexdigest()
+
+
 class IncomingStaging(models.Model):
     _name = 'incoming_staging'
     _description = 'incoming_staging'
@@ -141,45 +239,72 @@ class IncomingStaging(models.Model):
 
     qr_image = fields.Binary("QR Code (PNG)", attachment=True,
                              help="PNG image of QR code representing header + product lines")
-    qr_payload = fields.Text("QR Payload (JSON)", help="JSON payload encoded into the QR code", copy=False)
+    qr_payload = fields.Text("QR Payload (JSON)", help="JSON payload encoded into the QR code", copy=False,
+                             compute='_compute_qr_payload', store=True)
+    qr_image_url = fields.Char("QR Code URL", compute='_compute_qr_image_url',
+                               help="On-demand rendered QR image (see /incoming_staging/<id>/qr.png and qr.svg)")
+    qr_hash = fields.Char("QR Payload Hash", copy=False, readonly=True,
+                          help="sha256 of the payload rendered in qr_image; a different payload hash means the image is stale")
 
     @api.depends('principal_courier')
     def _compute_principal_courier_id(self):
         """
         For each incoming_staging record:
           - if principal_courier is set and a company-level Transporter category configured,
-            search res.partner with that category and whose name ilike principal_courier.
-          - assign the first match (limit=1) to principal_courier_id; otherwise set False.
+            resolve it through the cached courier index (res.partner._resolve_courier):
+            exact name/alias match first, otherwise the first transporter whose name contains it.
+          - assign the match to principal_courier_id; otherwise set False.
         Note: we store the computed partner id because downstream logic / views expect stored values.
         If you change transporter category or partner categories you should run the refresh routine
         (settings button) to update stored values for existing records.
         """
         Partner = self.env['res.partner'].sudo()
         # resolve transporter category from current company (no company on this model)
-        transporter_cat = self.env.company.fulfillment_transporter_category_id
-        transporter_id = transporter_cat.id if transporter_cat else False
-
+        company = self.env.company
         for rec in self:
-            rec.principal_courier_id = False
-            name = (rec.principal_courier or '').strip()
-            if not name or not transporter_id:
-                continue
-            # search partners that have the transporter category and name matches (ilike)
-            partner = Partner.search([('category_id', 'in', [transporter_id]), ('name', 'ilike', name)], limit=1)
-            if partner:
-                rec.principal_courier_id = partner.id
+            rec.principal_courier_id = Partner._resolve_courier(rec.principal_courier, company)
 
     @api.constrains('transaction_no')
     def _check_name_unique(self):
-        for record in self:
-            existing = self.env['incoming_staging'].search([
-                ('transaction_no', '=', record.transaction_no),
-                ('id', '!=', record.id)
-            ], limit=1)
-            if existing:
-                raise ValidationError('resi_no must be unique!')
-    def _build_qr_payload(self):
+        # One grouped query for the whole recordset (batch API creates many records at once)
+        names = list(set(self.mapped('transaction_no')))
+        if not names:
+            return
+        grouped = self.env['incoming_staging']._read_group(
+            [('transaction_no', 'in', names)],
+            groupby=['transaction_no'],
+            aggregates=['__count'],
+        )
+        if any(count > 1 for _name, count in grouped):
+            raise ValidationError('resi_no must be unique!')
+    def _build_qr_payload(self, mode=None):
+        """
+        Text encoded into the QR code, depending on the fulfillment.qr_payload_mode setting:
+          - 'json' (default): full JSON with header and product lines
+          - 'compact': minimal-key JSON, zlib-compressed and base45-encoded, prefixed 'IS1C:'
+          - 'reference': only the resi_no and a checksum ('IS1R:<resi_no>:<crc32>')
+        _decode_qr_payload reads every mode back into the 'json' structure.
+        """
         self.ensure_one()
+        mode = mode or self._qr_payload_mode()
+        if mode == 'reference':
+            return f'{_QR_REF_PREFIX}{self.transaction_no}:{_qr_checksum(self.transaction_no)}'
+        if mode == 'compact':
+            compact = {
+                'v': 1,
+                'r': self.transaction_no,
+                't': self.type,
+                'd': self.datetime_string,
+                'p': self.partner_id.id or None,
+                'l': [
+                    [line.product_no, line.product_nanme,
+                     float(line.product_qty) if line.product_qty is not None else 0.0,
+                     line.product_uom, line.tracking_type, line.tracking_no]
+                    for line in self.products
+                ],
+            }
+            raw = json.dumps(compact, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            return _QR_COMPACT_PREFIX + _b45encode(zlib.compress(raw, 9))
         payload = {
             'qr_type': 'incomingstaging',
             'resi_no': self.transaction_no,
@@ -200,39 +325,66 @@ class IncomingStaging(models.Model):
             })
         return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
 
-    def _generate_qr_png_bytes(self, text, scale=4):
-        if _HAS_SEGNO:
-            try:
-                qr = segno.make(text)
-                buf = io.BytesIO()
-                qr.save(buf, kind='png', scale=scale)
-                return buf.getvalue()
-            except Exception:
-                _logger.exception("segno failed to generate QR")
-                raise
-        elif _HAS_QRCODE:
+    @api.model
+    def _qr_payload_mode(self):
+        mode = self.env['ir.config_parameter'].sudo().get_param('fulfillment.qr_payload_mode') or 'json'
+        return mode if mode in ('json', 'compact', 'reference') else 'json'
+
+    @api.model
+    def _decode_qr_payload(self, text):
+        """
+        Decode a scanned QR text of any mode (see _build_qr_payload) into the 'json' payload dict.
+        Reference payloads only carry qr_type and resi_no. Raises ValidationError on bad input.
+        """
+        text = (text or '').strip()
+        if text.startswith(_QR_REF_PREFIX):
+            resi_no, sep, checksum = text[len(_QR_REF_PREFIX):].rpartition(':')
+            if not sep or not resi_no or checksum.upper() != _qr_checksum(resi_no):
+                raise ValidationError("Invalid incoming staging QR reference (checksum mismatch).")
+            return {'qr_type': 'incomingstaging', 'resi_no': resi_no}
+        if text.startswith(_QR_COMPACT_PREFIX):
             try:
-                img = qrcode.make(text)
-                buf = io.BytesIO()
-                img.save(buf, format='PNG')
-                return buf.getvalue()
-            except Exception:
-                _logger.exception("qrcode failed to generate QR")
-                raise
-        else:
-            # No generator available - raise so callers can detect & respond
-            raise ImportError(
-                "No QR generator available. Install 'segno' (recommended) or 'qrcode[pil]' + 'pillow'."
-            )
+                compact = json.loads(zlib.decompress(_b45decode(text[len(_QR_COMPACT_PREFIX):])).decode('utf-8'))
+            except Exception as e:
+                raise ValidationError(f"Invalid compact incoming staging QR: {e}")
+            if compact.get('v') != 1:
+                raise ValidationError(f"Unsupported compact QR version: {compact.get('v')!r}")
+            return {
+                'qr_type': 'incomingstaging',
+                'resi_no': compact.get('r'),
+                'type': compact.get('t'),
+                'datetime_string': compact.get('d'),
+                'partner_id': compact.get('p'),
+                'products': [
+                    dict(zip(('product_no', 'product_nanme', 'product_qty', 'product_uom', 'tracking_type', 'tracking_no'), line))
+                    for line in compact.get('l') or []
+                ],
+            }
+        try:
+            data = json.loads(text)
+        except Exception as e:
+            raise ValidationError(f"Invalid QR payload: {e}")
+        if not isinstance(data, dict):
+            raise ValidationError("Invalid QR payload: JSON object expected.")
+        return data
 
-    def _generate_and_save_qr(self):
+    def _generate_qr_png_bytes(self, text, scale=4):
+        return _render_qr_png(text, scale=scale)
+
+    def _generate_and_save_qr(self, force=False):
         """
-        Generate QR payload and PNG and write to qr_payload and qr_image.
+        Render the QR PNG of qr_payload and write it to qr_image (and the payload hash to qr_hash).
+        Content-addressed: records whose payload hash equals qr_hash already carry the right image
+        and are skipped unless force=True, so an unchanged payload never re-renders or rewrites
+        the attachment.
         Use sudo() to avoid permission problems and ensure binary saved as base64 string.
         If generation is not possible (missing libs) or fails, raise an exception so callers can handle it.
         """
         for rec in self:
             payload_text = rec._build_qr_payload()
+            digest = _qr_hash(payload_text)
+            if not force and digest == rec.qr_hash:
+                continue
             try:
                 png_bytes = rec._generate_qr_png_bytes(payload_text)
             except ImportError as ie:
@@ -247,57 +399,96 @@ class IncomingStaging(models.Model):
             rec.sudo().write({
                 'qr_payload': payload_text,
                 'qr_image': b64,
+                'qr_hash': digest,
             })
 
+    @api.model
+    def _qr_store_image(self):
+        """False when settings disable storing QR PNGs (images are then served by /incoming_staging/<id>/qr.png)."""
+        return not self.env['ir.config_parameter'].sudo().get_param('fulfillment.qr_do_not_store_image')
+
+    @api.depends('qr_payload')
+    def _compute_qr_image_url(self):
+        for rec in self:
+            if rec.id and rec.qr_payload:
+                # the payload hash in the url makes the browser fetch a new image when the payload changes
+                rec.qr_image_url = f'/incoming_staging/{rec.id}/qr.png?v={_qr_hash(rec.qr_payload)[:16]}'
+            else:
+                rec.qr_image_url = False
+
+    @api.depends('transaction_no', 'type', 'datetime_string', 'partner_id',
+                 'products.product_no', 'products.product_nanme', 'products.product_qty',
+                 'products.product_uom', 'products.tracking_type', 'products.tracking_no')
+    def _compute_qr_payload(self):
+        """
+        Keep qr_payload in line with the record (cheap, computed in batch at flush) and defer the
+        PNG rendering: records whose payload hash differs from qr_hash are rendered by the QR cron.
+        """
+        for rec in self:
+            rec.qr_payload = rec._build_qr_payload()
+
+    def _trigger_qr_render(self):
+        if self._qr_store_image():
+            cron = self.env.ref('fulfillment.ir_cron_render_incoming_staging_qr', raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    @api.model
+    def _cron_render_pending_qr(self, limit=500):
+        """
+        Cron: render the QR images whose payload changed since the last rendering
+        (qr_hash differs from the sha256 of qr_payload, or was reset by refresh_all_qr).
+        Locked rows are skipped. When settings disable storing QR PNGs only the payload and
+        its hash are refreshed (images are rendered on demand by the controller).
+        Runs `limit` records per transaction and re-triggers itself while rows remain.
+        """
+        store_image = self._qr_store_image()
+        self.env.cr.execute("""
+            SELECT id FROM incoming_staging
+             WHERE qr_payload IS NULL
+                OR qr_hash IS DISTINCT FROM encode(sha256(convert_to(qr_payload, 'UTF8')), 'hex')
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (limit,))
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        for rec in self.sudo().browse(ids):
+            try:
+                with self.env.cr.savepoint():
+                    if store_image:
+                        rec._generate_and_save_qr()
+                    else:
+                        payload_text = rec._build_qr_payload()
+                        rec.write({
+                            'qr_payload': payload_text,
+                            'qr_image': False,
+                            'qr_hash': _qr_hash(payload_text),
+                        })
+            except ImportError:
+                # no generator installed: nothing else will render either
+                return True
+            except Exception:
+                _logger.exception("Deferred QR rendering failed for incoming_staging %s", rec.id)
+        cron = self.env.ref('fulfillment.ir_cron_render_incoming_staging_qr', raise_if_not_found=False)
+        if len(ids) == limit and cron:
+            cron._trigger()
+        return True
+
     @api.model_create_multi
     def create(self, vals_list):
-        # Create records first, then generate QR under sudo() to ensure children exist and attachments saved.
+        # qr_payload is computed with the records, the PNG is rendered later by the QR cron.
         records = super(IncomingStaging, self).create(vals_list)
-        try:
-            # Use sudo() to avoid permission issues when creating attachments
-            records.sudo()._generate_and_save_qr()
-        except ImportError:
-            # Fail creation if QR libs not installed so caller knows immediately
-            raise ValidationError(
-                "QR generation dependencies are missing on the server. "
-                "Install 'segno' (recommended) or 'qrcode[pil]' and 'pillow', then restart Odoo."
-            )
-        except Exception as e:
-            _logger.exception("Unexpected error while generating QR after create: %s", e)
-            # surface as ValidationError so the controller returns a clear JSON error
-            raise ValidationError(f"QR generation failed: {e}")
+        records._trigger_qr_render()
         return records
 
     def write(self, vals):
-        # Perform write, then decide whether to regenerate using the same rules.
+        # Perform write, then schedule the rendering when a field the payload is built from may have changed.
         res = super(IncomingStaging, self).write(vals)
 
-        regenerate = False
-        header_fields = {'transaction_no', 'type', 'datetime_string', 'partner_id'}
-        if header_fields.intersection(vals.keys()):
-            regenerate = True
-
-        # Consider status transitions and modifications to products
-        if 'status' in vals and vals.get('status') and vals.get('status') != 'open':
-            regenerate = True
-
         # When product lines are changed via One2many commands, 'products' key may appear in vals
-        if 'products' in vals:
-            regenerate = True
-
-        if regenerate:
-            try:
-                # Use sudo to avoid access-rights problems saving attachments
-                self.sudo()._generate_and_save_qr()
-            except ImportError:
-                _logger.error("QR generation missing during write for incoming_staging %s", self.ids)
-                raise ValidationError(
-                    "QR generation dependencies are missing on the server. "
-                    "Install 'segno' (recommended) or 'qrcode[pil]' and 'pillow', then restart Odoo."
-                )
-            except Exception as e:
-                _logger.exception("Failed to regenerate QR on write for incoming_staging %s: %s", self.ids, e)
-                raise ValidationError(f"QR regeneration failed: {e}")
+        header_fields = {'transaction_no', 'type', 'datetime_string', 'partner_id', 'products'}
+        if header_fields.intersection(vals.keys()):
+            self._trigger_qr_render()
 
         return res
 
@@ -306,18 +497,23 @@ class IncomingStaging(models.Model):
         """
         Utility method to force regeneration of QR image for all records.
         Call from shell, server action or scheduled action.
+
+        Only marks every record as stale (qr_hash reset) and triggers the QR cron, which
+        rebuilds the payloads and renders the images in chunks, one transaction per chunk.
         """
-        records = self.search([])
-        _logger.info("Refreshing QR for %s incoming_staging records", len(records))
-        # Use sudo so attachment creation works for all records
-        records.sudo()._generate_and_save_qr()
+        self.env.cr.execute("UPDATE incoming_staging SET qr_hash = NULL WHERE qr_hash IS NOT NULL")
+        _logger.info("QR refresh requested for %s incoming_staging records", self.env.cr.rowcount)
+        self.env.invalidate_all()
+        cron = self.env.ref('fulfillment.ir_cron_render_incoming_staging_qr', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
         return True
 
     def refresh_qr(self):
         """
         Instance helper to refresh only these records.
         """
-        self.sudo()._generate_and_save_qr()
+        self.sudo()._generate_and_save_qr(force=True)
         return True
 
 
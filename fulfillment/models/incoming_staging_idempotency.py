@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Stored responses for Idempotency-Key support on the Incoming Staging API.
+
+Principals retry on timeouts; the first successful response (status code + body) is kept
+here for a limited time so retries are answered straight from this table instead of going
+through validation, staging creation, QR generation and auto-transfer again.
+Expired rows are purged by the daily autovacuum.
+"""
+from datetime import timedelta
+import hashlib
+import json
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Default retention of stored responses, override with ir.config_parameter fulfillment.idempotency_ttl_hours
+_DEFAULT_TTL_HOURS = 24
+
+
+class IncomingStagingIdempotency(models.Model):
+    _name = 'incoming_staging_idempotency'
+    _description = 'incoming_staging_idempotency'
+    _rec_name = 'key'
+    _log_access = False
+
+    key = fields.Char(string="Idempotency Key", required=True)
+    partner_id = fields.Many2one(
+        comodel_name='res.partner',
+        string="Partner",
+        required=True,
+        ondelete='cascade',
+    )
+    request_hash = fields.Char(string="Payload Hash", required=True)
+    status_code = fields.Integer(string="HTTP Status", required=True)
+    response_body = fields.Text(string="Response Body (JSON)", required=True)
+    expires_at = fields.Datetime(string="Expires At", required=True, index=True)
+
+    _partner_key_uniq = models.Constraint(
+        'UNIQUE(partner_id, key)',
+        'An Idempotency-Key can only be stored once per principal.',
+    )
+
+    @api.model
+    def _make_key(self, header_key, data, scope):
+        """
+        Explicit Idempotency-Key header, otherwise the resi_no of the payload ('' when none),
+        prefixed with the endpoint `scope` ('sync', 'async', 'batch') so the endpoints never
+        replay each other's responses.
+        """
+        if header_key:
+            return f'{scope}:{header_key}'[:255]
+        resi_no = data.get('resi_no') if isinstance(data, dict) else None
+        return f'{scope}:resi:{resi_no}'[:255] if isinstance(resi_no, str) and resi_no else ''
+
+    @api.model
+    def _hash_payload(self, data):
+        canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @api.model
+    def _lookup(self, partner_id, key):
+        return self.search([
+            ('partner_id', '=', partner_id),
+            ('key', '=', key),
+            ('expires_at', '>', fields.Datetime.now()),
+        ], limit=1)
+
+    @api.model
+    def _store(self, partner_id, key, request_hash, body, status_code):
+        """Store a response; raises if the key was stored concurrently (unique constraint)."""
+        ttl = int(self.env['ir.config_parameter'].sudo().get_param(
+            'fulfillment.idempotency_ttl_hours', _DEFAULT_TTL_HOURS) or _DEFAULT_TTL_HOURS)
+        # an expired row for the same key would block the unique constraint
+        self.search([('partner_id', '=', partner_id), ('key', '=', key)]).unlink()
+        with self.env.cr.savepoint():
+            return self.create({
+                'partner_id': partner_id,
+                'key': key,
+                'request_hash': request_hash,
+                'status_code': status_code,
+                'response_body': json.dumps(body),
+                'expires_at': fields.Datetime.now() + timedelta(hours=ttl),
+            })
+
+    @api.autovacuum
+    def _gc_expired(self):
+        self.env.cr.execute(
+            "DELETE FROM incoming_staging_idempotency WHERE expires_at < %s",
+            (fields.Datetime.now(),),
+        )
+        _logger.info("GC'd %d expired incoming_staging idempotency records", self.env.cr.rowcount)
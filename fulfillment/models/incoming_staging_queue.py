@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Accept-and-queue mode for the Incoming Staging API.
+
+The async endpoint validates the payload, stores the resulting create vals in
+incoming_staging_queue and answers 202 with the ticket id. The heavy work
+(staging creation, QR generation, auto-transfer) is done by the
+"Fulfillment: Process Incoming Staging Queue" cron, which claims tickets with
+FOR UPDATE SKIP LOCKED so several cron workers can drain the queue in parallel.
+"""
+from odoo import api, fields, models
+from odoo.exceptions import ValidationError
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class IncomingStagingQueue(models.Model):
+    _name = 'incoming_staging_queue'
+    _description = 'incoming_staging_queue'
+    _rec_name = 'transaction_no'
+    _order = 'id desc'
+
+    transaction_no = fields.Char(string="Resi No.", required=True, index=True)
+    partner_id = fields.Many2one(
+        comodel_name='res.partner',
+        string="Partner",
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    user_id = fields.Many2one(comodel_name='res.users', string="API User", ondelete='set null')
+    state = fields.Selection(string="State",
+                             selection=[
+                                 ('queued', 'Queued'),
+                                 ('done', 'Done'),
+                                 ('error', 'Error'),
+                             ], default='queued', required=True, index=True)
+    payload = fields.Text(string="Staging Values (JSON)", help="Validated incoming_staging create values")
+    staging_id = fields.Many2one(comodel_name='incoming_staging', string="Incoming Staging", ondelete='set null')
+    result = fields.Text(string="Result (JSON)", help="API response body produced by the worker")
+    date_done = fields.Datetime(string="Processed On")
+
+    @api.model
+    def _enqueue(self, vals):
+        """Persist validated staging vals and wake up the queue worker. Returns the ticket."""
+        ticket = self.sudo().create({
+            'transaction_no': vals['transaction_no'],
+            'partner_id': vals['partner_id'],
+            'user_id': self.env.uid,
+            'payload': json.dumps(vals),
+        })
+        cron = self.env.ref('fulfillment.ir_cron_process_incoming_staging_queue', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return ticket
+
+    def _get_status(self):
+        """JSON-serializable ticket status for the polling endpoint."""
+        self.ensure_one()
+        status = {
+            'ticket': self.id,
+            'resi_no': self.transaction_no,
+            'state': self.state,
+        }
+        if self.result:
+            status['result'] = json.loads(self.result)
+        return status
+
+    @api.model
+    def _process_queue(self, limit=200):
+        """
+        Cron entry point: claim up to `limit` queued tickets (skipping rows locked by other
+        workers) and process each one in its own savepoint.
+        """
+        self.env.cr.execute("""
+            SELECT id FROM incoming_staging_queue
+             WHERE state = 'queued'
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (limit,))
+        ticket_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not ticket_ids:
+            return True
+        _logger.info("Processing %d queued incoming_staging tickets", len(ticket_ids))
+        for ticket in self.sudo().browse(ticket_ids):
+            ticket._process_ticket()
+        return True
+
+    def _process_ticket(self):
+        self.ensure_one()
+        Staging = self.env['incoming_staging'].sudo()
+        try:
+            with self.env.cr.savepoint():
+                record = Staging.create(json.loads(self.payload))
+            res = {'id': record.id, 'transaction_no': record.transaction_no, 'message': 'created'}
+            auto_transfer = record._run_auto_transfer().get(record.id)
+            if auto_transfer:
+                res['auto_transfer'] = auto_transfer
+            self.write({
+                'state': 'done',
+                'staging_id': record.id,
+                'result': json.dumps(res),
+                'date_done': fields.Datetime.now(),
+            })
+        except Exception as exc:
+            _logger.exception("Queued incoming_staging %s (ticket %s) failed", self.transaction_no, self.id)
+            error = 'validation_error' if isinstance(exc, ValidationError) else 'server_error'
+            self.write({
+                'state': 'error',
+                'result': json.dumps({'error': error, 'details': str(exc)}),
+                'date_done': fields.Datetime.now(),
+            })
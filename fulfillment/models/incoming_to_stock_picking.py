@@ -14,21 +14,140 @@ as inbound receipts but resolves the picking type using:
 
 If neither is configured a ValidationError is raised.
 """
+from datetime import timedelta
 from odoo import api, fields, models
 from odoo import fields as odoo_fields
 from odoo.exceptions import ValidationError
 from odoo.fields import Command
 import logging
 import re
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Max lines listed in the bus notification sent after a batch of transfers
+_BUS_MAX_LINES = 20
+
+# Staging worker defaults, override with ir.config_parameter
+# fulfillment.staging_worker_chunk_size / fulfillment.staging_worker_max_attempts
+_WORKER_CHUNK_SIZE = 100
+_WORKER_MAX_ATTEMPTS = 3
+
 
 class IncomingStagingStockReceipt(models.Model):
     _inherit = 'incoming_staging'
 
     # Field to persist last processing result so the QWeb view can display it
     result_message = fields.Text(string="Result Message", readonly=True)
+    # Bookkeeping of the staging worker cron (_cron_process_open_stagings)
+    transfer_attempts = fields.Integer(string="Transfer Attempts", readonly=True, copy=False, default=0)
+    transfer_date = fields.Datetime(string="Transferred On", readonly=True, copy=False, index=True)
+
+    @api.model
+    def _staging_worker_params(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        chunk_size = int(ICP.get_param('fulfillment.staging_worker_chunk_size', _WORKER_CHUNK_SIZE) or _WORKER_CHUNK_SIZE)
+        max_attempts = int(ICP.get_param('fulfillment.staging_worker_max_attempts', _WORKER_MAX_ATTEMPTS) or _WORKER_MAX_ATTEMPTS)
+        return chunk_size, max_attempts
+
+    @api.model
+    def _claim_open_stagings(self, limit, after_id, max_attempts):
+        """
+        Lock up to `limit` open staging rows with id > after_id, skipping rows already locked by
+        another worker, and count the attempt. The lock is held until the caller commits.
+        """
+        self.env.cr.execute("""
+            UPDATE incoming_staging
+               SET transfer_attempts = COALESCE(transfer_attempts, 0) + 1
+             WHERE id IN (
+                    SELECT id FROM incoming_staging
+                     WHERE status = 'open'
+                       AND type IN ('inbound', 'forder', 'return')
+                       AND COALESCE(transfer_attempts, 0) < %s
+                       AND id > %s
+                     ORDER BY id
+                     LIMIT %s
+                       FOR UPDATE SKIP LOCKED
+                   )
+         RETURNING id
+        """, (max_attempts, after_id, limit))
+        ids = sorted(row[0] for row in self.env.cr.fetchall())
+        self.invalidate_model(['transfer_attempts'])
+        return self.sudo().browse(ids)
+
+    @api.model
+    def _cron_process_open_stagings(self, max_chunks=50):
+        """
+        Staging worker: claim chunks of open incoming_staging rows with FOR UPDATE SKIP LOCKED and
+        run action_create_transfer on each chunk in its own transaction (committed per chunk).
+
+        Any number of cron workers, or separate processes calling this method, can drain the
+        backlog in parallel: a claimed row stays locked until its chunk is committed and then
+        leaves the 'open' status, so it is never transferred twice. Rows that keep failing are
+        retried at most fulfillment.staging_worker_max_attempts times.
+        """
+        chunk_size, max_attempts = self._staging_worker_params()
+        cr = self.env.cr
+        started = time.monotonic()
+        after_id = 0
+        processed = 0
+        failed = 0
+        for _chunk in range(max_chunks):
+            chunk = self._claim_open_stagings(chunk_size, after_id, max_attempts)
+            if not chunk:
+                break
+            after_id = chunk.ids[-1]
+            try:
+                chunk.action_create_transfer()
+                done = chunk.filtered(lambda r: r.status != 'open')
+                done.write({'transfer_date': odoo_fields.Datetime.now()})
+                processed += len(done)
+                failed += len(chunk) - len(done)
+                cr.commit()
+            except Exception:
+                _logger.exception("Staging worker chunk %s..%s failed", chunk.ids[0], after_id)
+                cr.rollback()
+                # keep the attempt so a failing chunk is not retried forever
+                cr.execute(
+                    "UPDATE incoming_staging SET transfer_attempts = COALESCE(transfer_attempts, 0) + 1 WHERE id IN %s",
+                    (tuple(chunk.ids),))
+                cr.commit()
+                failed += len(chunk)
+        else:
+            # more work left: run again as soon as possible
+            cron = self.env.ref('fulfillment.ir_cron_process_open_stagings', raise_if_not_found=False)
+            if cron:
+                cron._trigger()
+
+        elapsed = time.monotonic() - started
+        if processed or failed:
+            _logger.info(
+                "Staging worker: %d transferred, %d failed in %.1fs (%.1f/s)",
+                processed, failed, elapsed, processed / elapsed if elapsed else 0.0,
+            )
+        return True
+
+    @api.model
+    def _get_staging_worker_stats(self):
+        """Backlog and throughput counters of the staging worker."""
+        _chunk_size, max_attempts = self._staging_worker_params()
+        now = odoo_fields.Datetime.now()
+        self.env.cr.execute("""
+            SELECT COUNT(*) FILTER (WHERE status = 'open' AND COALESCE(transfer_attempts, 0) < %(max)s),
+                   COUNT(*) FILTER (WHERE status = 'open' AND COALESCE(transfer_attempts, 0) >= %(max)s),
+                   COUNT(*) FILTER (WHERE transfer_date >= %(hour)s),
+                   COUNT(*) FILTER (WHERE transfer_date >= %(day)s)
+              FROM incoming_staging
+        """, {'max': max_attempts, 'hour': now - timedelta(hours=1), 'day': now - timedelta(days=1)})
+        backlog, exhausted, last_hour, last_day = self.env.cr.fetchone()
+        return {
+            'backlog': backlog,
+            'failed_max_attempts': exhausted,
+            'transferred_last_hour': last_hour,
+            'transferred_last_24h': last_day,
+            'throughput_per_minute': round(last_hour / 60.0, 2),
+        }
+
 
     def action_create_transfer(self):
         """
@@ -77,6 +196,148 @@ class IncomingStagingStockReceipt(models.Model):
 
         return results
 
+    def _run_auto_transfer(self):
+        """
+        Run action_create_transfer for staging records whose courier priority matches the company's
+        configured priority label (fallback to 'Instan' if not set). Used right after API creation,
+        both in the request (sync mode) and by the staging queue worker (async mode).
+        Returns {staging_id: auto_transfer_info}; records left out of the dict were not eligible.
+        """
+        summary = {}
+        to_transfer = self.browse()
+        for rec in self.sudo():
+            company = rec.partner_id.company_id or self.env.company
+            try:
+                blocks_auto = bool(getattr(company, 'fulfillment_do_not_create_pick', False))
+            except Exception:
+                blocks_auto = False
+            if blocks_auto:
+                continue
+
+            # principal_courier_id is computed/stored on incoming_staging -> res.partner
+            courier_partner = rec.principal_courier_id
+            if not courier_partner:
+                # Optional: include a hint if no principal_courier_id resolved
+                if rec.type == 'forder':
+                    summary[rec.id] = {'status': 'skipped', 'reason': 'no_principal_courier_id'}
+                else:
+                    summary[rec.id] = {'status': 'skipped', 'reason': 'auto_transfer disabled for inbound'}
+                continue
+
+            priority_label = (company.fulfillment_courier_label_priority or 'Instan').strip().lower()
+            # partner label (may be stored on partner or computed)
+            partner_label = (courier_partner.courier_scoring_label or '').strip().lower()
+            if partner_label and partner_label == priority_label:
+                _logger.info(
+                    "Auto-creating transfer for incoming_staging %s because courier priority is '%s'",
+                    rec.id, partner_label
+                )
+                to_transfer |= rec
+
+        if not to_transfer:
+            return summary
+
+        try:
+            # action_create_transfer returns a list of per-staging results; run as sudo to avoid ACL issues
+            with self.env.cr.savepoint():
+                results = to_transfer.sudo().action_create_transfer()
+        except Exception as e:
+            _logger.exception("Auto create transfer failed for incoming_staging %s: %s", to_transfer.ids, e)
+            for rec in to_transfer:
+                summary[rec.id] = {'status': 'error', 'error': str(e)}
+            return summary
+
+        by_staging = {}
+        for r in results:
+            by_staging.setdefault(r.get('staging_id'), []).append(r)
+        for rec in to_transfer:
+            rec_results = by_staging.get(rec.id, [])
+            # include summary in API response for client visibility
+            errors = [str(r['error']) for r in rec_results if 'error' in r]
+            if errors:
+                summary[rec.id] = {'status': 'error', 'error': '; '.join(errors)}
+            else:
+                summary[rec.id] = {'status': 'ok', 'results': rec_results}
+        return summary
+
+    def _get_pick_picking_type(self):
+        """Resolve and check the pick operation type configured in fulfillment.operationtype.pick_id."""
+        env = self.sudo().env
+        # Resolve picking type id from system parameter for pick
+        param_val = env['ir.config_parameter'].get_param('fulfillment.operationtype.pick_id')
+        if not param_val:
+            raise ValidationError("Default pick operation type is not configured (fulfillment.operationtype.pick_id).")
+        try:
+            picking_type_id = int(param_val)
+        except Exception:
+            m = re.search(r'(\d+)', str(param_val))
+            if m:
+                picking_type_id = int(m.group(1))
+            else:
+                raise ValidationError(f"Invalid picking type configured: {param_val!r}")
+
+        picking_type = env['stock.picking.type'].browse(picking_type_id)
+        if not picking_type.exists():
+            raise ValidationError(f"Picking Type with id {picking_type_id} (configured in fulfillment.operationtype.pick_id) does not exist!")
+        if not picking_type.default_location_src_id:
+            raise ValidationError(f"default_location_src_id is not set on picking type {picking_type.name}")
+        if not picking_type.default_location_dest_id:
+            raise ValidationError(f"default_location_dest_id is not set on picking type {picking_type.name}")
+        return picking_type
+
+    def _prepare_pick_picking_vals(self, picking_type, line_products=None):
+        """
+        Build the stock.picking create vals (with one move per product line) for a forder staging.
+        line_products is the optional map returned by _resolve_line_products.
+        """
+        self.ensure_one()
+        rec = self
+        # Build moves (preserve order)
+        move_vals_list = []
+        for line in rec.products:
+            product, uom = rec._get_line_product(line, line_products)
+            qty = float(line.product_qty or 0.0)
+
+            # Build a per-line description to keep moves distinct
+            line_desc = f"{product.display_name}"
+            move_vals = {
+                'product_id': product.id,
+                'product_uom_qty': qty,
+                'product_uom': uom.id,
+                'location_id': picking_type.default_location_src_id.id,
+                'location_dest_id': picking_type.default_location_dest_id.id,
+                'origin': rec.transaction_no,
+                'description_picking': line_desc,
+            }
+            move_vals_list.append((0, 0, move_vals))
+
+        # Prepare base picking values
+        picking_vals = {
+            'partner_id': rec.partner_id.id,
+            'partner_type': rec.partner_type, #LAGI#999
+            'picking_type_id': picking_type.id,
+            'location_id': picking_type.default_location_src_id.id,
+            'location_dest_id': picking_type.default_location_dest_id.id,
+            'origin': rec.transaction_no,
+            'scheduled_date': odoo_fields.Datetime.now(),
+            'move_ids': move_vals_list,
+        }
+
+        # Carry-forward courier fields from incoming_staging into stock.picking
+        # rec is sudo() record, so principal_courier_id is accessible
+        if getattr(rec, 'principal_courier_id', False):
+            picking_vals['principal_courier_id'] = rec.principal_courier_id.id
+            picking_vals['courier_priority'] = rec.principal_courier_id.courier_scoring_label or ''
+
+        # propagate principal_customer_name/address into picking
+        if getattr(rec, 'principal_customer_name', False):
+            picking_vals['principal_customer_name'] = rec.principal_customer_name
+        if getattr(rec, 'principal_customer_address', False):
+            picking_vals['principal_customer_address'] = rec.principal_customer_address
+        if getattr(rec, 'partner_type', False):
+            picking_vals['partner_type'] = rec.partner_type
+        return picking_vals
+
     def action_create_transfer_pick(self):
         """
         Create 'pick' pickings for incoming_staging records where type == 'forder'.
@@ -85,294 +346,140 @@ class IncomingStagingStockReceipt(models.Model):
         - Uses the configured pick operation type (fulfillment.operationtype.pick_id).
         - On success, updates incoming_staging.status to 'pick' (per request).
         - Leaves created pickings confirmed/assigned (Ready) — does not auto-validate.
+
+        Works on the whole recordset at once: existing pickings for all resi numbers are
+        prefetched with one query, the picking type is resolved once, all pickings are created
+        with a single multi-create and confirmed/assigned as one recordset. Failures are isolated
+        per staging record with savepoints (falling back to one-by-one processing when a
+        batched step fails), so one bad record does not block the others.
         """
         results = []
         env = self.sudo().env
+        Picking = env['stock.picking']
 
-        for rec in self.sudo():
+        def fail(rec, exc):
+            _logger.error("Failed to create pick for incoming_staging %s: %s", rec.id, exc)
+            msg = f"Failed to create pick: {exc}"
             try:
-                if not (rec.status == 'open' and rec.type == 'forder'):
-                    msg = f"Skipped staging {rec.id}: status={rec.status} type={rec.type}"
-                    _logger.info(msg)
-                    rec.sudo().write({'result_message': msg})
-                    results.append({'staging_id': rec.id, 'note': 'skipped_not_open_or_not_forder', 'state': rec.status, 'type': rec.type})
-                    continue
-
-                # Idempotency: if a non-cancelled picking with this origin already exists, return it
-                existing = env['stock.picking'].search([('origin', '=', rec.transaction_no), ('state', '!=', 'cancel')], limit=1)
-                if existing:
-                    msg = f"Picking already exists: {existing.name} (id={existing.id}) state={existing.state}"
-                    _logger.info(msg)
-                    rec.sudo().write({'result_message': msg})
-                    results.append({'staging_id': rec.id, 'picking_id': existing.id, 'picking_name': existing.name, 'state': existing.state, 'note': 'existing_picking_returned'})
-                    continue
+                rec.sudo().write({'result_message': msg})
+            except Exception:
+                _logger.exception("Failed to write result_message on staging %s", rec.id)
+            results.append({'staging_id': rec.id, 'error': str(exc)})
 
-                # Resolve picking type id from system parameter for pick
-                param_val = self.env['ir.config_parameter'].sudo().get_param('fulfillment.operationtype.pick_id')
-                if not param_val:
-                    raise ValidationError("Default pick operation type is not configured (fulfillment.operationtype.pick_id).")
-                try:
-                    picking_type_id = int(param_val)
-                except Exception:
-                    m = re.search(r'(\d+)', str(param_val))
-                    if m:
-                        picking_type_id = int(m.group(1))
-                    else:
-                        raise ValidationError(f"Invalid picking type configured: {param_val!r}")
-
-                picking_type = env['stock.picking.type'].browse(picking_type_id)
-                if not picking_type.exists():
-                    raise ValidationError(f"Picking Type with id {picking_type_id} (configured in fulfillment.operationtype.pick_id) does not exist!")
-                if not picking_type.default_location_src_id:
-                    raise ValidationError(f"default_location_src_id is not set on picking type {picking_type.name}")
-                if not picking_type.default_location_dest_id:
-                    raise ValidationError(f"default_location_dest_id is not set on picking type {picking_type.name}")
-
-                # Build moves and collect metadata (preserve order)
-                move_vals_list = []
-                #move_metadata = [] #LAGI#999
-                for line in rec.products:
-                    uom = rec._ensure_uom(line.product_uom or 'Unit')
-                    product = rec._ensure_product(line.product_no, line.product_nanme, uom)
-                    qty = float(line.product_qty or 0.0)
-
-                    #<<LAGI#999
-                    # incoming_tracking = (line.tracking_type or 'none')
-                    # incoming_tracking_no = (line.tracking_no or '').strip()
-
-                    # # Ensure template is storable and has correct tracking so UI doesn't hide lot fields
-                    # if incoming_tracking in ('lot', 'serial'):
-                    #     tmpl = product.product_tmpl_id
-                    #     tmpl_vals = {}
-                    #     if not tmpl.is_storable:
-                    #         tmpl_vals['is_storable'] = True
-                    #     if tmpl.tracking != incoming_tracking:
-                    #         tmpl_vals['tracking'] = incoming_tracking
-                    #     if tmpl_vals:
-                    #         tmpl.sudo().write(tmpl_vals)
-                    #>>
-
-                    # Build a per-line description to keep moves distinct
-                    line_desc = f"{product.display_name}"
-                    #<<LAGI#999
-                    # if incoming_tracking == 'lot' and incoming_tracking_no:
-                    #     line_desc += f" [LOT: {incoming_tracking_no}]"
-                    # elif incoming_tracking == 'serial' and incoming_tracking_no:
-                    #     line_desc += f" [SERIALS: {incoming_tracking_no}]"
-                    #>>
-                    move_vals = {
-                        'product_id': product.id,
-                        'product_uom_qty': qty,
-                        'product_uom': uom.id,
-                        'location_id': picking_type.default_location_src_id.id,
-                        'location_dest_id': picking_type.default_location_dest_id.id,
-                        'origin': rec.transaction_no,
-                        'description_picking': line_desc,
-                    }
-                    move_vals_list.append((0, 0, move_vals))
-
-                    #<<LAGI#999
-                    # move_metadata.append({
-                    #     'product': product,
-                    #     'qty': qty,
-                    #     'incoming_tracking': incoming_tracking,
-                    #     'incoming_tracking_no': incoming_tracking_no,
-                    # })
-                    #>>
+        todo = self.sudo().browse()
+        for rec in self.sudo():
+            if not (rec.status == 'open' and rec.type == 'forder'):
+                msg = f"Skipped staging {rec.id}: status={rec.status} type={rec.type}"
+                _logger.info(msg)
+                rec.sudo().write({'result_message': msg})
+                results.append({'staging_id': rec.id, 'note': 'skipped_not_open_or_not_forder', 'state': rec.status, 'type': rec.type})
+                continue
+            todo |= rec
+        if not todo:
+            return results
+
+        # Idempotency: one query for the non-cancelled pickings of every resi number
+        existing_by_origin = {}
+        for existing in Picking.search([('origin', 'in', todo.mapped('transaction_no')), ('state', '!=', 'cancel')]):
+            existing_by_origin.setdefault(existing.origin, existing)
 
-                # Prepare base picking values
-                picking_vals = {
-                    'partner_id': rec.partner_id.id,
-                    'partner_type': rec.partner_type, #LAGI#999
-                    'picking_type_id': picking_type.id,
-                    'location_id': picking_type.default_location_src_id.id,
-                    'location_dest_id': picking_type.default_location_dest_id.id,
-                    'origin': rec.transaction_no,
-                    'scheduled_date': odoo_fields.Datetime.now(),
-                    'move_ids': move_vals_list,
-                }
+        try:
+            picking_type = todo._get_pick_picking_type()
+        except Exception as exc:
+            for rec in todo:
+                if rec.transaction_no not in existing_by_origin:
+                    fail(rec, exc)
+            picking_type = None
+
+        # Products/UoMs of every line are resolved in bulk for the stagings still to create
+        line_products = {}
+        if picking_type:
+            line_products = todo.filtered(lambda r: r.transaction_no not in existing_by_origin)._resolve_line_products()
+
+        to_create = []  # [(staging, picking vals)]
+        for rec in todo:
+            existing = existing_by_origin.get(rec.transaction_no)
+            if existing:
+                msg = f"Picking already exists: {existing.name} (id={existing.id}) state={existing.state}"
+                _logger.info(msg)
+                rec.sudo().write({'result_message': msg})
+                results.append({'staging_id': rec.id, 'picking_id': existing.id, 'picking_name': existing.name, 'state': existing.state, 'note': 'existing_picking_returned'})
+                continue
+            if not picking_type:
+                continue
+            try:
+                with env.cr.savepoint():
+                    to_create.append((rec, rec._prepare_pick_picking_vals(picking_type, line_products)))
+            except Exception as exc:
+                fail(rec, exc)
+        if not to_create:
+            return results
 
-                # Prepare context for create (so default_get can pick defaults if used)
-                ctx = dict(env.context or {})
-                # Prevent stock.move merge so each incoming line stays separate
-                ctx['no_merge'] = True
-
-                # Carry-forward courier fields from incoming_staging into stock.picking
-                # rec is sudo() record, so principal_courier_id is accessible
-                if getattr(rec, 'principal_courier_id', False):
-                    picking_vals['principal_courier_id'] = rec.principal_courier_id.id
-                    picking_vals['courier_priority'] = rec.principal_courier_id.courier_scoring_label or ''
-
-                # --- ADDED CODE START: propagate principal_customer_name/address into picking and context ---
-                if getattr(rec, 'principal_customer_name', False):
-                    picking_vals['principal_customer_name'] = rec.principal_customer_name
-                    ctx.setdefault('default_principal_customer_name', rec.principal_customer_name)
-                if getattr(rec, 'principal_customer_address', False):
-                    picking_vals['principal_customer_address'] = rec.principal_customer_address
-                    ctx.setdefault('default_principal_customer_address', rec.principal_customer_address)
-                if getattr(rec, 'partner_type', False):
-                    picking_vals['partner_type'] = rec.partner_type
-                    ctx.setdefault('default_partner_type', rec.partner_type)
-                # --- ADDED CODE END ---
-
-                # Create picking using the prepared context
-                picking = env['stock.picking'].with_context(ctx).create(picking_vals)
+        # Prevent stock.move merge so each incoming line stays separate
+        Picking = Picking.with_context(no_merge=True)
+        created = []  # [(staging, picking)]
+        try:
+            with env.cr.savepoint():
+                pickings = Picking.create([vals for _rec, vals in to_create])
+            created = list(zip([rec for rec, _vals in to_create], pickings))
+        except Exception:
+            _logger.exception("Multi-create of %d pick pickings failed, retrying one by one", len(to_create))
+            for rec, vals in to_create:
+                try:
+                    with env.cr.savepoint():
+                        created.append((rec, Picking.create(vals)))
+                except Exception as exc:
+                    fail(rec, exc)
 
-                # Confirm and assign -> picking should become 'assigned' (Ready)
+        # Confirm and assign -> pickings should become 'assigned' (Ready)
+        ready = []
+        try:
+            with env.cr.savepoint():
+                pickings = Picking.browse([picking.id for _rec, picking in created])
+                pickings.action_confirm()
+                pickings.action_assign()
+            ready = created
+        except Exception:
+            _logger.exception("Batch confirm/assign failed for %d pickings, retrying one by one", len(created))
+            for rec, picking in created:
                 try:
-                    if hasattr(picking, 'action_confirm'):
+                    with env.cr.savepoint():
                         picking.action_confirm()
                 except Exception:
                     _logger.exception("action_confirm failed for picking %s", picking.id)
-                    raise ValidationError(f"action_confirm failed for picking {picking.id}")
+                    fail(rec, ValidationError(f"action_confirm failed for picking {picking.id}"))
+                    continue
                 try:
-                    if hasattr(picking, 'action_assign'):
+                    with env.cr.savepoint():
                         picking.action_assign()
-                    elif hasattr(picking, '_action_assign'):
-                        picking._action_assign()
                 except Exception:
                     _logger.exception("assignment failed for picking %s", picking.id)
-                    raise ValidationError(f"assignment failed for picking {picking.id}")
-
-                #<<LAGI#999
-                # # Apply lots/serials and canonicalize move lines (leave picking un-validated)
-                # try:
-                #     pk = picking.sudo()
-                #     moves = pk.move_ids.sorted(key=lambda m: m.id)
-                #     for move, meta in zip(moves, move_metadata):
-                #         product = meta['product']
-                #         qty = meta['qty']
-                #         incoming_tracking = meta['incoming_tracking']
-                #         incoming_tracking_no = meta['incoming_tracking_no']
-
-                #         # Prepare lot ids
-                #         lot_ids = []
-                #         if incoming_tracking == 'lot':
-                #             if not incoming_tracking_no:
-                #                 raise ValidationError(f"tracking_type='lot' but no tracking_no provided for {product.display_name}")
-                #             lot = env['stock.lot'].search([('name', '=', incoming_tracking_no), ('product_id', '=', product.id)], limit=1)
-                #             if not lot:
-                #                 lot = env['stock.lot'].sudo().create({'name': incoming_tracking_no, 'product_id': product.id})
-                #             lot_ids = [lot.id]
-                #         elif incoming_tracking == 'serial':
-                #             serials = [s.strip() for s in re.split(r'[,\n;|]+', incoming_tracking_no) if s.strip()]
-                #             if not serials:
-                #                 raise ValidationError(f"tracking_type='serial' but no serials provided for {product.display_name}")
-                #             if int(qty) != len(serials):
-                #                 raise ValidationError(f"Qty {qty} does not match number of serials ({len(serials)}) for {product.display_name}")
-                #             for serial in serials:
-                #                 lot = env['stock.lot'].search([('name', '=', serial), ('product_id', '=', product.id)], limit=1)
-                #                 if not lot:
-                #                     lot = env['stock.lot'].sudo().create({'name': serial, 'product_id': product.id})
-                #                 lot_ids.append(lot.id)
-
-                #         # Attach lot_ids to the move if any
-                #         if lot_ids:
-                #             move.sudo().write({'lot_ids': [(6, 0, lot_ids)]})
-
-                #         # Ask core to build/update move_line_ids from move.lot_ids
-                #         try:
-                #             move.sudo()._set_lot_ids()
-                #         except Exception:
-                #             _logger.exception("move._set_lot_ids() failed for move %s", move.id)
-
-                #         # Remove placeholders (we'll create canonical move lines ourselves)
-                #         existing_mls = move.move_line_ids
-                #         if existing_mls:
-                #             try:
-                #                 existing_mls.sudo().unlink()
-                #             except Exception:
-                #                 for ml in existing_mls:
-                #                     try:
-                #                         ml.sudo().unlink()
-                #                     except Exception:
-                #                         _logger.exception("Could not unlink placeholder move_line %s for move %s", ml.id, move.id)
-
-                #         desired_qty = float(move.product_uom_qty or 0.0)
-                #         move_uom_id = getattr(move, 'product_uom', None)
-                #         move_uom_id = move_uom_id.id if move_uom_id else product.uom_id.id
-
-                #         if lot_ids:
-                #             if product.tracking == 'serial':
-                #                 for lid in lot_ids:
-                #                     lot_rec = env['stock.lot'].browse(lid)
-                #                     ml_vals = {
-                #                         'picking_id': pk.id,
-                #                         'move_id': move.id,
-                #                         'product_id': product.id,
-                #                         'product_uom_id': move_uom_id,
-                #                         'quantity': 1.0,
-                #                         'qty_done': 1.0,
-                #                         'location_id': move.location_id.id,
-                #                         'location_dest_id': move.location_dest_id.id,
-                #                         'lot_id': lid,
-                #                         'lot_name': lot_rec.name if lot_rec else False,
-                #                     }
-                #                     env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-                #             else:
-                #                 # Lot tracking: set quantity = desired_qty and qty_done = desired_qty
-                #                 lot_rec = env['stock.lot'].browse(lot_ids[0]) if lot_ids else None
-                #                 ml_vals = {
-                #                     'picking_id': pk.id,
-                #                     'move_id': move.id,
-                #                     'product_id': product.id,
-                #                     'product_uom_id': move_uom_id,
-                #                     'quantity': desired_qty,
-                #                     'qty_done': desired_qty,
-                #                     'location_id': move.location_id.id,
-                #                     'location_dest_id': move.location_dest_id.id,
-                #                     'lot_id': lot_ids[0],
-                #                     'lot_name': lot_rec.name if lot_rec else False,
-                #                 }
-                #                 env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-                #         else:
-                #             # No tracking: create a single move_line with the full qty
-                #             ml_vals = {
-                #                 'picking_id': pk.id,
-                #                 'move_id': move.id,
-                #                 'product_id': product.id,
-                #                 'product_uom_id': move_uom_id,
-                #                 'quantity': desired_qty,
-                #                 'qty_done': desired_qty,
-                #                 'location_id': move.location_id.id,
-                #                 'location_dest_id': move.location_dest_id.id,
-                #             }
-                #             env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-
-                #     # end for moves
-                # except Exception as e:
-                #     _logger.exception("Failed to apply lots/serials for picking %s", picking.id)
-                #     msg = f"Picking {picking.name} (id={picking.id}) created but error applying lots/serials: {e}"
-                #     rec.sudo().write({'result_message': msg})
-                #     results.append({'staging_id': rec.id, 'error': str(e)})
-                #     continue
-                #>>
-
-                # Do NOT auto-validate. Leave picking in 'assigned' (Ready).
-                # Persist result message for display in the incoming_staging form view.
-                msg = f"Picking {picking.name} (id={picking.id}) created and assigned (state={picking.state}). Please process/validate manually."
-                # Update status to 'pick' as requested
-                rec.sudo().write({'status': 'pick', 'result_message': msg})
-
-                # Optionally send a realtime notification to current user (non-blocking)
-                try:
-                    env['bus.bus'].sendone(
-                        ('res.users', env.uid),
-                        {'type': 'simple_notification', 'title': 'Create Pick Result', 'message': msg, 'sticky': True}
-                    )
-                except Exception:
-                    _logger.exception("Failed to send bus notification for picking %s", picking.id)
-
-                results.append({'staging_id': rec.id, 'picking_id': picking.id, 'state': picking.state, 'message': msg})
-
-            except Exception as exc:
-                _logger.exception("Failed to create pick for incoming_staging %s", rec.id)
-                msg = f"Failed to create pick: {exc}"
-                try:
-                    rec.sudo().write({'result_message': msg})
-                except Exception:
-                    _logger.exception("Failed to write result_message on staging %s", rec.id)
-                results.append({'staging_id': rec.id, 'error': str(exc)})
+                    fail(rec, ValidationError(f"assignment failed for picking {picking.id}"))
+                    continue
+                ready.append((rec, picking))
+
+        messages = []
+        for rec, picking in ready:
+            # Do NOT auto-validate. Leave picking in 'assigned' (Ready).
+            # Persist result message for display in the incoming_staging form view.
+            msg = f"Picking {picking.name} (id={picking.id}) created and assigned (state={picking.state}). Please process/validate manually."
+            # Update status to 'pick' as requested
+            rec.sudo().write({'status': 'pick', 'result_message': msg})
+            messages.append(msg)
+            results.append({'staging_id': rec.id, 'picking_id': picking.id, 'state': picking.state, 'message': msg})
+
+        # Optionally send one realtime notification to current user (non-blocking)
+        if messages:
+            shown = messages[:_BUS_MAX_LINES]
+            if len(messages) > _BUS_MAX_LINES:
+                shown.append(f"... and {len(messages) - _BUS_MAX_LINES} more pickings.")
+            try:
+                env['bus.bus'].sendone(
+                    ('res.users', env.uid),
+                    {'type': 'simple_notification', 'title': 'Create Pick Result', 'message': '\n'.join(shown), 'sticky': True}
+                )
+            except Exception:
+                _logger.exception("Failed to send bus notification for %d pickings", len(messages))
         return results
 
     def action_create_transfer_return(self):
@@ -386,6 +493,8 @@ class IncomingStagingStockReceipt(models.Model):
         """
         results = []
         env = self.sudo().env
+        # Products/UoMs of every line are resolved in bulk up front
+        line_products = self.sudo().filtered(lambda r: r.status == 'open' and r.type == 'return')._resolve_line_products()
 
         for rec in self.sudo():
             try:
@@ -427,8 +536,7 @@ class IncomingStagingStockReceipt(models.Model):
                 move_vals_list = []
                 move_metadata = []
                 for line in rec.products:
-                    uom = rec._ensure_uom(line.product_uom or 'Unit')
-                    product = rec._ensure_product(line.product_no, line.product_nanme, uom)
+                    product, uom = rec._get_line_product(line, line_products)
                     qty = float(line.product_qty or 0.0)
 
                     incoming_tracking = (line.tracking_type or 'none')
@@ -488,6 +596,18 @@ class IncomingStagingStockReceipt(models.Model):
                 # Create picking
                 picking = env['stock.picking'].create(picking_vals)
 
+                # Apply lots/serials as the move lines of the draft moves, before the reservation,
+                # so action_confirm/action_assign find the moves covered and add no placeholder lines
+                try:
+                    with env.cr.savepoint():
+                        rec._apply_lots_and_move_lines(picking, move_metadata)
+                except Exception as e:
+                    _logger.exception("Failed to apply lots/serials for picking %s", picking.id)
+                    msg = f"Picking {picking.name} (id={picking.id}) created but error applying lots/serials: {e}"
+                    rec.sudo().write({'result_message': msg})
+                    results.append({'staging_id': rec.id, 'error': str(e)})
+                    continue
+
                 # Confirm and assign -> picking should become 'assigned' (Ready)
                 try:
                     if hasattr(picking, 'action_confirm'):
@@ -504,134 +624,6 @@ class IncomingStagingStockReceipt(models.Model):
                     _logger.exception("assignment failed for picking %s", picking.id)
                     raise ValidationError(f"assignment failed for picking {picking.id}")
 
-                # Apply lots/serials and canonicalize move lines (leave picking un-validated)
-                try:
-                    pk = picking.sudo()
-                    moves = pk.move_ids.sorted(key=lambda m: m.id)
-                    for move, meta in zip(moves, move_metadata):
-                        product = meta['product']
-                        qty = meta['qty']
-                        incoming_tracking = meta['incoming_tracking']
-                        incoming_tracking_no = meta['incoming_tracking_no']
-                        incoming_expiration_date = meta['incoming_expiration_date'] #LAGI#999
-
-                        # Prepare lot ids
-                        lot_ids = []
-                        if incoming_tracking == 'lot':
-                            if not incoming_tracking_no:
-                                raise ValidationError(f"tracking_type='lot' but no tracking_no provided for {product.display_name}")
-                            lot = env['stock.lot'].search([('name', '=', incoming_tracking_no), ('product_id', '=', product.id)], limit=1)
-                            if not lot:
-                                lot = env['stock.lot'].sudo().create({
-                                    'name': incoming_tracking_no, 
-                                    'product_id': product.id,
-                                    #<<LAGI#999
-                                    'use_expiration_date': True,
-                                    'expiration_date': incoming_expiration_date
-                                    #>>
-                                })
-                            else:
-                                #<<LAGI#999
-                                if not lot.use_expiration_date and incoming_expiration_date:
-                                    lot.sudo().write({
-                                        'use_expiration_date': True,
-                                        'expiration_date': incoming_expiration_date
-                                    })
-                                #>>
-                            lot_ids = [lot.id]
-                        elif incoming_tracking == 'serial':
-                            serials = [s.strip() for s in re.split(r'[,\n;|]+', incoming_tracking_no) if s.strip()]
-                            if not serials:
-                                raise ValidationError(f"tracking_type='serial' but no serials provided for {product.display_name}")
-                            if int(qty) != len(serials):
-                                raise ValidationError(f"Qty {qty} does not match number of serials ({len(serials)}) for {product.display_name}")
-                            for serial in serials:
-                                lot = env['stock.lot'].search([('name', '=', serial), ('product_id', '=', product.id)], limit=1)
-                                if not lot:
-                                    lot = env['stock.lot'].sudo().create({'name': serial, 'product_id': product.id})
-                                lot_ids.append(lot.id)
-
-                        # Attach lot_ids to the move if any
-                        if lot_ids:
-                            move.sudo().write({'lot_ids': [(6, 0, lot_ids)]})
-
-                        # Ask core to build/update move_line_ids from move.lot_ids
-                        try:
-                            move.sudo()._set_lot_ids()
-                        except Exception:
-                            _logger.exception("move._set_lot_ids() failed for move %s", move.id)
-
-                        # Remove placeholders (we'll create canonical move lines ourselves)
-                        existing_mls = move.move_line_ids
-                        if existing_mls:
-                            try:
-                                existing_mls.sudo().unlink()
-                            except Exception:
-                                for ml in existing_mls:
-                                    try:
-                                        ml.sudo().unlink()
-                                    except Exception:
-                                        _logger.exception("Could not unlink placeholder move_line %s for move %s", ml.id, move.id)
-
-                        desired_qty = float(move.product_uom_qty or 0.0)
-                        move_uom_id = getattr(move, 'product_uom', None)
-                        move_uom_id = move_uom_id.id if move_uom_id else product.uom_id.id
-
-                        if lot_ids:
-                            if product.tracking == 'serial':
-                                for lid in lot_ids:
-                                    lot_rec = env['stock.lot'].browse(lid)
-                                    ml_vals = {
-                                        'picking_id': pk.id,
-                                        'move_id': move.id,
-                                        'product_id': product.id,
-                                        'product_uom_id': move_uom_id,
-                                        'quantity': 1.0,
-                                        'qty_done': 1.0,
-                                        'location_id': move.location_id.id,
-                                        'location_dest_id': move.location_dest_id.id,
-                                        'lot_id': lid,
-                                        'lot_name': lot_rec.name if lot_rec else False,
-                                    }
-                                    env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-                            else:
-                                # Lot tracking: set quantity = desired_qty and qty_done = desired_qty
-                                lot_rec = env['stock.lot'].browse(lot_ids[0]) if lot_ids else None
-                                ml_vals = {
-                                    'picking_id': pk.id,
-                                    'move_id': move.id,
-                                    'product_id': product.id,
-                                    'product_uom_id': move_uom_id,
-                                    'quantity': desired_qty,
-                                    'qty_done': desired_qty,
-                                    'location_id': move.location_id.id,
-                                    'location_dest_id': move.location_dest_id.id,
-                                    'lot_id': lot_ids[0],
-                                    'lot_name': lot_rec.name if lot_rec else False,
-                                }
-                                env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-                        else:
-                            # No tracking: create a single move_line with the full qty
-                            ml_vals = {
-                                'picking_id': pk.id,
-                                'move_id': move.id,
-                                'product_id': product.id,
-                                'product_uom_id': move_uom_id,
-                                'quantity': desired_qty,
-                                'qty_done': desired_qty,
-                                'location_id': move.location_id.id,
-                                'location_dest_id': move.location_dest_id.id,
-                            }
-                            env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-
-                    # end for moves
-                except Exception as e:
-                    _logger.exception("Failed to apply lots/serials for picking %s", picking.id)
-                    msg = f"Picking {picking.name} (id={picking.id}) created but error applying lots/serials: {e}"
-                    rec.sudo().write({'result_message': msg})
-                    results.append({'staging_id': rec.id, 'error': str(e)})
-                    continue
-
                 # Do NOT auto-validate. Leave picking in 'assigned' (Ready).
                 # Persist result message for display in the incoming_staging form view.
                 msg = f"Picking {picking.name} (id={picking.id}) created and assigned (state={picking.state}). Please validate manually."
@@ -672,6 +664,8 @@ class IncomingStagingStockReceipt(models.Model):
         """
         results = []
         env = self.sudo().env
+        # Products/UoMs of every line are resolved in bulk up front
+        line_products = self.sudo().filtered(lambda r: r.status == 'open' and r.type == 'inbound')._resolve_line_products()
 
         for rec in self.sudo():
             try:
@@ -729,8 +723,7 @@ class IncomingStagingStockReceipt(models.Model):
                 move_vals_list = []
                 move_metadata = []
                 for line in rec.products:
-                    uom = rec._ensure_uom(line.product_uom or 'Unit')
-                    product = rec._ensure_product(line.product_no, line.product_nanme, uom)
+                    product, uom = rec._get_line_product(line, line_products)
                     qty = float(line.product_qty or 0.0)
 
                     incoming_tracking = (line.tracking_type or 'none')
@@ -788,6 +781,18 @@ class IncomingStagingStockReceipt(models.Model):
 
                 picking = env['stock.picking'].create(picking_vals)
 
+                # Apply lots/serials as the move lines of the draft moves, before the reservation,
+                # so action_confirm/action_assign find the moves covered and add no placeholder lines
+                try:
+                    with env.cr.savepoint():
+                        rec._apply_lots_and_move_lines(picking, move_metadata)
+                except Exception as e:
+                    _logger.exception("Failed to apply lots/serials for picking %s", picking.id)
+                    msg = f"Picking {picking.name} (id={picking.id}) created but error applying lots/serials: {e}"
+                    rec.sudo().write({'result_message': msg})
+                    results.append({'staging_id': rec.id, 'error': str(e)})
+                    continue
+
                 # Confirm and assign -> picking should become 'assigned' (Ready)
                 try:
                     if hasattr(picking, 'action_confirm'):
@@ -804,134 +809,6 @@ class IncomingStagingStockReceipt(models.Model):
                     _logger.exception("assignment failed for picking %s", picking.id)
                     raise ValidationError(f"assignment failed for picking {picking.id}")
 
-                # Apply lots/serials and canonicalize move lines (leave picking un-validated)
-                try:
-                    pk = picking.sudo()
-                    moves = pk.move_ids.sorted(key=lambda m: m.id)
-                    for move, meta in zip(moves, move_metadata):
-                        product = meta['product']
-                        qty = meta['qty']
-                        incoming_tracking = meta['incoming_tracking']
-                        incoming_tracking_no = meta['incoming_tracking_no']
-                        incoming_expiration_date = meta['incoming_expiration_date'] #LAGI#999
-
-                        # Prepare lot ids
-                        lot_ids = []
-                        if incoming_tracking == 'lot':
-                            if not incoming_tracking_no:
-                                raise ValidationError(f"tracking_type='lot' but no tracking_no provided for {product.display_name}")
-                            lot = env['stock.lot'].search([('name', '=', incoming_tracking_no), ('product_id', '=', product.id)], limit=1)
-                            if not lot:
-                                lot = env['stock.lot'].sudo().create({
-                                    'name': incoming_tracking_no, 
-                                    'product_id': product.id,
-                                    #<<LAGI#999
-                                    'use_expiration_date': True,
-                                    'expiration_date': incoming_expiration_date
-                                    #>>
-                                })
-                            else:
-                                #<<LAGI#999
-                                if not lot.use_expiration_date and incoming_expiration_date:
-                                    lot.sudo().write({
-                                        'use_expiration_date': True,
-                                        'expiration_date': incoming_expiration_date
-                                    })
-                                #>>
-                            lot_ids = [lot.id]
-                        elif incoming_tracking == 'serial':
-                            serials = [s.strip() for s in re.split(r'[,\n;|]+', incoming_tracking_no) if s.strip()]
-                            if not serials:
-                                raise ValidationError(f"tracking_type='serial' but no serials provided for {product.display_name}")
-                            if int(qty) != len(serials):
-                                raise ValidationError(f"Qty {qty} does not match number of serials ({len(serials)}) for {product.display_name}")
-                            for serial in serials:
-                                lot = env['stock.lot'].search([('name', '=', serial), ('product_id', '=', product.id)], limit=1)
-                                if not lot:
-                                    lot = env['stock.lot'].sudo().create({'name': serial, 'product_id': product.id})
-                                lot_ids.append(lot.id)
-
-                        # Attach lot_ids to the move if any
-                        if lot_ids:
-                            move.sudo().write({'lot_ids': [(6, 0, lot_ids)]})
-
-                        # Ask core to build/update move_line_ids from move.lot_ids
-                        try:
-                            move.sudo()._set_lot_ids()
-                        except Exception:
-                            _logger.exception("move._set_lot_ids() failed for move %s", move.id)
-
-                        # Remove placeholders (we'll create canonical move lines ourselves)
-                        existing_mls = move.move_line_ids
-                        if existing_mls:
-                            try:
-                                existing_mls.sudo().unlink()
-                            except Exception:
-                                for ml in existing_mls:
-                                    try:
-                                        ml.sudo().unlink()
-                                    except Exception:
-                                        _logger.exception("Could not unlink placeholder move_line %s for move %s", ml.id, move.id)
-
-                        desired_qty = float(move.product_uom_qty or 0.0)
-                        move_uom_id = getattr(move, 'product_uom', None)
-                        move_uom_id = move_uom_id.id if move_uom_id else product.uom_id.id
-
-                        if lot_ids:
-                            if product.tracking == 'serial':
-                                for lid in lot_ids:
-                                    lot_rec = env['stock.lot'].browse(lid)
-                                    ml_vals = {
-                                        'picking_id': pk.id,
-                                        'move_id': move.id,
-                                        'product_id': product.id,
-                                        'product_uom_id': move_uom_id,
-                                        'quantity': 1.0,
-                                        'qty_done': 1.0,
-                                        'location_id': move.location_id.id,
-                                        'location_dest_id': move.location_dest_id.id,
-                                        'lot_id': lid,
-                                        'lot_name': lot_rec.name if lot_rec else False,
-                                    }
-                                    env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-                            else:
-                                # Lot tracking: set quantity = desired_qty and qty_done = desired_qty
-                                lot_rec = env['stock.lot'].browse(lot_ids[0]) if lot_ids else None
-                                ml_vals = {
-                                    'picking_id': pk.id,
-                                    'move_id': move.id,
-                                    'product_id': product.id,
-                                    'product_uom_id': move_uom_id,
-                                    'quantity': desired_qty,
-                                    'qty_done': desired_qty,
-                                    'location_id': move.location_id.id,
-                                    'location_dest_id': move.location_dest_id.id,
-                                    'lot_id': lot_ids[0],
-                                    'lot_name': lot_rec.name if lot_rec else False,
-                                }
-                                env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-                        else:
-                            # No tracking: create a single move_line with the full qty
-                            ml_vals = {
-                                'picking_id': pk.id,
-                                'move_id': move.id,
-                                'product_id': product.id,
-                                'product_uom_id': move_uom_id,
-                                'quantity': desired_qty,
-                                'qty_done': desired_qty,
-                                'location_id': move.location_id.id,
-                                'location_dest_id': move.location_dest_id.id,
-                            }
-                            env['stock.move.line'].sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-
-                    # end for moves
-                except Exception as e:
-                    _logger.exception("Failed to apply lots/serials for picking %s", picking.id)
-                    msg = f"Picking {picking.name} (id={picking.id}) created but error applying lots/serials: {e}"
-                    rec.sudo().write({'result_message': msg})
-                    results.append({'staging_id': rec.id, 'error': str(e)})
-                    continue
-
                 # Do NOT auto-validate. Leave picking in 'assigned' (Ready).
                 # Persist result message for display in the incoming_staging form view.
                 msg = f"Picking {picking.name} (id={picking.id}) created and assigned (state={picking.state}). Please validate manually."
@@ -961,6 +838,225 @@ class IncomingStagingStockReceipt(models.Model):
     # ---------------------------------------------------------------------
     # Helpers copied here to be available under sudo()
     # ---------------------------------------------------------------------
+    def _apply_lots_and_move_lines(self, picking, move_metadata):
+        """
+        Apply the incoming lots/serials to the draft moves of a new picking as canonical, picked
+        move lines. Called before action_confirm/action_assign: the moves are then already fully
+        covered and the reservation creates no placeholder lines (the picking is left un-validated).
+
+        Every (lot name, product) pair is resolved with one stock.lot query, the missing lots are
+        created together and all move lines are created with a single create(); the lots are set
+        directly on the move lines so move.lot_ids / _set_lot_ids() is not needed.
+        """
+        env = self.sudo().env
+        Lot = env['stock.lot'].sudo()
+        pk = picking.sudo()
+        moves = pk.move_ids.sorted(key=lambda m: m.id)
+
+        # Check tracking info and collect the lot names wanted per move
+        wanted = []  # [(move, meta, [lot names])]
+        for move, meta in zip(moves, move_metadata):
+            product = meta['product']
+            qty = meta['qty']
+            incoming_tracking = meta['incoming_tracking']
+            incoming_tracking_no = meta['incoming_tracking_no']
+            lot_names = []
+            if incoming_tracking == 'lot':
+                if not incoming_tracking_no:
+                    raise ValidationError(f"tracking_type='lot' but no tracking_no provided for {product.display_name}")
+                lot_names = [incoming_tracking_no]
+            elif incoming_tracking == 'serial':
+                lot_names = [s.strip() for s in re.split(r'[,\n;|]+', incoming_tracking_no) if s.strip()]
+                if not lot_names:
+                    raise ValidationError(f"tracking_type='serial' but no serials provided for {product.display_name}")
+                if int(qty) != len(lot_names):
+                    raise ValidationError(f"Qty {qty} does not match number of serials ({len(lot_names)}) for {product.display_name}")
+            wanted.append((move, meta, lot_names))
+
+        # Resolve every (lot name, product) pair with one query
+        lot_by_key = {}
+        names = {name for _move, _meta, lot_names in wanted for name in lot_names}
+        if names:
+            product_ids = {meta['product'].id for _move, meta, lot_names in wanted if lot_names}
+            for lot in Lot.search([('name', 'in', list(names)), ('product_id', 'in', list(product_ids))]):
+                lot_by_key.setdefault((lot.name, lot.product_id.id), lot)
+
+        # Create the missing lots together
+        lot_vals = {}
+        for _move, meta, lot_names in wanted:
+            product = meta['product']
+            incoming_expiration_date = meta['incoming_expiration_date'] #LAGI#999
+            for name in lot_names:
+                key = (name, product.id)
+                lot = lot_by_key.get(key)
+                if meta['incoming_tracking'] == 'lot':
+                    if not lot and key not in lot_vals:
+                        lot_vals[key] = {
+                            'name': name,
+                            'product_id': product.id,
+                            #<<LAGI#999
+                            'use_expiration_date': True,
+                            'expiration_date': incoming_expiration_date
+                            #>>
+                        }
+                    #<<LAGI#999
+                    elif lot and not lot.use_expiration_date and incoming_expiration_date:
+                        lot.write({
+                            'use_expiration_date': True,
+                            'expiration_date': incoming_expiration_date
+                        })
+                    #>>
+                elif not lot and key not in lot_vals:
+                    lot_vals[key] = {'name': name, 'product_id': product.id}
+        if lot_vals:
+            lot_by_key.update(zip(lot_vals, Lot.create(list(lot_vals.values()))))
+
+        ml_vals_list = []
+        for move, meta, lot_names in wanted:
+            product = meta['product']
+            desired_qty = float(move.product_uom_qty or 0.0)
+            move_uom_id = move.product_uom.id or product.uom_id.id
+            base_vals = {
+                'picking_id': pk.id,
+                'move_id': move.id,
+                'product_id': product.id,
+                'product_uom_id': move_uom_id,
+                'location_id': move.location_id.id,
+                'location_dest_id': move.location_dest_id.id,
+            }
+            lots = [lot_by_key[(name, product.id)] for name in lot_names]
+            if lots and product.tracking == 'serial':
+                for lot in lots:
+                    ml_vals_list.append(dict(base_vals, quantity=1.0, picked=True, lot_id=lot.id, lot_name=lot.name))
+            elif lots:
+                # Lot tracking: set quantity = desired_qty, marked as picked
+                ml_vals_list.append(dict(base_vals, quantity=desired_qty, picked=True, lot_id=lots[0].id, lot_name=lots[0].name))
+            else:
+                # No tracking: create a single move_line with the full qty
+                ml_vals_list.append(dict(base_vals, quantity=desired_qty, picked=True))
+        if ml_vals_list:
+            env['stock.move.line'].sudo().create([
+                {k: v for k, v in ml_vals.items() if v is not None and v is not False}
+                for ml_vals in ml_vals_list
+            ])
+
+    def _resolve_line_products(self):
+        """
+        Bulk counterpart of _ensure_uom/_ensure_product for every product line of the recordset.
+
+        UoMs are resolved with one name query; products with one default_code query plus one
+        name query for the lines not matched by code. Missing templates are created with a
+        single multi-create and the storable/lot/expiration fixes are applied with one write
+        per distinct set of values.
+        Returns {incoming_staging_product id: (product, uom)}. If the bulk path fails an empty
+        dict is returned and callers fall back to per-line resolution (_get_line_product).
+        """
+        lines = self.sudo().products
+        if not lines:
+            return {}
+        env = self.sudo().env
+        try:
+            with env.cr.savepoint():
+                return self._bulk_resolve_line_products(lines)
+        except Exception:
+            _logger.exception("Bulk product resolution failed for %d staging lines, resolving per line", len(lines))
+            return {}
+
+    def _bulk_resolve_line_products(self, lines):
+        env = self.sudo().env
+        ProductProduct = env['product.product']
+        ProductTemplate = env['product.template']
+
+        # UoMs: one query, first match per name wins (same as search(limit=1))
+        uom_names = list({line.product_uom or 'Unit' for line in lines})
+        uom_by_name = {}
+        for uom in env['uom.uom'].search([('name', 'in', uom_names)]):
+            uom_by_name.setdefault(uom.name, uom)
+        for name in uom_names:
+            if name not in uom_by_name:
+                uom_by_name[name] = self._ensure_uom(name)
+
+        # Products: by default_code first, then by name
+        codes = list({line.product_no for line in lines if line.product_no})
+        by_code = {}
+        if codes:
+            for prod in ProductProduct.search([('default_code', 'in', codes)]):
+                by_code.setdefault(prod.default_code, prod)
+        names = list({
+            line.product_nanme for line in lines
+            if line.product_nanme and line.product_no not in by_code
+        })
+        by_name = {}
+        if names:
+            for prod in ProductProduct.search([('name', 'in', names)]):
+                by_name.setdefault(prod.name, prod)
+
+        found = {}
+        # Lines whose product does not exist yet share one template per code/name,
+        # like the per-line flow finding the product created for an earlier line
+        pending_vals = []
+        pending_by_code = {}
+        pending_by_name = {}
+        pending_lines = {}
+        for line in lines:
+            uom = uom_by_name[line.product_uom or 'Unit']
+            prod = by_code.get(line.product_no) or by_name.get(line.product_nanme)
+            if prod:
+                found[line.id] = (prod, uom)
+                continue
+            idx = pending_by_code.get(line.product_no) if line.product_no else None
+            if idx is None and line.product_nanme:
+                idx = pending_by_name.get(line.product_nanme)
+            if idx is None:
+                idx = len(pending_vals)
+                tmpl_vals = {
+                    'name': line.product_nanme or (line.product_no or 'New Product'),
+                    'uom_id': uom.id,
+                    #<<LAGI#999
+                    'tracking': 'lot',
+                    'is_storable': True,
+                    'use_expiration_date': True,
+                    #>>
+                }
+                if line.product_no:
+                    tmpl_vals['default_code'] = line.product_no
+                    pending_by_code[line.product_no] = idx
+                if line.product_nanme:
+                    pending_by_name[line.product_nanme] = idx
+                pending_vals.append(tmpl_vals)
+            pending_lines[line.id] = (idx, uom)
+
+        #<<LAGI#999
+        # Existing products must be storable, lot tracked and use expiration dates
+        fixes = {}
+        for prod in {prod for prod, _uom in found.values()}:
+            tmpl_vals = {}
+            if not prod.is_storable:
+                tmpl_vals['is_storable'] = True
+            if prod.tracking != 'lot':
+                tmpl_vals['tracking'] = 'lot'
+            if not prod.use_expiration_date:
+                tmpl_vals['use_expiration_date'] = True
+            if tmpl_vals:
+                key = tuple(sorted(tmpl_vals.items()))
+                fixes[key] = fixes.get(key, ProductTemplate) | prod.product_tmpl_id
+        for key, templates in fixes.items():
+            templates.write(dict(key))
+        #>>
+
+        if pending_vals:
+            templates = ProductTemplate.create(pending_vals)
+            for line_id, (idx, uom) in pending_lines.items():
+                found[line_id] = (templates[idx].product_variant_id, uom)
+        return found
+
+    def _get_line_product(self, line, line_products=None):
+        """(product, uom) of a staging line, taken from the _resolve_line_products map when available."""
+        if line_products and line.id in line_products:
+            return line_products[line.id]
+        uom = self._ensure_uom(line.product_uom or 'Unit')
+        return self._ensure_product(line.product_no, line.product_nanme, uom), uom
+
     def _ensure_uom(self, name):
         if not name:
             return (
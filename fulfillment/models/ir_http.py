@@ -3,6 +3,7 @@ from werkzeug.exceptions import Unauthorized
 import logging
 
 from odoo import models
+from odoo.exceptions import AccessDenied
 from odoo.http import request
 
 _logger = logging.getLogger(__name__)
@@ -17,6 +18,7 @@ class IrHttp(models.AbstractModel):
            Authorization: Bearer <api_key>
 
         This method resolves the API key to a user via res.users.apikeys._check_credentials(...)
+        (through a short-lived per-worker cache, see _fulfillment_check_credentials)
         and updates the request environment to act as that user.
         """
         # read header
@@ -37,7 +39,9 @@ class IrHttp(models.AbstractModel):
         scope = 'odoo.plugin.outlook'
 
         try:
-            user_id = request.env['res.users.apikeys']._check_credentials(scope=scope, key=token)
+            user_id, context = request.env['res.users.apikeys']._fulfillment_check_credentials(scope=scope, key=token)
+        except AccessDenied:
+            user_id, context = False, {}
         except Exception as e:
             _logger.exception("API auth: error checking credentials")
             raise Unauthorized("Invalid API key")
@@ -48,11 +52,8 @@ class IrHttp(models.AbstractModel):
 
         # set request user (user_id may be integer)
         request.update_env(user=user_id)
-        # copy user's context into the request context
-        try:
-            request.update_context(**request.env.user.context_get())
-        except Exception:
-            # non-fatal, but log
-            _logger.debug("API auth: failed to update context for user %s", user_id)
+        # copy user's context (cached with the key verification) into the request context
+        request.update_context(**context)
 
-        _logger.info("API auth: success user=%s (via api key prefix=%s) from %s", request.env.user.login, token[:8], request.httprequest.remote_addr)
\ No newline at end of file
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("API auth: success user=%s (via api key prefix=%s) from %s", request.env.user.login, token[:8], request.httprequest.remote_addr)
@@ -105,4 +105,32 @@ class ResCompany(models.Model):
         help='Label used when courier_scoring is Priority (above medium threshold).'
     )
 
-    fulfillment_lot_sequence_id = fields.Many2one('ir.sequence', 'Lot Sequence')
\ No newline at end of file
+    fulfillment_lot_sequence_id = fields.Many2one('ir.sequence', 'Lot Sequence')
+
+    def _fulfillment_next_lot_numbers(self, count):
+        """
+        Reserve `count` lot numbers from fulfillment_lot_sequence_id in one round trip.
+
+        With the 'standard' implementation the ir.sequence is backed by a PostgreSQL sequence,
+        so the whole block is taken with nextval() (no row lock on ir_sequence) and formatted
+        with the configured prefix/suffix/padding. 'No gap' or date-range sequences keep the
+        regular next_by_id() path. Returns [] when no lot sequence is configured.
+        """
+        self.ensure_one()
+        seq = self.sudo().fulfillment_lot_sequence_id
+        if not seq or count <= 0:
+            return []
+        if seq.implementation != 'standard' or seq.use_date_range:
+            return [seq.next_by_id() for _i in range(count)]
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ('ir_sequence_%03d' % seq.id, count),
+        )
+        numbers = sorted(row[0] for row in self.env.cr.fetchall())
+        return [seq.get_next_char(number) for number in numbers]
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'fulfillment_transporter_category_id' in vals:
+            self.env['res.partner']._clear_courier_index()
+        return res
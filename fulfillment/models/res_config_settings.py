@@ -97,6 +97,26 @@ class ResConfigSettings(models.TransientModel):
         related='company_id.fulfillment_lot_sequence_id',
         readonly=False,)
 
+    fulfillment_qr_do_not_store_image = fields.Boolean(
+        string="Do not store QR images",
+        config_parameter='fulfillment.qr_do_not_store_image',
+        help="Render incoming staging QR codes on demand (/incoming_staging/<id>/qr.png) "
+             "instead of keeping a PNG attachment per record.",
+    )
+
+    fulfillment_qr_payload_mode = fields.Selection(
+        selection=[
+            ('json', 'Full JSON'),
+            ('compact', 'Compact (compressed, base45)'),
+            ('reference', 'Reference only (resi no + checksum)'),
+        ],
+        string="QR Payload Mode",
+        config_parameter='fulfillment.qr_payload_mode',
+        default='json',
+        help="Content of the incoming staging QR codes. Compact and reference modes give smaller, "
+             "faster-scanning codes; existing codes follow after 'refresh_all_qr'.",
+    )
+
     def action_refresh_courier_scoring(self):
         """
         Button handler invoked from Settings view. Calls partner method to recompute and write
@@ -1,4 +1,13 @@
 from odoo import api, fields, models
+from odoo.tools import ormcache
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def _normalize_courier_name(name):
+    """Key used by the courier index: case-insensitive, whitespace-collapsed."""
+    return ' '.join((name or '').split()).casefold()
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
@@ -36,6 +45,15 @@ class ResPartner(models.Model):
                                   ('b2c', 'B2C')
                               ], default='')
 
+    courier_alias = fields.Char(
+        string='Courier Aliases',
+        help='Comma separated alternative names principals use for this courier (e.g. "JNE, JNE Express"). '
+             'Used when resolving principal_courier on incoming staging.',
+    )
+
+    # Fields whose change can alter the courier index (see _get_courier_index)
+    _COURIER_INDEX_FIELDS = {'name', 'courier_alias', 'active'}
+
     @api.depends('category_id.courier_scoring', 'category_id', 'company_id.fulfillment_transporter_category_id')
     def _compute_courier_scoring(self):
         for partner in self:
@@ -100,48 +118,220 @@ class ResPartner(models.Model):
         Recompute and write courier_scoring, show_courier_scoring and courier_scoring_label
         for all partners and persist the stored values.
         Can be called from a settings button.
+
+        Set-based: one UPDATE computes the score of the transporter partners from their category
+        membership and the label from the company thresholds (same rules as the compute methods),
+        resets partners that are no longer transporters and only touches rows whose values
+        changed. The dependent stored fields (courier_priority on incoming_staging and
+        stock.picking, courier_sort_score on incoming_staging) are then refreshed in batches.
         """
-        Partner = self.sudo()
-        partners = Partner.search([])  # consider limiting scope if you have many partners
-        for p in partners:
-            company = p.company_id or self.env.company
-            transporter_cat = company.fulfillment_transporter_category_id
-            transporter_id = transporter_cat.id if transporter_cat else False
+        self.env.flush_all()
+        cr = self.env.cr
+        cr.execute("""
+            WITH transporter AS (
+                SELECT p.id,
+                       co.id AS company_id,
+                       SUM(CASE WHEN c.id <> co.fulfillment_transporter_category_id
+                                THEN COALESCE(c.courier_scoring, 0) ELSE 0 END) AS score
+                  FROM res_partner p
+                  JOIN res_company co ON co.id = COALESCE(p.company_id, %(company_id)s)
+                  JOIN res_partner_res_partner_category_rel rel ON rel.partner_id = p.id
+                  JOIN res_partner_category c ON c.id = rel.category_id AND c.active
+                 WHERE co.fulfillment_transporter_category_id IS NOT NULL
+                 GROUP BY p.id, co.id
+                HAVING bool_or(c.id = co.fulfillment_transporter_category_id)
+            ),
+            target AS (
+                SELECT p.id,
+                       COALESCE(t.score, 0) AS score,
+                       t.id IS NOT NULL AS show,
+                       CASE WHEN COALESCE(t.score, 0) <= 0 THEN NULL
+                            WHEN t.score <= COALESCE(NULLIF(co.fulfillment_courier_threshold_reguler, 0), 30)
+                                THEN COALESCE(NULLIF(co.fulfillment_courier_label_reguler, ''), 'Reguler')
+                            WHEN t.score <= COALESCE(NULLIF(co.fulfillment_courier_threshold_medium, 0), 70)
+                                THEN COALESCE(NULLIF(co.fulfillment_courier_label_medium, ''), 'Medium')
+                            ELSE COALESCE(NULLIF(co.fulfillment_courier_label_priority, ''), 'Instan')
+                       END AS label
+                  FROM res_partner p
+                  LEFT JOIN transporter t ON t.id = p.id
+                  LEFT JOIN res_company co ON co.id = t.company_id
+                 WHERE t.id IS NOT NULL
+                    OR p.show_courier_scoring
+                    OR COALESCE(p.courier_scoring, 0) <> 0
+                    OR COALESCE(p.courier_scoring_label, '') <> ''
+            )
+            UPDATE res_partner p
+               SET courier_scoring = target.score,
+                   show_courier_scoring = target.show,
+                   courier_scoring_label = target.label
+              FROM target
+             WHERE p.id = target.id
+               AND (COALESCE(p.courier_scoring, 0) <> target.score
+                    OR COALESCE(p.show_courier_scoring, FALSE) <> target.show
+                    OR COALESCE(p.courier_scoring_label, '') <> COALESCE(target.label, ''))
+         RETURNING p.id
+        """, {'company_id': self.env.company.id})
+        partner_ids = [row[0] for row in cr.fetchall()]
+        self.env.invalidate_all()
+        if partner_ids:
+            _logger.info("Courier scoring changed for %d partners", len(partner_ids))
+            self._refresh_courier_dependents(partner_ids)
+        return True
 
-            cats = p.category_id
-            if not cats or not transporter_id:
-                score = 0
-                show = False
-            else:
-                other_sum = sum(int(c.courier_scoring or 0) for c in cats.filtered(lambda c: c.id != transporter_id))
-                has_transporter = transporter_id in cats.ids
-                score = int(other_sum or 0) if has_transporter else 0
-                show = bool(has_transporter)
+    @api.model
+    def _refresh_courier_dependents(self, partner_ids, batch_size=5000):
+        """Propagate courier scoring/label of `partner_ids` to the stored fields that depend on them,
+        in batches of `batch_size` rows so long updates do not hold huge locks."""
+        cr = self.env.cr
+        queries = [
+            ("stock_picking", """
+                UPDATE stock_picking sp
+                   SET courier_priority = p.courier_scoring_label
+                  FROM res_partner p
+                 WHERE sp.id IN (
+                        SELECT sp2.id FROM stock_picking sp2
+                          JOIN res_partner p2 ON p2.id = sp2.principal_courier_id
+                         WHERE sp2.principal_courier_id = ANY(%(ids)s)
+                           AND sp2.courier_priority IS DISTINCT FROM p2.courier_scoring_label
+                         LIMIT %(limit)s)
+                   AND p.id = sp.principal_courier_id
+            """),
+            ("incoming_staging", """
+                UPDATE incoming_staging st
+                   SET courier_priority = p.courier_scoring_label,
+                       courier_sort_score = COALESCE(p.courier_scoring, 0)
+                  FROM res_partner p
+                 WHERE st.id IN (
+                        SELECT st2.id FROM incoming_staging st2
+                          JOIN res_partner p2 ON p2.id = st2.principal_courier_id
+                         WHERE st2.principal_courier_id = ANY(%(ids)s)
+                           AND (st2.courier_priority IS DISTINCT FROM p2.courier_scoring_label
+                                OR st2.courier_sort_score IS DISTINCT FROM COALESCE(p2.courier_scoring, 0))
+                         LIMIT %(limit)s)
+                   AND p.id = st.principal_courier_id
+            """),
+        ]
+        for table, query in queries:
+            total = 0
+            while True:
+                cr.execute(query, {'ids': partner_ids, 'limit': batch_size})
+                total += cr.rowcount
+                if cr.rowcount < batch_size:
+                    break
+            if total:
+                _logger.info("Refreshed courier fields on %d %s rows", total, table)
+                if table == 'stock_picking':
+                    # the counter trigger saw the courier_priority changes, push them to the dashboards
+                    self.env['stock_picking_type_counter']._schedule_push()
+        self.env['stock.picking'].invalidate_model(['courier_priority'])
+        self.env['incoming_staging'].invalidate_model(['courier_priority', 'courier_sort_score'])
 
-            # compute label using company-configured thresholds/labels
-            t_reg = company.fulfillment_courier_threshold_reguler or 30
-            t_med = company.fulfillment_courier_threshold_medium or 70
-            label_reg = company.fulfillment_courier_label_reguler or 'Reguler'
-            label_med = company.fulfillment_courier_label_medium or 'Medium'
-            label_pri = company.fulfillment_courier_label_priority or 'Instan'
+    # ---------------------------------------------------------------------
+    # Courier index: company -> {normalized courier name/alias: partner id}
+    # ---------------------------------------------------------------------
+    @api.model
+    @ormcache('company_id')
+    def _get_courier_index(self, company_id):
+        """
+        Build the courier index for one company from the partners in its Transporter category.
+        Returns (by_name, entries, names):
+          - by_name: {normalized name or alias: partner_id} for exact O(1) hits
+          - entries: ((normalized name, partner_id), ...) in res.partner order, for substring fallback
+          - names: transporter partner names (used by API error responses)
+        Cached per worker; invalidated through _clear_courier_index().
+        """
+        company = self.env['res.company'].sudo().browse(company_id)
+        transporter_cat = company.fulfillment_transporter_category_id
+        if not transporter_cat:
+            return {}, (), ()
+        partners = self.sudo().search([('category_id', 'in', [transporter_cat.id])])
+        by_name = {}
+        entries = []
+        for partner in partners:
+            key = _normalize_courier_name(partner.name)
+            entries.append((key, partner.id))
+            by_name.setdefault(key, partner.id)
+            for alias in (partner.courier_alias or '').split(','):
+                alias_key = _normalize_courier_name(alias)
+                if alias_key:
+                    by_name.setdefault(alias_key, partner.id)
+                    entries.append((alias_key, partner.id))
+        return by_name, tuple(entries), tuple(partners.mapped('name'))
 
-            if score <= 0:
-                label = ''
-            elif score <= t_reg:
-                label = label_reg
-            elif score <= t_med:
-                label = label_med
-            else:
-                label = label_pri
-
-            # write only if values changed (optional small optimization)
-            vals = {}
-            if p.courier_scoring != score:
-                vals['courier_scoring'] = score
-            if p.show_courier_scoring != show:
-                vals['show_courier_scoring'] = show
-            if p.courier_scoring_label != label:
-                vals['courier_scoring_label'] = label
-            if vals:
-                p.write(vals)
-        return True
\ No newline at end of file
+    @api.model
+    def _resolve_courier(self, name, company=None):
+        """
+        Resolve a principal_courier string to a transporter partner of `company` (default: env.company).
+        Exact name/alias match first, then the same substring match the former
+        `name ilike <courier>` search did, both served from the in-memory index.
+        """
+        key = _normalize_courier_name(name)
+        if not key:
+            return self.browse()
+        company = company or self.env.company
+        by_name, entries, _names = self._get_courier_index(company.id)
+        partner_id = by_name.get(key)
+        if not partner_id:
+            partner_id = next((pid for entry_key, pid in entries if key in entry_key), False)
+        return self.browse(partner_id)
+
+    @api.model
+    def _get_transporter_names(self, company=None):
+        company = company or self.env.company
+        return list(self._get_courier_index(company.id)[2])
+
+    @api.model
+    def _get_transporter_ids(self, company=None):
+        """Ids of the transporter partners of `company` (default: env.company), from the cached index."""
+        company = company or self.env.company
+        entries = self._get_courier_index(company.id)[1]
+        return list(dict.fromkeys(pid for _key, pid in entries))
+
+    @api.model
+    def _get_transporter_category_ids(self):
+        """Partner categories configured as Transporter category on any company."""
+        self.env['res.company'].flush_model(['fulfillment_transporter_category_id'])
+        self.env.cr.execute("""
+            SELECT DISTINCT fulfillment_transporter_category_id
+              FROM res_company
+             WHERE fulfillment_transporter_category_id IS NOT NULL
+        """)
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _clear_courier_index(self):
+        # registry cache invalidation is propagated to the other workers
+        self.env.registry.clear_cache()
+
+    def _transporter_categories_of(self):
+        """Transporter categories the partners of self belong to."""
+        return self._get_transporter_category_ids().intersection(self.category_id.ids)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partners = super().create(vals_list)
+        if any(vals.get('category_id') for vals in vals_list) and partners._transporter_categories_of():
+            self._clear_courier_index()
+        return partners
+
+    def write(self, vals):
+        # category changes matter when the partners enter or leave a Transporter category,
+        # name/alias/archive changes only for partners currently indexed as couriers
+        affected = set()
+        if 'category_id' in vals or (
+            self._COURIER_INDEX_FIELDS.intersection(vals) and any(self.mapped('show_courier_scoring'))
+        ):
+            affected = self._transporter_categories_of()
+        res = super().write(vals)
+        if 'category_id' in vals:
+            affected |= self._transporter_categories_of()
+        if affected:
+            self._clear_courier_index()
+        return res
+
+    def unlink(self):
+        affected = self._transporter_categories_of() if any(self.mapped('show_courier_scoring')) else set()
+        res = super().unlink()
+        if affected:
+            self._clear_courier_index()
+        return res
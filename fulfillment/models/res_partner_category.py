@@ -6,4 +6,22 @@ class ResPartnerCategory(models.Model):
     courier_scoring = fields.Integer(
         string='Courier Scoring',
         help='Numeric scoring value for courier selection/prioritization, high value is high priority',
-    )
\ No newline at end of file
+    )
+
+    def write(self, vals):
+        res = super().write(vals)
+        # membership edited from the category side (partner_ids) or the category toggled
+        if 'partner_ids' in vals or 'active' in vals:
+            Partner = self.env['res.partner']
+            if Partner._get_transporter_category_ids().intersection(self.ids):
+                Partner._clear_courier_index()
+        return res
+
+    def unlink(self):
+        # the companies using a deleted category as Transporter category lose their couriers
+        Partner = self.env['res.partner']
+        affected = Partner._get_transporter_category_ids().intersection(self.ids)
+        res = super().unlink()
+        if affected:
+            Partner._clear_courier_index()
+        return res
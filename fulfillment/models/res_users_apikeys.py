@@ -1,4 +1,14 @@
+from datetime import timezone
+import hashlib
+import time
+
 from odoo import models, fields, api
+from odoo.exceptions import AccessDenied
+from odoo.tools import ormcache
+
+# Verified API keys are reused for at most this many seconds before being checked again
+_API_KEY_CACHE_TTL = 300
+
 
 class ResUsersApikeys(models.Model):
     _inherit = 'res.users.apikeys'
@@ -47,6 +57,56 @@ class ResUsersApikeys(models.Model):
                 rec.index_prefix = False
                 rec.masked_key = False
 
+    @api.model
+    def _fulfillment_check_credentials(self, scope, key):
+        """
+        Cached wrapper around _check_credentials used by the api_key auth method.
+
+        Returns (user_id, context dict). Successful verifications are cached per worker under a
+        sha256 digest of the key (the key itself is never kept) for at most _API_KEY_CACHE_TTL
+        seconds, and never past the key expiration date (an expired key is refused even while its
+        entry is still cached). Revoking a key (remove/_remove or unlink), or changing the user
+        (active, lang, tz, groups...), clears the registry cache on every worker.
+        Raises AccessDenied for invalid keys (failures are not cached).
+        """
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        bucket = int(time.time() // _API_KEY_CACHE_TTL)
+        user_id, expires_at, context = self._fulfillment_cached_credentials(scope, digest, bucket, key)
+        if expires_at and expires_at < time.time():
+            # the entry dies with its bucket; expiration alone never touches the registry cache
+            raise AccessDenied()
+        return user_id, dict(context)
+
+    @api.model
+    @ormcache('scope', 'digest', 'bucket')
+    def _fulfillment_cached_credentials(self, scope, digest, bucket, key):
+        user_id = self._check_credentials(scope=scope, key=key)
+        if not user_id:
+            raise AccessDenied()
+        self.env.cr.execute("""
+            SELECT expiration_date FROM res_users_apikeys
+             WHERE user_id = %s AND index = %s
+             ORDER BY expiration_date DESC NULLS FIRST
+             LIMIT 1
+        """, (user_id, key[:8]))  # core stores the first 8 chars (INDEX_SIZE) of the key as index
+        row = self.env.cr.fetchone()
+        expires_at = row[0].replace(tzinfo=timezone.utc).timestamp() if row and row[0] else None
+        context = self.env['res.users'].sudo().browse(user_id).context_get()
+        return user_id, expires_at, tuple(context.items())
+
+    def _remove(self):
+        # core revocation deletes the keys with raw SQL, bypassing unlink()
+        res = super()._remove()
+        # revoked keys must stop authenticating on every worker
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        # revoked keys must stop authenticating on every worker
+        self.env.registry.clear_cache()
+        return res
+
     # # Optional: invalidate cache on create/write/unlink so list view reflects changes immediately.
     # # This is useful because the computed fields are non-stored and rely on reading DB 'index' column.
     # def create(self, vals):
@@ -14,22 +14,28 @@ class StockBackorderConfirmation(models.TransientModel):
         """
         Validate the pickings (creating backorders if needed), then for any created backorders:
         - switch their picking_type to the company OOS picking type (if configured)
-        - ensure the moves / move lines reflect qty_done equal to the expected qty (product_uom_qty)
+        - ensure the moves / move lines reflect a done quantity equal to the expected qty (product_uom_qty)
           and populate lot_id / lot_name when available (from original moves / lots)
-        - validate the backorder so it ends up in done state
+        - validate the backorders so they end up in done state
+
+        The backorders are prepared in one batched pass (see _fill_oos_backorders):
+        original moves are mapped to backorder moves in memory, lots are resolved for all
+        moves with one query and move lines are created / updated with a multi-create and
+        grouped writes. The number of queries is reported in the logs.
 
         The code is defensive:
-        - uses sudo() where necessary and avoids changing existing qty_done if already filled.
+        - uses sudo() where necessary and avoids changing existing done quantities if already filled.
         - when creating move lines or updating them, tries to populate lot_name and lot_id
           using the best available source:
-            1) move.lot_ids on the backorder move (if set by _set_lot_ids)
+            1) lots already on the backorder move lines (set by core _set_lot_ids)
             2) corresponding original move's move_line lot_id / lot_name (from the validated pickings)
-            3) first available lot on the original move
         """
         pickings_to_validate_ids = self.env.context.get('button_validate_picking_ids')
         if not pickings_to_validate_ids:
             return {'type': 'ir.actions.act_window_close'}
 
+        cr = self.env.cr
+        query_start = cr.sql_log_count
         pickings = self.env['stock.picking'].browse(pickings_to_validate_ids)
 
         # Force the validation path that creates backorders
@@ -43,6 +49,7 @@ class StockBackorderConfirmation(models.TransientModel):
         except Exception:
             _logger.exception("Error validating pickings in action_process_oos")
             raise
+        validate_queries = cr.sql_log_count - query_start
 
         # Find backorders created from these pickings (backorder_id references original)
         try:
@@ -51,147 +58,190 @@ class StockBackorderConfirmation(models.TransientModel):
             _logger.exception("Failed to search for backorders after validation")
             backorders = self.env['stock.picking']
 
-        # Build a simple lookup of original moves grouped by product and by (product, locations)
-        # to help resolve lot information for the newly created backorder moves.
-        original_moves = pickings.move_ids if pickings else self.env['stock.move']
-        orig_by_key = {}
-        for om in original_moves:
-            key1 = (om.product_id.id,)
-            key2 = (om.product_id.id, om.location_id.id, om.location_dest_id.id)
-            orig_by_key.setdefault(key1, []).append(om)
-            orig_by_key.setdefault(key2, []).append(om)
-
-        for back in backorders.sudo():
-            # 1) Switch picking type to OOS if configured
+        backorders = backorders.sudo()
+        prepare_start = cr.sql_log_count
+        self._switch_oos_picking_type(backorders)
+
+        # Backorders whose full demand would drive stock negative cannot be validated: leave
+        # their move lines untouched. Projected after the OOS type switch, which can change
+        # the source location of the backorders.
+        blocked = self.env['stock.picking'].sudo()
+        blocked_messages = []
+        if backorders and hasattr(backorders, '_get_no_negative_projection'):
+            for violation in backorders._get_no_negative_projection(demand=True):
+                blocked |= violation['pickings']
+                blocked_messages.append("%s: %s would become negative on %s (%s)" % (
+                    ", ".join(violation['pickings'].mapped('name')), violation['product'].display_name,
+                    violation['location'].complete_name, violation['quantity'],
+                ))
+            if blocked:
+                _logger.warning("OOS backorders %s not processed: %s", blocked.ids, "; ".join(blocked_messages))
+            backorders -= blocked
+
+        if backorders:
+            self._fill_oos_backorders(pickings, backorders)
+        prepare_queries = cr.sql_log_count - prepare_start
+
+        # Validate the backorders so they go to done (one by one only if the batch fails)
+        done_start = cr.sql_log_count
+        if backorders:
             try:
-                oos_pt = back.company_id and back.company_id.fulfillment_default_operation_type_oos_id
-                if oos_pt and back.picking_type_id.id != oos_pt.id:
-                    back.sudo().write({'picking_type_id': oos_pt.id})
+                with cr.savepoint():
+                    backorders.with_context(skip_backorder=True).button_validate()
             except Exception:
-                _logger.exception("Failed to set OOS picking_type for backorder %s", back.id)
-
-            # 2) Ensure qty_done on move lines equals the move expected qty, create move lines if missing
+                _logger.exception("Batch validation of %d OOS backorders failed, retrying one by one", len(backorders))
+                for back in backorders:
+                    try:
+                        with cr.savepoint():
+                            back.with_context(skip_backorder=True).button_validate()
+                    except Exception:
+                        _logger.exception("Failed to validate backorder %s after filling done quantities", back.id)
+        done_queries = cr.sql_log_count - done_start
+
+        _logger.info(
+            "action_process_oos: %d pickings, %d backorders, %d queries "
+            "(validation %d, backorder preparation %d, backorder validation %d)",
+            len(pickings), len(backorders), cr.sql_log_count - query_start,
+            validate_queries, prepare_queries, done_queries,
+        )
+        close = {'type': 'ir.actions.act_window_close'}
+        if blocked:
+            # report the backorders left open to the user
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': 'OOS backorders not processed',
+                    'message': "Negative stock is not allowed, these backorders were left open:\n%s"
+                               % "\n".join(blocked_messages),
+                    'type': 'warning',
+                    'sticky': True,
+                    'next': close,
+                },
+            }
+        return close
+
+    @api.model
+    def _get_oos_move_lots(self, moves):
+        """First lot information of each move, from its move lines, in one query:
+        {move_id: (lot_id or False, lot_name or False)}."""
+        if not moves:
+            return {}
+        self.env['stock.move.line'].flush_model(['move_id', 'lot_id', 'lot_name'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (ml.move_id) ml.move_id, ml.lot_id, COALESCE(NULLIF(ml.lot_name, ''), lot.name)
+              FROM stock_move_line ml
+              LEFT JOIN stock_lot lot ON lot.id = ml.lot_id
+             WHERE ml.move_id = ANY(%s)
+               AND (ml.lot_id IS NOT NULL OR COALESCE(ml.lot_name, '') <> '')
+             ORDER BY ml.move_id, ml.id
+        """, (moves.ids,))
+        return {move_id: (lot_id or False, lot_name or False) for move_id, lot_id, lot_name in self.env.cr.fetchall()}
+
+    @api.model
+    def _switch_oos_picking_type(self, backorders):
+        """Switch the backorders to the company OOS picking type (if configured), one write per OOS type."""
+        by_oos_type = {}
+        for back in backorders:
+            oos_pt = back.company_id and back.company_id.fulfillment_default_operation_type_oos_id
+            if oos_pt and back.picking_type_id.id != oos_pt.id:
+                by_oos_type.setdefault(oos_pt.id, []).append(back.id)
+        for oos_pt_id, back_ids in by_oos_type.items():
             try:
-                MoveLine = self.env['stock.move.line']
-                for move in back.move_ids.filtered(lambda m: m.state != 'done'):
-                    # expected qty on the move (in move's uom)
-                    expected_qty = float(move.product_uom_qty or 0.0)
-
-                    # Try to collect lot info for this move from multiple places:
-                    lot_id_for_move = False
-                    lot_name_for_move = False
-
-                    # 1) Prefer lot_ids already attached to the backorder move (set by core _set_lot_ids)
-                    if hasattr(move, 'lot_ids') and move.lot_ids:
-                        lot_id_for_move = move.lot_ids[0].id
-                        lot_name_for_move = move.lot_ids[0].name
-
-                    # 2) Fallback: try to find a corresponding original move and take its lot info
-                    if not lot_id_for_move and original_moves:
-                        # Prefer matching by product + locations key, then by product-only key
-                        candidates = orig_by_key.get((move.product_id.id, move.location_id.id, move.location_dest_id.id)) or orig_by_key.get((move.product_id.id,))
-                        if candidates:
-                            # Prefer candidate that has move_line_ids with lot info
-                            candidate = None
-                            for c in candidates:
-                                if c.move_line_ids and c.move_line_ids.filtered(lambda ml: ml.lot_id or ml.lot_name):
-                                    candidate = c
-                                    break
-                            if not candidate:
-                                candidate = candidates[0]
-                            # try to obtain lot info from candidate's move_line_ids or lot_ids
-                            if candidate:
-                                if candidate.move_line_ids:
-                                    # pick first move_line with lot info
-                                    ml_with_lot = candidate.move_line_ids.filtered(lambda ml: ml.lot_id or ml.lot_name)
-                                    if ml_with_lot:
-                                        ml0 = ml_with_lot[0]
-                                        lot_id_for_move = ml0.lot_id.id if ml0.lot_id else False
-                                        lot_name_for_move = ml0.lot_name or (ml0.lot_id.name if ml0.lot_id else False)
-                                if not lot_id_for_move and hasattr(candidate, 'lot_ids') and candidate.lot_ids:
-                                    lot_id_for_move = candidate.lot_ids[0].id
-                                    lot_name_for_move = candidate.lot_ids[0].name
-
-                    # If there are no move_lines, create a single one with qty_done = expected_qty, including lot info when found
-                    if not move.move_line_ids:
-                        ml_vals = {
-                            'picking_id': back.id,
-                            'move_id': move.id,
-                            'product_id': move.product_id.id,
-                            'product_uom_id': move.product_uom.id,
-                            'qty_done': expected_qty,
-                            'location_id': move.location_id.id,
-                            'location_dest_id': move.location_dest_id.id,
-                        }
-                        if lot_id_for_move:
-                            ml_vals['lot_id'] = lot_id_for_move
-                        if lot_name_for_move:
-                            ml_vals['lot_name'] = lot_name_for_move
-                        MoveLine.sudo().create({k: v for k, v in ml_vals.items() if v is not None and v is not False})
-                        continue
-
-                    # If move_lines exist, ensure total qty_done equals expected_qty.
-                    mls = move.move_line_ids
-                    total_done = sum([float(ml.qty_done or 0.0) for ml in mls])
-
-                    # If already equal (or greater due to rounding), ensure lot_name is present when lot_id exists
-                    if abs(total_done - expected_qty) <= 1e-6:
-                        for ml in mls:
-                            try:
-                                if getattr(ml, 'lot_id', False) and not getattr(ml, 'lot_name', False):
-                                    ml.sudo().write({'lot_name': ml.lot_id.name})
-                                # If ml has no lot_id but we discovered a lot_name_for_move, set it on first ml
-                                elif (not getattr(ml, 'lot_id', False)) and lot_name_for_move and not getattr(ml, 'lot_name', False):
-                                    ml.sudo().write({'lot_name': lot_name_for_move})
-                            except Exception:
-                                _logger.exception("Failed to populate lot_name for existing move_line %s on backorder %s", ml.id, back.id)
-                        continue
-
-                    if total_done < expected_qty:
-                        remaining = expected_qty - total_done
-                        first_ml = mls[0]
-                        new_qty = float(first_ml.qty_done or 0.0) + remaining
-                        write_vals = {'qty_done': new_qty}
-                        # Ensure first_ml has lot_name if lot_id exists or we have a fallback lot_name
-                        try:
-                            if not getattr(first_ml, 'lot_name', False):
-                                if getattr(first_ml, 'lot_id', False):
-                                    write_vals['lot_name'] = first_ml.lot_id.name
-                                elif lot_name_for_move:
-                                    write_vals['lot_name'] = lot_name_for_move
-                                elif lot_id_for_move:
-                                    # set lot_id if we discovered it (and first_ml doesn't have it)
-                                    write_vals['lot_id'] = lot_id_for_move
-                                    write_vals['lot_name'] = lot_name_for_move or False
-                        except Exception:
-                            _logger.exception("Error preparing lot_name for move_line %s on backorder %s", first_ml.id, back.id)
-                        first_ml.sudo().write(write_vals)
-                    else:
-                        # total_done > expected_qty, reduce first ml to expected and zero others (best-effort)
-                        first_ml = mls[0]
-                        write_vals = {'qty_done': expected_qty}
-                        try:
-                            if not getattr(first_ml, 'lot_name', False):
-                                if getattr(first_ml, 'lot_id', False):
-                                    write_vals['lot_name'] = first_ml.lot_id.name
-                                elif lot_name_for_move:
-                                    write_vals['lot_name'] = lot_name_for_move
-                        except Exception:
-                            _logger.exception("Error preparing lot_name for move_line %s on backorder %s", first_ml.id, back.id)
-                        first_ml.sudo().write(write_vals)
-                        if len(mls) > 1:
-                            for ml in mls[1:]:
-                                try:
-                                    ml.sudo().write({'qty_done': 0.0, 'lot_name': False})
-                                except Exception:
-                                    _logger.exception("Failed to zero move_line %s on backorder %s", ml.id, back.id)
+                with self.env.cr.savepoint():
+                    backorders.browse(back_ids).write({'picking_type_id': oos_pt_id})
             except Exception:
-                _logger.exception("Failed to prepare move lines (qty_done) for backorder %s", back.id)
-
-            # 3) Validate the backorder so it goes to done
+                _logger.exception("Failed to set OOS picking_type for backorders %s", back_ids)
+
+    @api.model
+    def _fill_oos_backorders(self, pickings, backorders):
+        """Set the done quantity (and lot) of the open backorder moves to the expected quantity,
+        with batched reads and writes."""
+        # 1) Map backorder moves to original moves in memory, by product + locations then product only
+        original_moves = pickings.sudo().move_ids
+        back_moves = backorders.move_ids.filtered(lambda m: m.state != 'done')
+        lots = self._get_oos_move_lots(original_moves | back_moves)
+        orig_by_key = {}
+        for om in original_moves:
+            orig_by_key.setdefault((om.product_id.id, om.location_id.id, om.location_dest_id.id), []).append(om.id)
+            orig_by_key.setdefault((om.product_id.id,), []).append(om.id)
+
+        MoveLine = self.env['stock.move.line'].sudo()
+        create_vals = []
+        line_writes = {}
+        for move in back_moves:
+            # expected qty on the move (in move's uom)
+            expected_qty = float(move.product_uom_qty or 0.0)
+
+            # Lot info: lots already on the backorder move, then the first original candidate with lots
+            lot_id_for_move, lot_name_for_move = lots.get(move.id, (False, False))
+            if not lot_id_for_move:
+                candidates = (orig_by_key.get((move.product_id.id, move.location_id.id, move.location_dest_id.id))
+                              or orig_by_key.get((move.product_id.id,)) or [])
+                lot_id_for_move, lot_name_for_move = next(
+                    (lots[om_id] for om_id in candidates if om_id in lots), (False, False))
+
+            # If there are no move_lines, create a single one with the expected qty, including lot info when found
+            mls = move.move_line_ids
+            if not mls:
+                ml_vals = {
+                    'picking_id': move.picking_id.id,
+                    'move_id': move.id,
+                    'product_id': move.product_id.id,
+                    'product_uom_id': move.product_uom.id,
+                    'quantity': expected_qty,
+                    'location_id': move.location_id.id,
+                    'location_dest_id': move.location_dest_id.id,
+                    'lot_id': lot_id_for_move,
+                    'lot_name': lot_name_for_move,
+                }
+                create_vals.append({k: v for k, v in ml_vals.items() if v is not None and v is not False})
+                continue
+
+            # If move_lines exist, ensure total done quantity equals expected_qty.
+            total_done = sum(float(ml.quantity or 0.0) for ml in mls)
+            first_ml = mls[0]
+            write_vals = {}
+            if abs(total_done - expected_qty) <= 1e-6:
+                # Already equal: ensure lot_name is present when lot_id exists, or use the lot found for the move
+                for ml in mls:
+                    if ml.lot_id and not ml.lot_name:
+                        line_writes.setdefault((('lot_name', ml.lot_id.name),), []).append(ml.id)
+                    elif not ml.lot_id and lot_name_for_move and not ml.lot_name:
+                        line_writes.setdefault((('lot_name', lot_name_for_move),), []).append(ml.id)
+                continue
+            if total_done < expected_qty:
+                write_vals['quantity'] = float(first_ml.quantity or 0.0) + (expected_qty - total_done)
+                if not first_ml.lot_name:
+                    if first_ml.lot_id:
+                        write_vals['lot_name'] = first_ml.lot_id.name
+                    elif lot_name_for_move:
+                        write_vals['lot_name'] = lot_name_for_move
+                    elif lot_id_for_move:
+                        # set lot_id if we discovered it (and first_ml doesn't have it)
+                        write_vals['lot_id'] = lot_id_for_move
+            else:
+                # total done > expected_qty, reduce first ml to expected and zero others (best-effort)
+                write_vals['quantity'] = expected_qty
+                if not first_ml.lot_name:
+                    if first_ml.lot_id:
+                        write_vals['lot_name'] = first_ml.lot_id.name
+                    elif lot_name_for_move:
+                        write_vals['lot_name'] = lot_name_for_move
+                if len(mls) > 1:
+                    line_writes.setdefault((('lot_name', False), ('quantity', 0.0)), []).extend(mls[1:].ids)
+            line_writes.setdefault(tuple(sorted(write_vals.items())), []).append(first_ml.id)
+
+        # 2) One multi-create for the missing move lines, grouped writes for the existing ones
+        if create_vals:
             try:
-                back.sudo().with_context(skip_backorder=True).button_validate()
+                with self.env.cr.savepoint():
+                    MoveLine.create(create_vals)
             except Exception:
-                _logger.exception("Failed to validate backorder %s after filling qty_done", back.id)
-
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+                _logger.exception("Failed to create %d move lines on OOS backorders %s", len(create_vals), backorders.ids)
+        for key, ml_ids in line_writes.items():
+            try:
+                with self.env.cr.savepoint():
+                    MoveLine.browse(ml_ids).write(dict(key))
+            except Exception:
+                _logger.exception("Failed to update move lines %s on OOS backorders", ml_ids)
@@ -13,23 +13,53 @@ class StockMoveLine(models.Model):
 
     def _action_done(self):
         res = super()._action_done()
-        for ml in self:
+        self._propagate_quant_partner_type()
+        return res
+
+    def _propagate_quant_partner_type(self):
+        """
+        Stamp the picking partner_type on the quants touched by the done lines.
+
+        Lines are reduced to one entry per (company, product, location, lot) - the last line
+        wins, as with the former per-line writes - and all quants are updated by a single
+        UPDATE ... FROM (VALUES ...). A line without lot matches every quant of the product
+        in the location; when a quant matches several entries the latest one applies.
+        A picking without partner_type stamps '' (the field default), as the ORM write did.
+        """
+        targets = {}
+        for seq, ml in enumerate(self):
             picking = ml.picking_id
             if not picking:
                 continue
             company = picking.company_id or self.env.company
-            dest_loc = ml.location_dest_id if ml.qty_done > 0 else ml.location_id
-            domain = [
-                ('company_id', '=', company.id),
-                ('product_id', '=', ml.product_id.id),
-                ('location_id', '=', dest_loc.id),
-            ]
-            if ml.lot_id:
-                domain.append(('lot_id', '=', ml.lot_id.id))
-            quants = self.env['stock.quant'].sudo().search(domain)
-            if quants:
-                quants.write({'partner_type': picking.partner_type or ''})
-        return res
+            dest_loc = ml.location_dest_id if ml.quantity > 0 else ml.location_id
+            key = (company.id, ml.product_id.id, dest_loc.id, ml.lot_id.id or None)
+            targets.pop(key, None)
+            targets[key] = (seq, picking.partner_type or '')
+        if not targets:
+            return
+        self.env['stock.quant'].flush_model(['company_id', 'product_id', 'location_id', 'lot_id', 'partner_type'])
+        values = [(seq, company_id, product_id, location_id, lot_id, partner_type)
+                  for (company_id, product_id, location_id, lot_id), (seq, partner_type) in targets.items()]
+        self.env.cr.execute("""
+            UPDATE stock_quant q
+               SET partner_type = src.partner_type
+              FROM (
+                    SELECT DISTINCT ON (q2.id) q2.id AS quant_id, v.partner_type
+                      FROM (VALUES %s) AS v(seq, company_id, product_id, location_id, lot_id, partner_type)
+                      JOIN stock_quant q2
+                        ON q2.company_id = v.company_id
+                       AND q2.product_id = v.product_id
+                       AND q2.location_id = v.location_id
+                       AND (v.lot_id IS NULL OR q2.lot_id = v.lot_id)
+                     ORDER BY q2.id, v.seq DESC
+                   ) AS src
+             WHERE q.id = src.quant_id
+               AND q.partner_type IS DISTINCT FROM src.partner_type
+        """ % ', '.join(['(%s, %s, %s, %s, %s::integer, %s::varchar)'] * len(values)),
+            [param for row in values for param in row])
+        if self.env.cr.rowcount:
+            self.env['stock.quant'].invalidate_model(['partner_type'])
 
     @api.model
     def default_get(self, fields):
@@ -52,19 +82,39 @@ class StockMoveLine(models.Model):
         - Block creating move.lines for pickings that are 'done' or 'cancel'.
         - If the picking has multiple moves, require move_id in vals (to force user selection).
         """
-        # Pre-check for each set of vals to provide early, informative errors
+        # Pre-check for each set of vals to provide early, informative errors.
+        # State and move count of every picking of the batch are loaded at once.
+        default_picking_id = self.env.context.get("default_picking_id") or self.env.context.get("active_id")
+        picking_ids = {vals.get("picking_id") or default_picking_id for vals in vals_list} - {False, None}
+        picking_info = self._get_picking_guard_info(picking_ids)
         for vals in vals_list:
-            picking_id = vals.get("picking_id") or self.env.context.get("default_picking_id") or self.env.context.get("active_id")
-            if picking_id:
-                picking = self.env["stock.picking"].browse(picking_id)
-                if picking.exists():
-                    if picking.state in ("done", "cancel"):
-                        raise ValidationError("Cannot create move lines: the picking is %s." % picking.state)
-                    # If picking has multiple moves, ensure the new line explicitly references one
-                    if len(picking.move_ids) > 1 and not vals.get("move_id"):
-                        raise ValidationError("This picking has multiple moves. Please select which Move the new line belongs to.")
+            picking_id = vals.get("picking_id") or default_picking_id
+            if picking_id in picking_info:
+                state, move_count = picking_info[picking_id]
+                if state in ("done", "cancel"):
+                    raise ValidationError("Cannot create move lines: the picking is %s." % state)
+                # If picking has multiple moves, ensure the new line explicitly references one
+                if move_count > 1 and not vals.get("move_id"):
+                    raise ValidationError("This picking has multiple moves. Please select which Move the new line belongs to.")
         return super(StockMoveLine, self).create(vals_list)
 
+    @api.model
+    def _get_picking_guard_info(self, picking_ids):
+        """{picking_id: (state, move count)} for the existing pickings among `picking_ids`, in one query."""
+        picking_ids = [pid for pid in picking_ids if isinstance(pid, int)]
+        if not picking_ids:
+            return {}
+        self.env["stock.picking"].flush_model(["state"])
+        self.env["stock.move"].flush_model(["picking_id"])
+        self.env.cr.execute("""
+            SELECT p.id, p.state, COUNT(m.id)
+              FROM stock_picking p
+              LEFT JOIN stock_move m ON m.picking_id = p.id
+             WHERE p.id = ANY(%s)
+             GROUP BY p.id, p.state
+        """, (picking_ids,))
+        return {pid: (state, move_count) for pid, state, move_count in self.env.cr.fetchall()}
+
     # def write(self, vals):
     #     """
     #     Prevent editing move.lines that belong to pickings in 'done' or 'cancel' states.
@@ -88,10 +138,10 @@ class StockMoveLine(models.Model):
         """
         Prevent deletion of move.lines that belong to pickings in 'done' or 'cancel'.
         """
-        pickings = self.mapped("picking_id")
-        for picking in pickings:
-            if picking and picking.state in ("done", "cancel"):
-                raise ValidationError("Cannot delete move lines: picking %s is %s." % (picking.name or picking.id, picking.state))
+        locked = self.picking_id.filtered(lambda p: p.state in ("done", "cancel"))
+        if locked:
+            picking = locked[0]
+            raise ValidationError("Cannot delete move lines: picking %s is %s." % (picking.name or picking.id, picking.state))
         return super(StockMoveLine, self).unlink()
 
     @api.onchange("move_id")
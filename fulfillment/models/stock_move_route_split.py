@@ -56,97 +56,143 @@ class StockMoveRouteSplit(models.Model):
             return super(StockMoveRouteSplit, moves).write({'picking_id': assign_pid})
 
         # Group moves by their move.origin (string). Use empty string for falsy values.
+        target_origin = (target_pick.origin or '').strip()
         groups = {}
         for mv in moves:
-            mv_origin = (mv.origin or '').strip()
-            groups.setdefault(mv_origin, self.env['stock.move'])
-            groups[mv_origin] = groups[mv_origin] | mv
-
-        # If only one origin group and it matches the target picking origin (or target has no origin),
-        # then assign them all to the target picking (normal behavior). Use skip flag to avoid recursion.
-        if len(groups) == 1:
-            only_origin = next(iter(groups.keys()))
-            t_origin = (target_pick.origin or '').strip()
-            if only_origin == t_origin or (not t_origin and not only_origin):
-                # All moves share the same origin as target -> normal assign
-                moves.with_context(skip_move_route_split=True).sudo().write({'picking_id': target_pick.id})
-                return res
-
-        # Otherwise, split assignments:
-        target_origin = (target_pick.origin or '').strip()
-        created_for_origin = {}
-
-        # fields to preserve (extend if you have more)
-        custom_fields = [
-            'principal_courier_id',
-            'principal_customer_name',
-            'principal_customer_address',
-            'courier_priority',
-            'partner_type',
-        ]
-
-        for origin, mv_group in groups.items():
-            # If origin matches the target picking origin, assign to target
-            if origin == target_origin or (not origin and not target_origin):
-                mv_group.with_context(skip_move_route_split=True).sudo().write({'picking_id': target_pick.id})
-                continue
-
-            # Create or reuse a picking for this origin
-            if origin in created_for_origin:
-                new_pick = created_for_origin[origin]
+            groups.setdefault((mv.origin or '').strip(), []).append(mv.id)
+
+        # Fast exit: every move already has the target origin -> normal assign in one write.
+        if set(groups) == {target_origin}:
+            moves.with_context(skip_move_route_split=True).sudo().write({'picking_id': target_pick.id})
+            return res
+
+        # Otherwise, split assignments: origin -> destination picking
+        Move = self.env['stock.move'].with_context(skip_move_route_split=True).sudo()
+        target_move_ids = groups.pop(target_origin, [])
+        split_origins = list(groups)
+        new_picks = self._create_split_pickings(target_pick, split_origins)
+
+        # One write per destination picking
+        dest_moves = {}
+        for origin, move_ids in groups.items():
+            new_pick = new_picks.get(origin)
+            if new_pick:
+                dest_moves.setdefault(new_pick, []).extend(move_ids)
             else:
-                # Try to find the original/source picking for this origin to copy fields from
+                # fallback: assign to target if creation failed
+                target_move_ids.extend(move_ids)
+        for new_pick, move_ids in dest_moves.items():
+            try:
+                with self.env.cr.savepoint():
+                    Move.browse(move_ids).write({'picking_id': new_pick.id})
+            except Exception:
+                _logger.exception("Failed to assign moves %s to new picking %s", move_ids, new_pick.id)
+                # fallback to assign to target
+                target_move_ids.extend(move_ids)
+        if target_move_ids:
+            Move.browse(target_move_ids).write({'picking_id': target_pick.id})
+
+        return res
+
+    # fields to preserve on split pickings (extend if you have more)
+    _SPLIT_CUSTOM_FIELDS = [
+        'principal_courier_id',
+        'principal_customer_name',
+        'principal_customer_address',
+        'courier_priority',
+        'partner_type',
+    ]
+
+    @api.model
+    def _resolve_split_source_pickings(self, origins):
+        """
+        Find the original/source picking of every origin at once: {origin: stock.picking}.
+        Same precedence as the former per-origin searches (exact name, then exact origin, then
+        a conservative ilike on origin/name), with one indexed query for the exact matches and
+        a bounded ilike search per origin still unresolved.
+        """
+        Picking = self.env['stock.picking']
+        origins = [origin for origin in origins if origin]
+        if not origins:
+            return {}
+        by_name = {}
+        by_origin = {}
+        for pick in Picking.search(['|', ('name', 'in', origins), ('origin', 'in', origins)]):
+            by_name.setdefault(pick.name, pick)
+            if pick.origin:
+                by_origin.setdefault(pick.origin, pick)
+        sources = {}
+        for origin in origins:
+            source_pick = by_name.get(origin) or by_origin.get(origin)
+            if source_pick:
+                sources[origin] = source_pick
+
+        # 3) fallback ilike search (conservative), kept per origin with limit=1 so short
+        #    tokens never load a large share of the pickings; only the rare origins that
+        #    matched nothing exactly get here
+        for origin in origins:
+            if origin in sources:
+                continue
+            try:
+                source_pick = Picking.search(['|', ('origin', 'ilike', origin), ('name', 'ilike', origin)], limit=1)
+            except Exception:
                 source_pick = None
-                if origin:
-                    # 1) exact name match
-                    source_pick = self.env['stock.picking'].search([('name', '=', origin)], limit=1)
-                    # 2) origin field match
-                    if not source_pick:
-                        source_pick = self.env['stock.picking'].search([('origin', '=', origin)], limit=1)
-                    # 3) fallback ilike search (conservative)
-                    if not source_pick:
-                        try:
-                            source_pick = self.env['stock.picking'].search(['|', ('origin', 'ilike', origin), ('name', 'ilike', origin)], limit=1)
-                        except Exception:
-                            source_pick = None
-
-                # Build pick values: prefer source_pick when available, otherwise fallback to target_pick
-                src = source_pick or target_pick
-                pick_vals = {
-                    'partner_id': src.partner_id.id or False,
-                    'picking_type_id': target_pick.picking_type_id.id or False,
-                    'location_id': target_pick.location_id.id or False,
-                    'location_dest_id': target_pick.location_dest_id.id or False,
-                    'origin': origin or False,
-                    'scheduled_date': target_pick.scheduled_date,
-                    'company_id': target_pick.company_id.id or False,
-                }
-                # preserve custom fields from src if present and not falsy
-                for cf in custom_fields:
-                    try:
-                        cf_val = getattr(src, cf)
-                    except Exception:
-                        cf_val = False
-                    if cf_val:
-                        pick_vals[cf] = cf_val.id if hasattr(cf_val, 'id') else cf_val
-
+            if source_pick:
+                sources[origin] = source_pick
+        return sources
+
+    @api.model
+    def _prepare_split_picking_vals(self, target_pick, origin, source_pick):
+        # Build pick values: prefer source_pick when available, otherwise fallback to target_pick
+        src = source_pick or target_pick
+        pick_vals = {
+            'partner_id': src.partner_id.id or False,
+            'picking_type_id': target_pick.picking_type_id.id or False,
+            'location_id': target_pick.location_id.id or False,
+            'location_dest_id': target_pick.location_dest_id.id or False,
+            'origin': origin or False,
+            'scheduled_date': target_pick.scheduled_date,
+            'company_id': target_pick.company_id.id or False,
+        }
+        # preserve custom fields from src if present and not falsy
+        for cf in self._SPLIT_CUSTOM_FIELDS:
+            try:
+                cf_val = src[cf]
+            except Exception:
+                cf_val = False
+            if cf_val:
+                pick_vals[cf] = cf_val.id if hasattr(cf_val, 'id') else cf_val
+        return {k: v for k, v in pick_vals.items() if v is not None}
+
+    @api.model
+    def _create_split_pickings(self, target_pick, origins):
+        """
+        Create one split picking per origin in a single multi-create: {origin: stock.picking}.
+        Falls back to per-origin creation when the batch fails; origins whose picking could not
+        be created are left out (their moves stay on the target).
+        """
+        if not origins:
+            return {}
+        sources = self._resolve_split_source_pickings(origins)
+        vals_list = [self._prepare_split_picking_vals(target_pick, origin, sources.get(origin)) for origin in origins]
+        # Create with sudo and no special context so create() logic runs normally.
+        Picking = self.env['stock.picking'].sudo()
+        try:
+            with self.env.cr.savepoint():
+                new_picks = Picking.create(vals_list)
+            created = dict(zip(origins, new_picks))
+        except Exception:
+            _logger.exception("Batch creation of %d split pickings failed (target %s), retrying one by one",
+                              len(origins), target_pick.id)
+            created = {}
+            for origin, pick_vals in zip(origins, vals_list):
                 try:
-                    # Create with sudo and no special context so create() logic runs normally.
-                    new_pick = self.env['stock.picking'].sudo().create({k: v for k, v in pick_vals.items() if v is not None})
-                    created_for_origin[origin] = new_pick
-                    _logger.debug("Created split picking %s for origin %r (from source %s)", new_pick.name, origin, (src and src.name) or False)
+                    with self.env.cr.savepoint():
+                        created[origin] = Picking.create(pick_vals)
                 except Exception:
                     _logger.exception("Failed to create split picking for origin %r (target %s)", origin, target_pick.id)
-                    # fallback: assign to target if creation failed
-                    mv_group.with_context(skip_move_route_split=True).sudo().write({'picking_id': target_pick.id})
-                    continue
-
-            # Assign the group moves to the new picking (use skip flag to avoid recursion)
-            try:
-                mv_group.with_context(skip_move_route_split=True).sudo().write({'picking_id': new_pick.id})
-            except Exception:
-                _logger.exception("Failed to assign moves %s to new picking %s", mv_group.ids, new_pick.id)
-                # fallback to assign to target
-                mv_group.with_context(skip_move_route_split=True).sudo().write({'picking_id': target_pick.id})
-
-        return res
\ No newline at end of file
+        for origin, new_pick in created.items():
+            src = sources.get(origin)
+            _logger.debug("Created split picking %s for origin %r (from source %s)",
+                          new_pick.name, origin, (src and src.name) or False)
+        return created
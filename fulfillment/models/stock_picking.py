@@ -25,31 +25,28 @@ class StockPicking(models.Model):
         help='Related from principal_courier_id.courier_scoring_label'
     )
 
-    # Helper field: precomputed allowed transporter partners (ids).
+    # Helper field: allowed transporter partners (ids) for the principal_courier_id domain.
+    # Not stored: served from the per-company transporter set cached in the courier index,
+    # so pickings no longer carry one relation row per transporter.
     transporter_partner_ids = fields.Many2many(
         comodel_name='res.partner',
         string='Transporter Partners (computed)',
         compute='_compute_transporter_partner_ids',
-        store=True,
-        help='Precomputed partners that belong to the company-configured Transporter category. '
+        help='Partners that belong to the company-configured Transporter category. '
              'This field is used by the form domain for principal_courier_id.'
     )
 
-    @api.depends('company_id', 'company_id.fulfillment_transporter_category_id', 'principal_courier_id')
+    @api.depends('company_id')
+    @api.depends_context('company')
     def _compute_transporter_partner_ids(self):
         """
-        Compute transporter_partner_ids as partners that have the company-configured transporter category.
-        Stored so the client can use transporter_partner_ids in domains (no python-expression evaluation).
+        Compute transporter_partner_ids from the cached transporter set of the picking company,
+        so the client can use transporter_partner_ids in domains (no python-expression evaluation).
         """
-        Partner = self.env['res.partner'].sudo()
+        Partner = self.env['res.partner']
         for pick in self:
             comp = pick.company_id or self.env.company
-            transporter_cat = comp.fulfillment_transporter_category_id
-            if transporter_cat and transporter_cat.id:
-                partners = Partner.search([('category_id', 'in', [transporter_cat.id])])
-                pick.transporter_partner_ids = partners.ids
-            else:
-                pick.transporter_partner_ids = [(5, 0, 0)]  # clear
+            pick.transporter_partner_ids = Partner._get_transporter_ids(comp)
 
     @api.constrains('principal_courier_id')
     def _check_principal_courier_category(self):
@@ -106,6 +103,29 @@ class StockPicking(models.Model):
             res.setdefault('partner_type', ctx.get('default_partner_type'))
         return res
 
+    # Fields feeding the picking type dashboard counters (see stock_picking_type_counter)
+    _COUNTER_FIELDS = {'picking_type_id', 'state', 'principal_courier_id', 'backorder_id'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        pickings = super().create(vals_list)
+        self.env['stock_picking_type_counter']._schedule_push()
+        return pickings
+
+    def write(self, vals):
+        if self._COUNTER_FIELDS.intersection(vals):
+            self.env['stock_picking_type_counter']._schedule_push()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['stock_picking_type_counter']._schedule_push()
+        return super().unlink()
+
+    def _compute_state(self):
+        # state is a stored compute driven by the moves: push the counter deltas it causes
+        super()._compute_state()
+        self.env['stock_picking_type_counter']._schedule_push()
+
     def copy(self, default=None):
         """
         Ensure copies of pickings (e.g. backorders / manual duplication) preserve the
@@ -12,14 +12,20 @@ Behaviour:
   1) exact name match on the origin value
   2) origin match (some pickings store the originating document in .origin)
   3) "Backorder of <PICKING_NAME>" pattern that Odoo sometimes uses
-  4) fallback to searching for a picking whose origin equals the origin value
+  4) fallback to searching for a picking whose origin or name contains the origin value
+- Sources are resolved for the whole create batch at once (one exact-match query, a
+  limit=1 fallback search per origin left unresolved) and the copied fields are written in
+  groups of records sharing the same values.
 """
 from odoo import api, models
+from odoo.tools import SQL
 import logging
 import re
 
 _logger = logging.getLogger(__name__)
 
+_BACKORDER_RE = re.compile(r'Backorder of\s+(.+)')
+
 
 class StockPickingRouteCopy(models.Model):
     _inherit = 'stock.picking'
@@ -49,9 +55,12 @@ class StockPickingRouteCopy(models.Model):
             'partner_type',
         ]
 
-        # Process each created record. We try to match the created record against a source
-        # picking using heuristics. If found, copy missing fields.
+        # Candidate lookups per created record, in heuristic order. Only records that leave
+        # at least one of the fields to copy out of their create vals need a source.
+        candidates = []
         for rec, vals in zip(records, vals_list):
+            if all(f in vals for f in fields_to_copy):
+                continue
             # If create explicitly supplied the field, skip copying for that field
             # Use the vals provided to create() as the canonical "explicitly set" indicator.
             raw_origin = vals.get('origin') or (rec.origin or '') or vals.get('name') or rec.name
@@ -66,31 +75,26 @@ class StockPickingRouteCopy(models.Model):
             if not origin:
                 continue
 
-            # Try several heuristics to find the source picking
-            src = None
-
+            lookups = []
             # 1) If origin looks like "Backorder of <NAME>", extract NAME
-            m = re.search(r'Backorder of\s+(.+)', origin)
+            m = _BACKORDER_RE.search(origin)
             if m:
-                origin_name = m.group(1).strip()
-                src = self.env['stock.picking'].search([('name', '=', origin_name)], limit=1)
-
+                lookups.append(('name', m.group(1).strip()))
             # 2) Exact name match on the origin value
-            if not src:
-                src = self.env['stock.picking'].search([('name', '=', origin)], limit=1)
-
+            lookups.append(('name', origin))
             # 3) origin match: find picking whose origin equals this origin value
-            if not src:
-                src = self.env['stock.picking'].search([('origin', '=', origin)], limit=1)
+            lookups.append(('origin', origin))
+            candidates.append((rec, vals, origin, lookups))
 
-            # 4) As a last resort, try to find recent picking which has origin/name containing the origin token
-            if not src:
-                # be conservative: search picking with origin or name containing the origin string (case-sensitive)
-                try:
-                    src = self.env['stock.picking'].search(['|', ('origin', 'ilike', origin), ('name', 'ilike', origin)], limit=1)
-                except Exception:
-                    src = None
+        if not candidates:
+            return records
 
+        sources = self._find_route_copy_sources(candidates)
+
+        # Group the records by the values to write so each distinct set is written once
+        to_write = {}
+        for rec, vals, _origin, _lookups in candidates:
+            src = sources.get(rec.id)
             # If we couldn't find a plausible source, skip
             if not src or src.id == rec.id:
                 continue
@@ -103,7 +107,7 @@ class StockPickingRouteCopy(models.Model):
                     continue
                 # get value from source
                 try:
-                    src_val = getattr(src, f)
+                    src_val = src[f]
                 except Exception:
                     src_val = False
                 if not src_val:
@@ -115,11 +119,71 @@ class StockPickingRouteCopy(models.Model):
                     write_vals[f] = src_val
 
             if write_vals:
+                to_write.setdefault(tuple(sorted(write_vals.items())), []).append(rec.id)
+
+        for key, rec_ids in to_write.items():
+            write_vals = dict(key)
+            try:
+                # Use sudo() to avoid ACL issues when automated creation runs under system processes
+                with self.env.cr.savepoint():
+                    self.browse(rec_ids).sudo().write(write_vals)
+                _logger.debug("Propagated custom fields %s to pickings %s", list(write_vals), rec_ids)
+            except Exception:
+                _logger.exception("Failed to propagate custom fulfillment fields to pickings %s", rec_ids)
+
+        return records
+
+    @api.model
+    def _first_by_key_sql(self, fname, values):
+        """
+        SQL selecting (fname, value, picking id) for the first picking, in picking order, whose
+        `fname` is each of `values`: one row per value (DISTINCT ON), access rules applied.
+        """
+        query = self._search([(fname, 'in', list(values))])
+        key = SQL.identifier(self._table, fname)
+        return SQL(
+            "(SELECT DISTINCT ON (%s) %s, %s, %s FROM %s WHERE %s ORDER BY %s, %s)",
+            key, fname, key, SQL.identifier(self._table, 'id'),
+            query.from_clause, query.where_clause, key, self._order_to_sql(self._order, query),
+        )
+
+    @api.model
+    def _find_route_copy_sources(self, candidates):
+        """
+        Resolve the source picking of every candidate record at once: {record id: stock.picking}.
+        All exact name/origin lookups are served by one query returning one row per name and
+        origin (first match in picking order, like the former limit=1 searches); the bounded
+        ilike fallback only runs for the records that found nothing, once per distinct origin.
+        """
+        Picking = self.env['stock.picking']
+        names = {value for _rec, _vals, _origin, lookups in candidates for kind, value in lookups if kind == 'name'}
+        origins = {value for _rec, _vals, _origin, lookups in candidates for kind, value in lookups if kind == 'origin'}
+        firsts = [Picking._first_by_key_sql(kind, values) for kind, values in (('name', names), ('origin', origins)) if values]
+        found_ids = {}
+        if firsts:
+            self.env.cr.execute(SQL(' UNION ALL ').join(firsts))
+            found_ids = {(kind, value): pick_id for kind, value, pick_id in self.env.cr.fetchall()}
+        picks = {pick.id: pick for pick in Picking.browse(list(set(found_ids.values())))}
+        found = {lookup: picks[pick_id] for lookup, pick_id in found_ids.items()}
+
+        sources = {}
+        unresolved = []
+        for rec, _vals, origin, lookups in candidates:
+            src = next((found[lookup] for lookup in lookups if lookup in found), None)
+            if src:
+                sources[rec.id] = src
+            else:
+                unresolved.append((rec, origin))
+
+        # 4) As a last resort, find a picking which has origin/name containing the origin token,
+        #    one bounded search (limit=1) per distinct token still unresolved
+        fallback = {}
+        for rec, origin in unresolved:
+            if origin not in fallback:
                 try:
-                    # Use sudo() to avoid ACL issues when automated creation runs under system processes
-                    rec.sudo().write(write_vals)
-                    _logger.debug("Propagated custom fields %s from picking %s -> %s", list(write_vals.keys()), src.id, rec.id)
+                    fallback[origin] = Picking.search(['|', ('origin', 'ilike', origin), ('name', 'ilike', origin)], limit=1)
                 except Exception:
-                    _logger.exception("Failed to propagate custom fulfillment fields from picking %s to %s", src.id, rec.id)
-
-        return records
\ No newline at end of file
+                    fallback[origin] = None
+            if fallback[origin]:
+                sources[rec.id] = fallback[origin]
+        return sources
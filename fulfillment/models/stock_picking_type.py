@@ -71,116 +71,44 @@ class StockPickingType(models.Model):
 
     @api.depends()
     def _compute_priority_counts(self):
-        """Robust compute of per-state × per-priority counts.
+        """Compute per-state × per-priority counts.
 
-        - We fetch all pickings for the current picking types and iterate them.
-        - courier_priority missing/False is treated as 'reguler'.
-        - state values are mapped to the UI buckets.
+        - Bucket counts come from the incrementally maintained stock_picking_type_counter table.
+        - courier_priority missing/False/unknown is treated as 'reguler'.
+        - Late counts (time based, so not incremental) come from one grouped query.
         - This compute MUST assign values for every computed field on every record in self
           to avoid the ValueError: 'Compute method failed to assign ...'.
         """
-        Picking = self.env['stock.picking']
-
-        # initialize zero values for all records (MUST set every computed field here)
+        counts_by_type = self.env['stock_picking_type_counter'].sudo()._get_counts(self.ids) if self.ids else {}
+        late_counts = self._get_late_counts() if self.ids else {}
         for rec in self:
+            counts = counts_by_type.get(rec.id, {})
             # per-state × per-priority counters
             for state in ('draft', 'to_process', 'waiting', 'ready', 'backorder', 'done'):
                 for pr in ('reguler', 'medium', 'instan'):
-                    setattr(rec, f'count_{state}_{pr}', 0)
+                    setattr(rec, f'count_{state}_{pr}', counts.get(f'{state}_{pr}', 0))
             # aggregate counters
-            rec.count_picking_ready = 0
-            rec.count_picking_waiting = 0
-            rec.count_picking_late = 0
-            rec.count_picking_backorders = 0
-
-        if not self:
-            return
-
-        # normalization from courier_priority text -> pkey
-        def normalize_priority_text(text):
-            if not text:
-                return None
-            t = str(text).strip().lower()
-            if 'regul' in t or 'regular' in t:
-                return 'reguler'
-            if 'med' in t:
-                return 'medium'
-            if 'inst' in t or 'instant' in t:
-                return 'instan'
-            if t in ('reguler', 'regular'):
-                return 'reguler'
-            if t == 'medium':
-                return 'medium'
-            if t in ('instan', 'instant'):
-                return 'instan'
-            return None
-
-        # map stock.picking.state -> our suffix keys
-        state_map = {
-            'draft': 'draft',
-            'confirmed': 'to_process',  # confirmed = To Process
-            'waiting': 'waiting',
-            'assigned': 'ready',        # assigned = Ready
-            'done': 'done',
-        }
-
-        # fetch pickings for these picking_type_ids in one query
-        pickings = Picking.search([('picking_type_id', 'in', self.ids)])
-        if not pickings:
-            # we've already set zeros for all recs above, so safe to return
-            return
-
-        # map rec by id for quick lookup
-        rec_by_id = {rec.id: rec for rec in self}
-
-        # iterate pickings and increment counters
-        for p in pickings:
-            ptype = p.picking_type_id and p.picking_type_id.id
-            if not ptype or ptype not in rec_by_id:
-                continue
-            rec = rec_by_id[ptype]
-
-            # normalize priority: treat missing/False/unknown as 'reguler'
-            pkey = normalize_priority_text(p.courier_priority) or 'reguler'
-
-            # map state, ignore unknown states
-            mapped = state_map.get(p.state)
-            if mapped:
-                field = f'count_{mapped}_{pkey}'
-                # read current, increment by 1
-                cur = getattr(rec, field, 0) or 0
-                setattr(rec, field, cur + 1)
-
-            # backorder handling: count separately if backorder_id present on the picking
-            if hasattr(p, 'backorder_id') and p.backorder_id:
-                bfield = f'count_backorder_{pkey}'
-                curb = getattr(rec, bfield, 0) or 0
-                setattr(rec, bfield, curb + 1)
-
-        # Compute "late" counts efficiently via _read_group: scheduled_date < now and not done/cancel
-        try:
-            now_dt = fields.Datetime.now()
-            late_grouped = Picking._read_group(
-                [('picking_type_id', 'in', self.ids),
-                 ('scheduled_date', '<', now_dt),
-                 ('state', 'not in', ['done', 'cancel'])],
-                groupby=['picking_type_id'],
-                aggregates=['id:count'],
-            )
-            # late_grouped yields: (picking_type_record, id_count)
-            late_counts = {ptype.id: id_count for ptype, id_count in late_grouped}
-        except Exception:
-            _logger.exception("Failed to compute late picking counts via _read_group")
-            late_counts = {}
-
-        # Final pass: ensure aggregate counters are consistent for all recs
-        for rec in self:
-            rec.count_picking_ready = (rec.count_ready_reguler or 0) + (rec.count_ready_medium or 0) + (rec.count_ready_instan or 0)
-            rec.count_picking_waiting = (rec.count_waiting_reguler or 0) + (rec.count_waiting_medium or 0) + (rec.count_waiting_instan or 0)
-            # sum backorder counters across priorities
-            rec.count_picking_backorders = (rec.count_backorder_reguler or 0) + (rec.count_backorder_medium or 0) + (rec.count_backorder_instan or 0)
+            rec.count_picking_ready = sum(counts.get(f'ready_{pr}', 0) for pr in ('reguler', 'medium', 'instan'))
+            rec.count_picking_waiting = sum(counts.get(f'waiting_{pr}', 0) for pr in ('reguler', 'medium', 'instan'))
+            rec.count_picking_backorders = sum(counts.get(f'backorder_{pr}', 0) for pr in ('reguler', 'medium', 'instan'))
             rec.count_picking_late = late_counts.get(rec.id, 0)
 
+    def _get_late_counts(self):
+        """Late pickings (scheduled_date in the past, not done/cancel) per picking type of self
+        and the current companies, one grouped query (the other counters come from
+        stock_picking_type_counter)."""
+        self.env['stock.picking'].flush_model(['picking_type_id', 'state', 'scheduled_date', 'company_id'])
+        self.env.cr.execute("""
+            SELECT picking_type_id, COUNT(*)
+              FROM stock_picking
+             WHERE picking_type_id = ANY(%(type_ids)s)
+               AND scheduled_date < %(now)s
+               AND state NOT IN ('done', 'cancel')
+               AND (company_id IS NULL OR company_id = ANY(%(company_ids)s))
+             GROUP BY picking_type_id
+        """, {'type_ids': self.ids, 'now': fields.Datetime.now(), 'company_ids': self.env.companies.ids})
+        return dict(self.env.cr.fetchall())
+
     def action_open_pickings(self):
         """Return an action opening stock.picking filtered by picking type, state and priority.
 
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Incrementally maintained counters behind the picking-type priority dashboard.
+
+A PostgreSQL trigger on stock_picking appends one +1/-1 delta row per
+(picking type, state bucket, priority bucket) whenever a picking is created, deleted or
+changes picking type, state, courier_priority or backorder_id (stored computes included,
+since the trigger sees every UPDATE). Appending instead of updating a single row per
+bucket keeps concurrent transactions from serializing on hot counter rows; the
+"Compact Picking Counters" cron folds the deltas back to one row per bucket.
+
+At commit, the deltas written by the transaction (rows tagged with its txid) are pushed on
+the bus so open Inventory overview kanbans update live.
+"""
+from odoo import api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# SQL expressions mapping stock_picking columns to the dashboard buckets
+# (courier_priority missing/unknown counts as 'reguler', like action_open_pickings)
+_STATE_BUCKET_SQL = """
+    CASE {state} WHEN 'draft' THEN 'draft'
+                 WHEN 'confirmed' THEN 'to_process'
+                 WHEN 'waiting' THEN 'waiting'
+                 WHEN 'assigned' THEN 'ready'
+                 WHEN 'done' THEN 'done'
+    END"""
+_PRIORITY_BUCKET_SQL = """
+    CASE WHEN lower({priority}) LIKE '%regul%' THEN 'reguler'
+         WHEN lower({priority}) LIKE '%med%' THEN 'medium'
+         WHEN lower({priority}) LIKE '%inst%' THEN 'instan'
+         ELSE 'reguler'
+    END"""
+
+# aggregate kanban counters fed by a state bucket
+_TOTAL_FIELDS = {
+    'ready': 'count_picking_ready',
+    'waiting': 'count_picking_waiting',
+    'backorder': 'count_picking_backorders',
+}
+
+
+class _BigInteger(fields.Integer):
+    """Integer field stored as a PostgreSQL bigint (txid_current() does not fit an int4)."""
+    column_type = ('int8', 'int8')
+
+
+class StockPickingTypeCounter(models.Model):
+    _name = 'stock_picking_type_counter'
+    _description = 'stock_picking_type_counter'
+    _log_access = False
+
+    picking_type_id = fields.Many2one(
+        comodel_name='stock.picking.type',
+        string="Operation Type",
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    state = fields.Char(string="State Bucket", required=True)
+    priority = fields.Char(string="Priority Bucket", required=True)
+    count = fields.Integer(string="Count")
+    # txid of the writing transaction, used to push that transaction's deltas at commit
+    # (filled by the column default set in init(), NULL on compacted rows)
+    tx = _BigInteger(string="Transaction", readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute("ALTER TABLE stock_picking_type_counter ALTER COLUMN tx SET DEFAULT txid_current()")
+        cr.execute("CREATE INDEX IF NOT EXISTS stock_picking_type_counter_tx_idx ON stock_picking_type_counter (tx)")
+        state_bucket = _STATE_BUCKET_SQL.format(state='pstate')
+        priority_bucket = _PRIORITY_BUCKET_SQL.format(priority='prio')
+        cr.execute(f"""
+            CREATE OR REPLACE FUNCTION fulfillment_picking_counter_apply(
+                ptype integer, pstate varchar, prio varchar, is_backorder boolean, delta integer
+            ) RETURNS void AS $$
+            DECLARE
+                bucket varchar := {state_bucket};
+                pkey varchar := {priority_bucket};
+            BEGIN
+                IF ptype IS NULL THEN
+                    RETURN;
+                END IF;
+                IF bucket IS NOT NULL THEN
+                    INSERT INTO stock_picking_type_counter (picking_type_id, state, priority, count)
+                    VALUES (ptype, bucket, pkey, delta);
+                END IF;
+                IF is_backorder THEN
+                    INSERT INTO stock_picking_type_counter (picking_type_id, state, priority, count)
+                    VALUES (ptype, 'backorder', pkey, delta);
+                END IF;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cr.execute("""
+            CREATE OR REPLACE FUNCTION fulfillment_picking_counter_trigger() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM fulfillment_picking_counter_apply(
+                        OLD.picking_type_id, OLD.state, OLD.courier_priority, OLD.backorder_id IS NOT NULL, -1);
+                END IF;
+                IF TG_OP IN ('UPDATE', 'INSERT') THEN
+                    PERFORM fulfillment_picking_counter_apply(
+                        NEW.picking_type_id, NEW.state, NEW.courier_priority, NEW.backorder_id IS NOT NULL, 1);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cr.execute("""
+            DROP TRIGGER IF EXISTS fulfillment_picking_counter_ins_del ON stock_picking;
+            CREATE TRIGGER fulfillment_picking_counter_ins_del
+                AFTER INSERT OR DELETE ON stock_picking
+                FOR EACH ROW EXECUTE FUNCTION fulfillment_picking_counter_trigger();
+            DROP TRIGGER IF EXISTS fulfillment_picking_counter_upd ON stock_picking;
+            CREATE TRIGGER fulfillment_picking_counter_upd
+                AFTER UPDATE OF picking_type_id, state, courier_priority, backorder_id ON stock_picking
+                FOR EACH ROW
+                WHEN (OLD.picking_type_id IS DISTINCT FROM NEW.picking_type_id
+                      OR OLD.state IS DISTINCT FROM NEW.state
+                      OR OLD.courier_priority IS DISTINCT FROM NEW.courier_priority
+                      OR (OLD.backorder_id IS NULL) <> (NEW.backorder_id IS NULL))
+                EXECUTE FUNCTION fulfillment_picking_counter_trigger();
+        """)
+        cr.execute("SELECT 1 FROM stock_picking_type_counter LIMIT 1")
+        if not cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Recount every bucket from stock_picking (first install, or manual repair)."""
+        cr = self.env.cr
+        self.env['stock.picking'].flush_model(['picking_type_id', 'state', 'courier_priority', 'backorder_id'])
+        cr.execute("LOCK TABLE stock_picking_type_counter IN EXCLUSIVE MODE")
+        cr.execute("DELETE FROM stock_picking_type_counter")
+        state_bucket = _STATE_BUCKET_SQL.format(state='state')
+        priority_bucket = _PRIORITY_BUCKET_SQL.format(priority='courier_priority')
+        cr.execute(f"""
+            INSERT INTO stock_picking_type_counter (picking_type_id, state, priority, count, tx)
+            SELECT picking_type_id, bucket, pkey, COUNT(*), NULL
+              FROM (SELECT picking_type_id, {state_bucket} AS bucket, {priority_bucket} AS pkey
+                      FROM stock_picking
+                     WHERE picking_type_id IS NOT NULL
+                    UNION ALL
+                    SELECT picking_type_id, 'backorder', {priority_bucket}
+                      FROM stock_picking
+                     WHERE picking_type_id IS NOT NULL AND backorder_id IS NOT NULL) AS buckets
+             WHERE bucket IS NOT NULL
+             GROUP BY picking_type_id, bucket, pkey
+        """)
+        self.env.invalidate_all()
+        _logger.info("Rebuilt picking type counters (%d buckets)", cr.rowcount)
+
+    @api.model
+    def _compact(self):
+        """Cron: fold the delta rows into one row per (picking type, state, priority)."""
+        cr = self.env.cr
+        cr.execute("""
+            WITH folded AS (
+                DELETE FROM stock_picking_type_counter
+                 WHERE tx IS DISTINCT FROM txid_current()
+             RETURNING picking_type_id, state, priority, count
+            )
+            INSERT INTO stock_picking_type_counter (picking_type_id, state, priority, count, tx)
+            SELECT picking_type_id, state, priority, SUM(count), NULL
+              FROM folded
+             GROUP BY picking_type_id, state, priority
+            HAVING SUM(count) <> 0
+        """)
+        self.env.invalidate_all()
+        return True
+
+    @api.model
+    def _get_counts(self, picking_type_ids):
+        """{picking_type_id: {'<state>_<priority>': n}} summed over the delta rows."""
+        self.env['stock.picking'].flush_model(['picking_type_id', 'state', 'courier_priority', 'backorder_id'])
+        self.env.cr.execute("""
+            SELECT picking_type_id, state, priority, SUM(count)
+              FROM stock_picking_type_counter
+             WHERE picking_type_id = ANY(%s)
+             GROUP BY picking_type_id, state, priority
+        """, (list(picking_type_ids),))
+        counts = {}
+        for ptype_id, state, priority, total in self.env.cr.fetchall():
+            counts.setdefault(ptype_id, {})[f'{state}_{priority}'] = int(total)
+        return counts
+
+    @api.model
+    def _schedule_push(self):
+        """Push this transaction's counter deltas on the bus at commit (registered once per transaction)."""
+        data = self.env.cr.precommit.data
+        if data.get('fulfillment.picking_counter_push'):
+            return
+        data['fulfillment.picking_counter_push'] = True
+        self.env.cr.precommit.add(self._push_deltas)
+
+    @api.model
+    def _push_deltas(self):
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT picking_type_id, state, priority, SUM(count)
+              FROM stock_picking_type_counter
+             WHERE tx = txid_current()
+             GROUP BY picking_type_id, state, priority
+            HAVING SUM(count) <> 0
+        """)
+        deltas = {}
+        for ptype_id, state, priority, delta in self.env.cr.fetchall():
+            type_deltas = deltas.setdefault(ptype_id, {})
+            fname = f'count_{state}_{priority}'
+            type_deltas[fname] = type_deltas.get(fname, 0) + int(delta)
+            total_field = _TOTAL_FIELDS.get(state)
+            if total_field:
+                type_deltas[total_field] = type_deltas.get(total_field, 0) + int(delta)
+        if not deltas:
+            return
+        group = self.env.ref('stock.group_stock_user', raise_if_not_found=False)
+        if not group:
+            return
+        try:
+            self.env['bus.bus']._sendone(group, 'fulfillment_picking_counters', {'deltas': deltas})
+        except Exception:
+            _logger.exception("Failed to push picking counter deltas on the bus")
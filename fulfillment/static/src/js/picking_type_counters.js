@@ -0,0 +1,36 @@
+/** @odoo-module **/
+// Live update of the Inventory overview counters (stock.picking.type kanban).
+// The server pushes the counter deltas of every committed transaction on the bus
+// (stock_picking_type_counter._push_deltas); when they touch a loaded operation type
+// the kanban reloads (debounced, so a burst of transactions costs a single reload).
+import { KanbanController } from "@web/views/kanban/kanban_controller";
+import { patch } from "@web/core/utils/patch";
+import { useService } from "@web/core/utils/hooks";
+import { useDebounced } from "@web/core/utils/timing";
+import { onWillDestroy } from "@odoo/owl";
+
+const NOTIFICATION_TYPE = "fulfillment_picking_counters";
+const RELOAD_DELAY = 1000;
+
+patch(KanbanController.prototype, {
+    setup() {
+        super.setup(...arguments);
+        if (this.props.resModel !== "stock.picking.type") {
+            return;
+        }
+        const busService = useService("bus_service");
+        this.reloadPickingCounters = useDebounced(() => this.model.root.load(), RELOAD_DELAY);
+        const onCounters = (payload) => this.onPickingCounterDeltas(payload);
+        busService.subscribe(NOTIFICATION_TYPE, onCounters);
+        onWillDestroy(() => busService.unsubscribe(NOTIFICATION_TYPE, onCounters));
+    },
+
+    onPickingCounterDeltas(payload) {
+        const deltas = (payload && payload.deltas) || {};
+        const root = this.model.root;
+        const records = root.isGrouped ? root.groups.flatMap((group) => group.records) : root.records;
+        if (records.some((record) => record.resId in deltas)) {
+            this.reloadPickingCounters();
+        }
+    },
+});
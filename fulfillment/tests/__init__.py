@@ -0,0 +1,4 @@
+from . import test_stock_picking_route_copy
+from . import test_res_users_apikeys
+from . import test_stock_picking_type_counter
+from . import test_incoming_staging_api
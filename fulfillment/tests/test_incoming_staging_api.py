@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import json
+from unittest.mock import patch
+
+from odoo.exceptions import ValidationError
+from odoo.tests.common import HttpCase, new_test_user, tagged
+
+_SCOPE = 'odoo.plugin.outlook'
+
+
+@tagged('post_install', '-at_install')
+class TestIncomingStagingAPI(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.principal = cls.env['res.partner'].create({'name': 'Fulfillment API Principal', 'is_company': True})
+        cls.user = new_test_user(cls.env, login='fulfillment_api_principal', groups='base.group_user')
+        cls.user.partner_id.parent_id = cls.principal
+        cls.lot_sequence = cls.env['ir.sequence'].create({
+            'name': 'Fulfillment API test lots',
+            'prefix': 'APILOT/',
+            'padding': 5,
+            'implementation': 'standard',
+        })
+        cls.env.company.fulfillment_lot_sequence_id = cls.lot_sequence
+        cls.api_key = cls.env['res.users.apikeys'].with_user(cls.user)._generate(_SCOPE, 'fulfillment api test', False)
+        cls.Staging = cls.env['incoming_staging']
+
+    def _order(self, resi_no, lines=1):
+        return {
+            'resi_no': resi_no,
+            'type': 'inbound',
+            'datetime_string': '2025-10-26T01:13:55',
+            'target_market': 'B2B',
+            'products': [
+                {'product_no': f'{resi_no}-P{i}', 'product_nanme': f'Product {i}', 'product_qty': 2, 'product_uom': 'Units'}
+                for i in range(lines)
+            ],
+        }
+
+    def _post(self, url, body, idempotency_key=None):
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+        }
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        return self.url_open(url, data=json.dumps(body), headers=headers)
+
+    def _next_lot_number(self):
+        self.lot_sequence.invalidate_recordset(['number_next_actual'])
+        return self.lot_sequence.number_next_actual
+
+    def test_batch_reserves_lots_for_valid_orders_only(self):
+        first = self._next_lot_number()
+        invalid_type = dict(self._order('API-BATCH-BADTYPE'), type='unknown')
+        missing_products = {k: v for k, v in self._order('API-BATCH-NOPRODUCT').items() if k != 'products'}
+        items = [self._order('API-BATCH-1'), invalid_type, self._order('API-BATCH-2', lines=2), missing_products]
+
+        response = self._post('/api/incoming_staging/batch', items)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([res['status'] for res in data['results']], ['created', 'error', 'created', 'error'])
+        self.assertEqual(data['summary'], {'total': 4, 'created': 2, 'duplicate': 0, 'error': 2})
+
+        # exactly one lot number per line of the valid orders, in order, none burnt on the rejected ones
+        lines = self.Staging.search([('transaction_no', 'in', ['API-BATCH-1', 'API-BATCH-2'])],
+                                    order='transaction_no').products.sorted('id')
+        expected = [self.lot_sequence.get_next_char(first + i) for i in range(3)]
+        self.assertEqual(lines.mapped('tracking_no'), expected)
+        self.assertEqual(set(lines.mapped('tracking_type')), {'lot'})
+        self.assertEqual(self._next_lot_number(), first + 3)
+
+    def test_batch_falls_back_to_one_savepoint_per_order(self):
+        IncomingStaging = type(self.Staging)
+        create = IncomingStaging.create
+
+        def failing_create(model, vals_list):
+            vals_seq = vals_list if isinstance(vals_list, list) else [vals_list]
+            if any(vals.get('transaction_no') == 'API-FALLBACK-BAD' for vals in vals_seq):
+                raise ValidationError('rejected at create')
+            return create(model, vals_list)
+
+        items = [self._order('API-FALLBACK-1'), self._order('API-FALLBACK-BAD'), self._order('API-FALLBACK-2')]
+        with patch.object(IncomingStaging, 'create', failing_create):
+            response = self._post('/api/incoming_staging/batch', items)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([res['status'] for res in results], ['created', 'error', 'created'])
+        self.assertEqual(results[1]['error'], 'validation_error')
+        self.assertEqual(
+            sorted(self.Staging.search([('transaction_no', 'like', 'API-FALLBACK-')]).mapped('transaction_no')),
+            ['API-FALLBACK-1', 'API-FALLBACK-2'],
+        )
+
+    def test_idempotent_replay(self):
+        order = self._order('API-IDEMPOTENT-1')
+        first = self._post('/api/incoming_staging', order, idempotency_key='api-test-replay')
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+
+        replay = self._post('/api/incoming_staging', order, idempotency_key='api-test-replay')
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.headers.get('Idempotent-Replayed'), 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(self.Staging.search_count([('transaction_no', '=', 'API-IDEMPOTENT-1')]), 1)
+
+        reused = self._post('/api/incoming_staging', self._order('API-IDEMPOTENT-2'),
+                            idempotency_key='api-test-replay')
+        self.assertEqual(reused.status_code, 422)
+        self.assertEqual(reused.json()['error'], 'idempotency_key_reused')
+
+    def test_idempotency_conflict(self):
+        """A key stored concurrently answers 409 and drops the staging created by the request"""
+        Idempotency = type(self.env['incoming_staging_idempotency'])
+        with patch.object(Idempotency, '_store', side_effect=Exception('duplicate key')):
+            response = self._post('/api/incoming_staging', self._order('API-CONFLICT-1'),
+                                  idempotency_key='api-test-conflict')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['error'], 'idempotency_conflict')
+        self.assertFalse(self.Staging.search([('transaction_no', '=', 'API-CONFLICT-1')]))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from odoo.exceptions import AccessDenied
+from odoo.tests.common import TransactionCase, new_test_user
+
+_SCOPE = 'odoo.plugin.outlook'
+
+
+class TestResUsersApikeys(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = new_test_user(cls.env, login='fulfillment_api_user', groups='base.group_user')
+
+    def _generate_key(self):
+        Apikeys = self.env['res.users.apikeys'].with_user(self.user)
+        key = Apikeys._generate(_SCOPE, 'fulfillment test key', False)
+        apikey = Apikeys.search([('user_id', '=', self.user.id)], order='id desc', limit=1)
+        return key, apikey
+
+    def test_cached_credentials(self):
+        key, _apikey = self._generate_key()
+        Apikeys = self.env['res.users.apikeys']
+        user_id, _context = Apikeys._fulfillment_check_credentials(_SCOPE, key)
+        self.assertEqual(user_id, self.user.id)
+        # second call is served from the cache
+        self.assertEqual(Apikeys._fulfillment_check_credentials(_SCOPE, key)[0], self.user.id)
+        with self.assertRaises(AccessDenied):
+            Apikeys._fulfillment_check_credentials(_SCOPE, key + 'x')
+
+    def test_revoked_key_is_refused(self):
+        """Revoking through _remove() (raw SQL delete) must drop the cached verification"""
+        key, apikey = self._generate_key()
+        Apikeys = self.env['res.users.apikeys']
+        self.assertEqual(Apikeys._fulfillment_check_credentials(_SCOPE, key)[0], self.user.id)
+        apikey._remove()
+        with self.assertRaises(AccessDenied):
+            Apikeys._fulfillment_check_credentials(_SCOPE, key)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+# fields copied by stock_picking_route_copy, passed explicitly to skip the propagation
+_COPIED_FIELDS = {
+    'principal_courier_id': False,
+    'principal_customer_name': False,
+    'principal_customer_address': False,
+    'partner_type': False,
+}
+
+
+class TestStockPickingRouteCopy(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.picking_type = cls.env.ref('stock.picking_type_out')
+        cls.location = cls.env.ref('stock.stock_location_stock')
+        cls.location_dest = cls.env.ref('stock.stock_location_customers')
+        cls.source = cls.env['stock.picking'].create(dict(
+            cls._picking_vals(cls, 'ROUTE-COPY-SRC'),
+            principal_customer_name='Route Copy Customer',
+        ))
+
+    def _picking_vals(self, origin):
+        return {
+            'picking_type_id': self.picking_type.id,
+            'location_id': self.location.id,
+            'location_dest_id': self.location_dest.id,
+            'origin': origin,
+        }
+
+    def _count_create_queries(self, count, explicit):
+        extra = _COPIED_FIELDS if explicit else {}
+        vals_list = [dict(self._picking_vals(self.source.name), **extra) for _i in range(count)]
+        self.env.flush_all()
+        start_queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        pickings = self.env['stock.picking'].create(vals_list)
+        self.env.flush_all()
+        elapsed = time.perf_counter() - start
+        return pickings, self.env.cr.sql_log_count - start_queries, elapsed
+
+    def test_create_propagates_source_fields(self):
+        pickings, _queries, _elapsed = self._count_create_queries(5, explicit=False)
+        self.assertEqual(set(pickings.mapped('principal_customer_name')), {'Route Copy Customer'})
+
+    def test_create_1000_query_count(self):
+        """Benchmark: the route-copy lookups and writes cost a constant number of queries,
+        whatever the number of pickings created at once"""
+        overheads = {}
+        for count in (10, 1000):
+            pickings, queries, elapsed = self._count_create_queries(count, explicit=False)
+            _base, base_queries, base_elapsed = self._count_create_queries(count, explicit=True)
+            overheads[count] = queries - base_queries
+            _logger.info(
+                "route copy create of %d pickings: %d queries (%.2fs), %d without propagation (%.2fs)",
+                count, queries, elapsed, base_queries, base_elapsed,
+            )
+            self.assertEqual(set(pickings.mapped('principal_customer_name')), {'Route Copy Customer'})
+        self.assertLessEqual(overheads[1000], overheads[10] + 2)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase
+
+
+class TestStockPickingTypeCounter(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Counter = cls.env['stock_picking_type_counter']
+        cls.picking_type = cls.env.ref('stock.picking_type_out')
+        cls.location = cls.env.ref('stock.stock_location_stock')
+        cls.location_dest = cls.env.ref('stock.stock_location_customers')
+
+    def _create_picking(self, **vals):
+        return self.env['stock.picking'].create(dict({
+            'picking_type_id': self.picking_type.id,
+            'location_id': self.location.id,
+            'location_dest_id': self.location_dest.id,
+        }, **vals))
+
+    def _counts(self):
+        return self.Counter._get_counts(self.picking_type.ids).get(self.picking_type.id, {})
+
+    def _count_rows(self):
+        self.env.cr.execute("""
+            SELECT state, priority, COUNT(*)
+              FROM stock_picking_type_counter
+             WHERE picking_type_id = %s
+             GROUP BY state, priority
+        """, (self.picking_type.id,))
+        return {f'{state}_{priority}': rows for state, priority, rows in self.env.cr.fetchall()}
+
+    def test_trigger_counts(self):
+        """The stock_picking trigger keeps the buckets in line with the pickings"""
+        before = self._counts()
+        picking = self._create_picking()
+        self.assertEqual(self._counts().get('draft_reguler', 0), before.get('draft_reguler', 0) + 1)
+
+        backorder = self._create_picking(backorder_id=picking.id)
+        counts = self._counts()
+        self.assertEqual(counts.get('draft_reguler', 0), before.get('draft_reguler', 0) + 2)
+        self.assertEqual(counts.get('backorder_reguler', 0), before.get('backorder_reguler', 0) + 1)
+
+        # cancelled pickings leave the state buckets, deleted ones every bucket
+        picking.action_cancel()
+        self.assertEqual(self._counts().get('draft_reguler', 0), before.get('draft_reguler', 0) + 1)
+        backorder.unlink()
+        counts = self._counts()
+        self.assertEqual(counts.get('draft_reguler', 0), before.get('draft_reguler', 0))
+        self.assertEqual(counts.get('backorder_reguler', 0), before.get('backorder_reguler', 0))
+
+    def test_compact_keeps_counts(self):
+        """_compact folds the delta rows into one row per bucket without changing the counts"""
+        pickings = self._create_picking() | self._create_picking() | self._create_picking()
+        pickings[0].action_cancel()
+        self.env.flush_all()
+        # the deltas of the current transaction are left to the push at commit, age them
+        self.env.cr.execute("UPDATE stock_picking_type_counter SET tx = NULL WHERE tx = txid_current()")
+        before = self._counts()
+        self.assertGreater(self._count_rows().get('draft_reguler', 0), 1)
+
+        self.Counter._compact()
+
+        self.assertEqual(self._counts(), {key: count for key, count in before.items() if count})
+        self.assertTrue(all(rows == 1 for rows in self._count_rows().values()))
@@ -5,3 +5,4 @@
 from . import product
 from . import stock_quant
 from . import stock_location
+from . import stock_picking
@@ -0,0 +1,144 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import models
+from odoo.tools import float_compare
+
+# Net quantity each picking line brings to a (product, location, lot):
+# - lines mode: the move lines about to be validated (only the picked ones when the
+#   picking has picked lines, like the validation itself), exact location and lot;
+# - demand mode: the open moves at their full demand, before any move line exists
+#   (no lot, and the move location also covers its sub-locations).
+_LINES_DELTA_SQL = """
+    SELECT ml.picking_id, ml.product_id, ml.location_id, ml.lot_id,
+           -ml.quantity_product_uom AS qty
+      FROM stock_move_line ml
+     WHERE ml.picking_id = ANY(%(picking_ids)s)
+       AND ml.state NOT IN ('done', 'cancel')
+       AND (ml.picked OR NOT EXISTS (
+                SELECT 1 FROM stock_move_line picked
+                 WHERE picked.picking_id = ml.picking_id AND picked.picked))
+    UNION ALL
+    SELECT ml.picking_id, ml.product_id, ml.location_dest_id, ml.lot_id,
+           ml.quantity_product_uom
+      FROM stock_move_line ml
+     WHERE ml.picking_id = ANY(%(picking_ids)s)
+       AND ml.state NOT IN ('done', 'cancel')
+       AND (ml.picked OR NOT EXISTS (
+                SELECT 1 FROM stock_move_line picked
+                 WHERE picked.picking_id = ml.picking_id AND picked.picked))
+"""
+_DEMAND_DELTA_SQL = """
+    SELECT move.picking_id, move.product_id, move.location_id, NULL::integer,
+           -move.product_qty
+      FROM stock_move move
+     WHERE move.picking_id = ANY(%(picking_ids)s)
+       AND move.state NOT IN ('done', 'cancel')
+    UNION ALL
+    SELECT move.picking_id, move.product_id, move.location_dest_id, NULL::integer,
+           move.product_qty
+      FROM stock_move move
+     WHERE move.picking_id = ANY(%(picking_ids)s)
+       AND move.state NOT IN ('done', 'cancel')
+"""
+
+
+class StockPicking(models.Model):
+    _inherit = "stock.picking"
+
+    def button_validate(self):
+        self._check_no_negative_projection()
+        return super().button_validate()
+
+    def _check_no_negative_projection(self, demand=False):
+        """Reject the validation of the pickings up front when it would make the
+        stock of a product negative where negative stock is not allowed.
+
+        Same rule as the stock.quant constraint, evaluated on the projected stock
+        before any move or quant is written, so a failing validation does not run
+        (and roll back) the whole done flow.
+        """
+        violations = self._get_no_negative_projection(demand=demand)
+        if violations:
+            violation = violations[0]
+            raise self.env["stock.quant"]._get_negative_qty_error(
+                violation["product"],
+                violation["location"],
+                violation["lot"],
+                violation["quantity"],
+            )
+
+    def _get_no_negative_projection(self, demand=False):
+        """Return the (product, location, lot) the validation of self would drive
+        negative, as dicts with product, location, lot, the projected quantity and
+        the pickings involved.
+
+        The quantities of all pickings are aggregated and compared with the
+        quants and the allow flags in a single query.
+        """
+        Quant = self.env["stock.quant"]
+        picking_ids = [picking_id for picking_id in self.ids if picking_id]
+        if not picking_ids or not Quant._is_negative_qty_check_enabled():
+            return []
+        self.env.flush_all()
+        self.env.cr.execute(
+            """
+            WITH delta(picking_id, product_id, location_id, lot_id, qty) AS (
+                {delta}
+            ),
+            net AS (
+                SELECT product_id, location_id, lot_id, SUM(qty) AS qty,
+                       array_agg(DISTINCT picking_id) AS picking_ids
+                  FROM delta
+                 GROUP BY product_id, location_id, lot_id
+                HAVING SUM(qty) < 0
+            )
+            SELECT net.product_id, net.location_id, net.lot_id,
+                   net.qty + COALESCE((
+                       SELECT SUM(quant.quantity)
+                         FROM stock_quant quant
+                         JOIN stock_location quant_loc
+                           ON quant_loc.id = quant.location_id
+                        WHERE quant.product_id = net.product_id
+                          AND {location_match}
+                          AND {lot_match}
+                   ), 0) AS projected,
+                   net.picking_ids
+              FROM net
+              JOIN product_product product ON product.id = net.product_id
+              JOIN product_template tmpl ON tmpl.id = product.product_tmpl_id
+              LEFT JOIN product_category categ ON categ.id = tmpl.categ_id
+              JOIN stock_location location ON location.id = net.location_id
+             WHERE tmpl.is_storable
+               AND location.usage IN ('internal', 'transit')
+               AND NOT COALESCE(tmpl.allow_negative_stock, FALSE)
+               AND NOT COALESCE(categ.allow_negative_stock, FALSE)
+               AND NOT COALESCE(location.allow_negative_stock, FALSE)
+             ORDER BY net.product_id, net.location_id, net.lot_id
+            """.format(
+                delta=_DEMAND_DELTA_SQL if demand else _LINES_DELTA_SQL,
+                location_match=(
+                    "quant_loc.parent_path LIKE location.parent_path || '%%'"
+                    if demand
+                    else "quant.location_id = net.location_id"
+                ),
+                lot_match=(
+                    "TRUE" if demand else "quant.lot_id IS NOT DISTINCT FROM net.lot_id"
+                ),
+            ),
+            {"picking_ids": picking_ids},
+        )
+        rows = self.env.cr.fetchall()
+        precision = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        return [
+            {
+                "product": self.env["product.product"].browse(product_id),
+                "location": self.env["stock.location"].browse(location_id),
+                "lot": self.env["stock.lot"].browse(lot_id),
+                "quantity": projected,
+                "pickings": self.browse(pickings),
+            }
+            for product_id, location_id, lot_id, projected, pickings in rows
+            if float_compare(projected, 0, precision_digits=precision) == -1
+        ]
@@ -10,48 +10,92 @@ from odoo.tools import config, float_compare
 class StockQuant(models.Model):
     _inherit = "stock.quant"
 
-    @api.constrains("product_id", "quantity")
-    def check_negative_qty(self):
+    @api.model
+    def _is_negative_qty_check_enabled(self):
         # To provide an option to skip the check when necessary.
         # e.g. mrp_subcontracting_skip_no_negative - passes the context
         # for subcontracting receipts.
         if self.env.context.get("skip_negative_qty_check"):
-            return
-        p = self.env["decimal.precision"].precision_get("Product Unit of Measure")
-        check_negative_qty = (
+            return False
+        return (
             config["test_enable"] and self.env.context.get("test_stock_no_negative")
         ) or not config["test_enable"]
-        if not check_negative_qty:
+
+    @api.model
+    def _get_negative_qty_error(self, product, location, lot, quantity):
+        msg_add = ""
+        if lot:
+            msg_add = _(" lot %(name)s", name=lot.display_name)
+        return ValidationError(
+            _(
+                "You cannot validate this stock operation because the "
+                "stock level of the product '{name}'{name_lot} would "
+                "become negative "
+                "({q_quantity}) on the stock location '{complete_name}' "
+                "and negative stock is "
+                "not allowed for this product and/or location."
+            ).format(
+                name=product.display_name,
+                name_lot=msg_add,
+                q_quantity=quantity,
+                complete_name=location.complete_name,
+            )
+        )
+
+    @api.constrains("product_id", "quantity")
+    def check_negative_qty(self):
+        if not self._is_negative_qty_check_enabled():
             return
+        p = self.env["decimal.precision"].precision_get("Product Unit of Measure")
 
-        for quant in self:
-            disallowed_by_product = (
-                not quant.product_id.allow_negative_stock
-                and not quant.product_id.categ_id.allow_negative_stock
+        quant = self._get_disallowed_negative_quants(p)[:1]
+        if quant:
+            raise self._get_negative_qty_error(
+                quant.product_id, quant.location_id, quant.lot_id, quant.quantity
             )
-            disallowed_by_location = not quant.location_id.allow_negative_stock
-            if (
-                float_compare(quant.quantity, 0, precision_digits=p) == -1
-                and quant.product_id.is_storable
-                and quant.location_id.usage in ["internal", "transit"]
-                and disallowed_by_product
-                and disallowed_by_location
-            ):
-                msg_add = ""
-                if quant.lot_id:
-                    msg_add = _(" lot %(name)s", name=quant.lot_id.display_name)
-                raise ValidationError(
-                    _(
-                        "You cannot validate this stock operation because the "
-                        "stock level of the product '{name}'{name_lot} would "
-                        "become negative "
-                        "({q_quantity}) on the stock location '{complete_name}' "
-                        "and negative stock is "
-                        "not allowed for this product and/or location."
-                    ).format(
-                        name=quant.product_id.display_name,
-                        name_lot=msg_add,
-                        q_quantity=quant.quantity,
-                        complete_name=quant.location_id.complete_name,
-                    )
-                )
+
+    def _get_disallowed_negative_quants(self, precision_digits):
+        """Return the quants of self that are negative while negative stock is allowed
+        neither by their product (or its category) nor by their location.
+
+        Only the quants that went negative are selected from the database, then the
+        allow flags of those few rows are resolved with a single join, so the cost of
+        the check does not grow with the number of quants written.
+        """
+        ids = [quant_id for quant_id in self.ids if quant_id]
+        if not ids:
+            return self.browse()
+        self.flush_model(["product_id", "location_id", "quantity"])
+        self.env.cr.execute(
+            "SELECT id, quantity FROM stock_quant WHERE id = ANY(%s) AND quantity < 0",
+            (ids,),
+        )
+        negative_ids = [
+            quant_id
+            for quant_id, quantity in self.env.cr.fetchall()
+            if float_compare(quantity, 0, precision_digits=precision_digits) == -1
+        ]
+        if not negative_ids:
+            return self.browse()
+        self.env["product.template"].flush_model(["is_storable", "allow_negative_stock"])
+        self.env["product.category"].flush_model(["allow_negative_stock"])
+        self.env["stock.location"].flush_model(["usage", "allow_negative_stock"])
+        self.env.cr.execute(
+            """
+            SELECT quant.id
+              FROM stock_quant quant
+              JOIN product_product product ON product.id = quant.product_id
+              JOIN product_template tmpl ON tmpl.id = product.product_tmpl_id
+              LEFT JOIN product_category categ ON categ.id = tmpl.categ_id
+              JOIN stock_location location ON location.id = quant.location_id
+             WHERE quant.id = ANY(%s)
+               AND tmpl.is_storable
+               AND location.usage IN ('internal', 'transit')
+               AND NOT COALESCE(tmpl.allow_negative_stock, FALSE)
+               AND NOT COALESCE(categ.allow_negative_stock, FALSE)
+               AND NOT COALESCE(location.allow_negative_stock, FALSE)
+             ORDER BY quant.id
+            """,
+            (negative_ids,),
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
@@ -6,3 +6,4 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 from . import test_stock_no_negative
+from . import test_stock_no_negative_batch
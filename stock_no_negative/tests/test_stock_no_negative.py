@@ -211,3 +211,19 @@ class TestStockNoNegative(TransactionCase):
             ]
         )
         self.assertEqual(quant.quantity, -100)
+
+    def test_projection_rejects_before_validation(self):
+        """Assert that the projection reports the negative stock before
+        any move is done, and not when negative stock is allowed"""
+        picking = self.stock_picking
+        picking.action_confirm()
+        violations = picking._get_no_negative_projection()
+        self.assertEqual(len(violations), 1)
+        self.assertEqual(violations[0]["product"], self.product)
+        self.assertEqual(violations[0]["location"], self.location_id)
+        self.assertEqual(violations[0]["quantity"], -100)
+        with self.assertRaises(ValidationError):
+            picking._check_no_negative_projection()
+        self.assertNotEqual(self.stock_move.state, "done")
+        self.product.allow_negative_stock = True
+        self.assertFalse(picking._get_no_negative_projection())
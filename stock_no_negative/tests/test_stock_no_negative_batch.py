@@ -0,0 +1,65 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo.exceptions import ValidationError
+from odoo.tests.common import TransactionCase
+
+
+class TestStockNoNegativeBatch(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.location = cls.env.ref("stock.stock_location_stock")
+        cls.categ = cls.env["product.category"].create(
+            {"name": "test_batch_ctg", "allow_negative_stock": False}
+        )
+        cls.products = cls.env["product.product"].create(
+            [
+                {
+                    "name": "test_batch_product_%s" % index,
+                    "categ_id": cls.categ.id,
+                    "is_storable": True,
+                    "type": "consu",
+                    "allow_negative_stock": index % 2 == 0,
+                }
+                for index in range(200)
+            ]
+        )
+        Quant = cls.env["stock.quant"]
+        for index, product in enumerate(cls.products):
+            # positive stock and allowed negative stock, none must raise
+            quantity = -1.0 if product.allow_negative_stock else 1.0 + index
+            Quant._update_available_quantity(product, cls.location, quantity)
+        cls.quants = Quant.search(
+            [
+                ("product_id", "in", cls.products.ids),
+                ("location_id", "=", cls.location.id),
+            ]
+        )
+
+    def _count_check_queries(self, quants):
+        quants = quants.with_context(test_stock_no_negative=True)
+        # warm the precision cache so both measures only count the check itself
+        self.env["decimal.precision"].precision_get("Product Unit of Measure")
+        self.env.invalidate_all()
+        self.env.flush_all()
+        start = self.env.cr.sql_log_count
+        quants.check_negative_qty()
+        return self.env.cr.sql_log_count - start
+
+    def test_check_cost_is_flat(self):
+        """The constraint issues the same number of queries whatever the
+        number of quants checked"""
+        self.assertEqual(len(self.quants), 200)
+        small = self._count_check_queries(self.quants[:10])
+        large = self._count_check_queries(self.quants)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 2)
+
+    def test_check_raises_in_batch(self):
+        """A single disallowed negative quant in a large batch is still caught"""
+        product = self.products.filtered(lambda p: not p.allow_negative_stock)[:1]
+        self.env["stock.quant"]._update_available_quantity(
+            product, self.location, -100.0
+        )
+        with self.assertRaises(ValidationError):
+            self.quants.with_context(test_stock_no_negative=True).check_negative_qty()
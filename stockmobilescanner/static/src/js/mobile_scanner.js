@@ -202,8 +202,10 @@ import { rpc } from "@web/core/network/rpc";
       setResult(text);
 
       try {
-        var parsed = JSON.parse(text);
-        if (parsed && parsed.qr_type === 'incomingstaging') {
+        // compact ('IS1C:') / reference-only ('IS1R:') incoming staging codes are decoded server side
+        var isCompact = /^IS1[CR]:/.test(text);
+        var parsed = isCompact ? text : JSON.parse(text);
+        if (parsed && (isCompact || parsed.qr_type === 'incomingstaging')) {
           showStatus('Processing incoming staging QR...', 'alert-info');
 
           rpcPostPayload(parsed).then(function (result) {
@@ -133,7 +133,9 @@ import { rpc } from "@web/core/network/rpc";
 
     function sendPayloadToBackendIfIncomingStaging(parsed) {
       try {
-        if (parsed && parsed.qr_type === 'incomingstaging') {
+        // compact ('IS1C:') / reference-only ('IS1R:') codes are passed as raw text and decoded server side
+        var isCompact = typeof parsed === 'string' && /^IS1[CR]:/.test(parsed);
+        if (parsed && (isCompact || parsed.qr_type === 'incomingstaging')) {
           showStatus('Processing incoming staging QR...', 'alert-info');
 
           rpcPostPayload(parsed).then(function (result) {
@@ -199,7 +201,7 @@ import { rpc } from "@web/core/network/rpc";
             showStatus('QR code decoded', 'alert-success');
             setResult(decoded);
             try {
-              var parsed = JSON.parse(decoded);
+              var parsed = /^IS1[CR]:/.test(decoded) ? decoded : JSON.parse(decoded);
               sendPayloadToBackendIfIncomingStaging(parsed);
             } catch (e) {
               // not JSON: nothing to do